@@ -1,37 +1,80 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 
 from database import db_session, init_db
+from json_provider import init_json_provider
+from compression import init_compression
 from routes.auth import auth_bp
 from routes.requests import requests_bp
 from routes.templates import templates_bp
 from routes.packets import packets_bp
+from routes.dashboard import dashboard_bp
+from services.export_store import start_sweeper
+from services.dashboard_stats import start_reconciler
+
+_IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
 
 def create_app():
+    started = time.perf_counter()
     load_dotenv()
     app = Flask(__name__)
     app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET_KEY", "dev-secret")
     CORS(app, supports_credentials=True)
+    init_json_provider(app)
+    init_compression(app)
 
-    init_db()
+    db_started = time.perf_counter()
+    schema_synced = init_db()
+    db_ms = (time.perf_counter() - db_started) * 1000
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(requests_bp, url_prefix="/api/requests")
     app.register_blueprint(templates_bp, url_prefix="/api/templates")
     app.register_blueprint(packets_bp, url_prefix="/api/packets")
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
 
     @app.teardown_appcontext
     def shutdown_session(exception=None):
         db_session.remove()
 
+    start_sweeper(app)
+    start_reconciler(app)
+
     @app.get("/api/health")
     def health():
         return {"ok": True}
 
+    report_startup(app, db_ms, schema_synced, (time.perf_counter() - started) * 1000)
     return app
 
+def report_startup(app, db_ms, schema_synced, factory_ms):
+    """
+    Log how long imports and create_app took, and warn when the total goes
+    over STARTUP_BUDGET_MS.
+    """
+    total_ms = _IMPORT_MS + factory_ms
+    app.config["STARTUP_TIMINGS"] = {
+        "imports_ms": round(_IMPORT_MS, 1),
+        "init_db_ms": round(db_ms, 1),
+        "create_app_ms": round(factory_ms, 1),
+        "total_ms": round(total_ms, 1),
+        "schema_synced": schema_synced,
+    }
+    budget_ms = float(os.getenv("STARTUP_BUDGET_MS", "0"))
+    if budget_ms and total_ms > budget_ms:
+        app.logger.warning(
+            "Startup took %.1f ms (budget %.0f ms): imports %.1f ms, init_db %.1f ms",
+            total_ms, budget_ms, _IMPORT_MS, db_ms,
+        )
+    else:
+        app.logger.info("Startup timings: %s", app.config["STARTUP_TIMINGS"])
+
 app = create_app()
 
 if __name__ == "__main__":
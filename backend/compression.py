@@ -0,0 +1,98 @@
+"""
+Negotiated gzip/brotli compression for API responses.
+
+Only buffered JSON/text bodies above COMPRESS_MIN_SIZE are compressed.
+File downloads (send_file/send_from_directory use direct passthrough),
+streamed responses and already-compressed formats such as DOCX, ZIP and
+PDF are passed through untouched. Bodies of responses that carry an ETag
+are compressed once and then served from an LRU keyed by (ETag, encoding).
+"""
+from flask import request
+import gzip
+import os
+
+from services.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+_compressed_cache = LRUCache(
+    maxsize=1024,
+    max_bytes=int(os.getenv("COMPRESS_CACHE_BYTES", str(16 * 1024 * 1024))),
+    sizeof=len,
+)
+
+
+def _is_compressible(mimetype):
+    return mimetype in COMPRESSIBLE_MIMETYPES or (mimetype or "").startswith("text/")
+
+
+def choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compression_stats():
+    return _compressed_cache.stats()
+
+
+def init_compression(app):
+    if os.getenv("COMPRESS_RESPONSES", "true").lower() != "true":
+        return
+
+    min_size = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    level = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or not _is_compressible(response.mimetype)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        etag, _weak = response.get_etag()
+        if etag:
+            key = (etag, encoding)
+            body = _compressed_cache.get(key)
+            if body is None:
+                body = _compressed_cache.put(key, compress(data, encoding, level))
+            # the compressed representation is no longer byte-identical
+            response.set_etag(etag, weak=True)
+        else:
+            body = compress(data, encoding, level)
+
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        return response
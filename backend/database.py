@@ -1,5 +1,7 @@
 import os
-from sqlalchemy import create_engine
+import hashlib
+from sqlalchemy import create_engine, Table, Column, String, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///app.db")
@@ -9,7 +11,63 @@ db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind
 Base = declarative_base()
 Base.query = db_session.query_property()
 
-def init_db():
+# Single-row key/value table recording which schema the DB was built for.
+schema_meta = Table(
+    "schema_meta",
+    Base.metadata,
+    Column("key", String, primary_key=True),
+    Column("value", String, nullable=False),
+)
+
+
+# DDL that create_all cannot express (virtual tables, triggers, indexes added
+# to existing tables). Registered with @schema_extension(version); the
+# versions are part of the fingerprint, so bumping one re-runs init_db.
+SCHEMA_EXTENSIONS = []
+
+
+def schema_extension(version):
+    def decorator(fn):
+        SCHEMA_EXTENSIONS.append((f"{fn.__module__}.{fn.__name__}:{version}", fn))
+        return fn
+    return decorator
+
+
+def schema_fingerprint():
+    """
+    Hash of every table/column/index definition known to Base.metadata.
+    Changes whenever a model changes, so there is no version number to bump by hand.
+    """
+    h = hashlib.sha256()
+    for name in sorted(Base.metadata.tables):
+        table = Base.metadata.tables[name]
+        h.update(name.encode())
+        for col in table.columns:
+            h.update(f"|{col.name}:{col.type}:{col.nullable}:{col.primary_key}".encode())
+        for idx in sorted(table.indexes, key=lambda i: i.name or ""):
+            h.update(f"|idx:{idx.name}:{[c.name for c in idx.columns]}".encode())
+    for key, _ in sorted(SCHEMA_EXTENSIONS, key=lambda e: e[0]):
+        h.update(f"|ext:{key}".encode())
+    return h.hexdigest()[:16]
+
+
+def stored_schema_version():
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(schema_meta.c.value).where(schema_meta.c.key == "schema_version")
+            ).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def init_db(fast=None):
+    """
+    Create missing tables.
+
+    fast=True (or FAST_START=true) skips the reflection + create_all pass
+    when the stored schema version already matches the models.
+    """
     # Import all models so Base.metadata.create_all sees them
     from models import (
         User,
@@ -20,5 +78,30 @@ def init_db():
         TemplateSection,
         Packet,
         PacketSection,
+        ExportArtifact,
+        DashboardStat,
+        PacketEvent,
+        Tombstone,
+        SyncCounter,
+        TableVersion,
     )
+    # modules that register schema extensions
+    import response_cache
+    import services.search
+    import services.dashboard_stats
+    import services.import_service
+    import services.sync
+    if fast is None:
+        fast = os.getenv("FAST_START", "false").lower() == "true"
+
+    version = schema_fingerprint()
+    if fast and stored_schema_version() == version:
+        return False
+
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for _, extension in SCHEMA_EXTENSIONS:
+            extension(conn)
+        conn.execute(schema_meta.delete().where(schema_meta.c.key == "schema_version"))
+        conn.execute(schema_meta.insert().values(key="schema_version", value=version))
+    return True
@@ -0,0 +1,46 @@
+"""
+Pluggable JSON provider for API responses.
+
+JSON_PROVIDER=fast (default) uses orjson when it is installed and falls
+back to a compact stdlib encoder otherwise; JSON_PROVIDER=default keeps
+Flask's stock provider.
+"""
+from flask.json.provider import DefaultJSONProvider
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Same output rules as Flask's provider (sorted keys, its default() for
+    dates/decimals/dataclasses), minus pretty-printing and the per-call
+    kwargs overhead.
+    """
+
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.dumps(
+                    obj,
+                    default=self.default,
+                    option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+                ).decode("utf-8")
+            except TypeError:
+                pass  # e.g. non-str dict keys; let the stdlib encoder handle it
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs)
+
+
+def init_json_provider(app):
+    if os.getenv("JSON_PROVIDER", "fast").lower() == "fast":
+        app.json = FastJSONProvider(app)
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     Boolean,
+    Float,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -57,6 +58,7 @@ class StudentRequest(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_seq = Column(Integer, nullable=True)  # set at commit by services.sync
 
 
     advisor = relationship("User")
@@ -173,6 +175,8 @@ class Packet(Base):
     status = Column(String, default="draft")  # "draft" | "finalized"
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finalized_at = Column(DateTime, nullable=True)  # set/cleared by services.dashboard_stats
+    sync_seq = Column(Integer, nullable=True)  # set at commit by services.sync
 
     request = relationship("StudentRequest")
     template = relationship("Template")
@@ -184,6 +188,13 @@ class Packet(Base):
     )
 
 
+# Section types whose packet content differs per student: the intro is
+# filled with the student's details at generation, the other two are
+# written by the advisor. Renderers don't cache these; advisors may edit
+# them while the packet is a draft.
+PER_STUDENT_SECTION_TYPES = frozenset({"intro", "degree_audit", "advisor_notes"})
+
+
 class PacketSection(Base):
     """
     Frozen section in a generated packet.
@@ -192,9 +203,8 @@ class PacketSection(Base):
     content_type copied from SourceContent.content_type (or inferred).
     content is final text/table json/etc. at generation time.
 
-    Advisor can still edit content in 'draft' packets for:
-    - degree_audit
-    - advisor_notes
+    Advisor can still edit content in 'draft' packets for the
+    PER_STUDENT_SECTION_TYPES (intro, degree_audit, advisor_notes)
     before finalizing.
     """
     __tablename__ = "packet_sections"
@@ -213,4 +223,109 @@ class PacketSection(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-    packet = relationship("Packet", back_populates="sections")
\ No newline at end of file
+    packet = relationship("Packet", back_populates="sections")
+
+class ExportArtifact(Base):
+    """
+    A file written under EXPORT_DIR by an export.
+
+    Tracked so the export store can enforce a disk budget and TTL:
+    size_bytes is the file size, last_accessed_at is bumped on every
+    write/download, and packet_id lets eviction prefer draft packets.
+    """
+    __tablename__ = "export_artifacts"
+
+    id = Column(Integer, primary_key=True)
+
+    filename = Column(String, nullable=False, unique=True)  # e.g. "packet_3.docx"
+    packet_id = Column(Integer, ForeignKey("packets.id"), nullable=True)
+    fmt = Column(String, nullable=True)  # "docx" | "pdf"
+
+    size_bytes = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    packet = relationship("Packet")
+
+
+class DashboardStat(Base):
+    """
+    Precomputed dashboard aggregate, one row per (advisor, metric, dimension).
+
+    metric / dimension pairs:
+      - 'requests_by_program' / target_program ('' when unset)
+      - 'packets_by_status'   / 'draft' | 'finalized'
+      - 'turnaround'          / '' -- count = finalized packets,
+                                      total = summed seconds from request to finalize
+
+    Kept up to date incrementally by services.dashboard_stats and rebuilt
+    from scratch by its reconcile().
+    """
+    __tablename__ = "dashboard_stats"
+
+    advisor_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    metric = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True, default="")
+
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+
+
+class PacketEvent(Base):
+    """
+    Packet activity feed entry, used when EVENT_BROADCASTER=db so every
+    worker process sees the same stream (see services.events).
+
+    type is one of 'packet.created', 'packet.section_updated',
+    'packet.section_added', 'packet.finalized', 'packet.exported'.
+    """
+    __tablename__ = "packet_events"
+
+    id = Column(Integer, primary_key=True)
+
+    type = Column(String, nullable=False)
+    packet_id = Column(Integer, nullable=True)
+    request_id = Column(Integer, nullable=True)
+    advisor_id = Column(Integer, nullable=True, index=True)
+    data = Column(Text, nullable=True)  # JSON payload
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Tombstone(Base):
+    """
+    Record of a deleted row, so delta-sync clients can drop it locally.
+    Kept for SYNC_TOMBSTONE_DAYS; older cursors must do a full resync.
+    """
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+
+    table_name = Column(String, nullable=False)  # "student_requests" | "packets"
+    row_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True)
+    sync_seq = Column(Integer, nullable=True)  # set at commit by services.sync
+
+
+class SyncCounter(Base):
+    """
+    Single row handing out delta-sync sequence numbers. Incremented by each
+    committing transaction that changed a synced row, while it holds the
+    write lock, so sequence order is commit order (see services.sync).
+    """
+    __tablename__ = "sync_counter"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class TableVersion(Base):
+    """
+    Change counter per table, bumped in the same transaction as any write to
+    that table. The GET response cache keys entries on these, so every
+    worker process sees an edit the moment it commits (see response_cache).
+    """
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
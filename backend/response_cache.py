@@ -0,0 +1,137 @@
+"""
+Server-side cache for read-heavy GET endpoints.
+
+Every table has a version stamp in table_versions. Session hooks record
+which tables a transaction wrote to and bump their stamps with an UPDATE
+just before it commits, so the stamps commit or roll back together with the
+rows. A cached response is keyed by route, query args, role and the stamps
+of the tables it reads (fetched once per request), so an entry stops
+matching in every worker process the moment one of its tables changes and
+simply ages out of the LRU.
+"""
+from functools import wraps
+import hashlib
+import os
+
+from flask import make_response, request, session
+from sqlalchemy import event, select, update
+
+from database import Base, db_session, schema_extension
+from models import TableVersion
+from services.cache import LRUCache
+
+_versions = TableVersion.__table__
+
+_cache = LRUCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024))),
+    sizeof=lambda entry: len(entry[0]),
+)
+
+
+@schema_extension("1")
+def seed_table_versions(conn):
+    # one row per table, so bumping is a plain UPDATE that never races an INSERT
+    existing = set(conn.execute(select(_versions.c.name)).scalars())
+    missing = [{"name": t, "version": 0} for t in sorted(Base.metadata.tables) if t not in existing]
+    if missing:
+        conn.execute(_versions.insert(), missing)
+
+
+def table_versions(tables):
+    rows = dict(db_session.execute(
+        select(_versions.c.name, _versions.c.version).where(_versions.c.name.in_(tables))
+    ).all())
+    return tuple(rows.get(t, 0) for t in tables)
+
+
+def bump_tables(conn, tables):
+    conn.execute(
+        update(_versions)
+        .where(_versions.c.name.in_(sorted(tables)))
+        .values(version=_versions.c.version + 1)
+    )
+
+
+def _touched(sess):
+    return sess.info.setdefault("touched_tables", set())
+
+
+@event.listens_for(db_session, "after_flush")
+def _record_flushed_tables(sess, flush_context):
+    touched = _touched(sess)
+    for obj in list(sess.new) + list(sess.dirty) + list(sess.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            touched.add(table)
+
+
+@event.listens_for(db_session, "do_orm_execute")
+def _record_bulk_dml(orm_execute_state):
+    # session.execute(insert(Model), rows) and friends bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _touched(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(db_session, "before_commit")
+def _bump_touched_tables(sess):
+    # flush first so after_flush has seen everything this commit writes; the
+    # UPDATE goes through the connection so it isn't recorded as a write itself
+    sess.flush()
+    touched = sess.info.pop("touched_tables", None)
+    if touched:
+        bump_tables(sess.connection(), touched)
+
+
+@event.listens_for(db_session, "after_rollback")
+def _forget_rolled_back_tables(sess):
+    sess.info.pop("touched_tables", None)
+
+
+def cache_enabled():
+    return os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+
+
+def cached_response(*tables):
+    """
+    Cache a GET view's 200 responses until one of `tables` changes.
+    Responses carry an ETag, and a matching If-None-Match gets a 304.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not cache_enabled():
+                return fn(*args, **kwargs)
+
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                session.get("role"),
+                table_versions(tables),
+            )
+            entry = _cache.get(key)
+            if entry is None:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                entry = _cache.put(
+                    key, (body, response.mimetype, hashlib.sha1(body).hexdigest())
+                )
+
+            body, mimetype, etag = entry
+            response = make_response(body)
+            response.mimetype = mimetype
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def response_cache_stats():
+    stats = _cache.stats()
+    stats["table_versions"] = dict(db_session.execute(select(_versions.c.name, _versions.c.version)).all())
+    return stats
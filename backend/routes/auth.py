@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from models import User
 from database import db_session
-from utils import verify_password
+from utils import check_email_deliverability, hash_password, needs_rehash, verify_password_limited, PasswordVerifyBusy
 from email_validator import validate_email, EmailNotValidError
 
 auth_bp = Blueprint("auth", __name__)
@@ -13,14 +13,26 @@ def login():
     password = data.get("password", "")
 
     try:
-        validate_email(email)
+        validate_email(email, check_deliverability=check_email_deliverability())
     except EmailNotValidError:
         return {"error": "Invalid email"}, 400
 
     user = db_session.query(User).filter_by(email=email).first()
-    if not user or not verify_password(password, user.password_hash):
+    if not user:
         return {"error": "Invalid credentials"}, 401
 
+    try:
+        valid = verify_password_limited(password, user.password_hash)
+    except PasswordVerifyBusy:
+        return {"error": "Too many logins in progress, please retry"}, 503
+    if not valid:
+        return {"error": "Invalid credentials"}, 401
+
+    # Upgrade hashes made with older algorithm/cost settings
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        db_session.commit()
+
     session["uid"] = user.id
     session["role"] = user.role
     return {"id": user.id, "email": user.email, "role": user.role}
@@ -0,0 +1,33 @@
+from flask import Blueprint, request, session
+
+from routes.templates import admin_required
+from services import dashboard_stats
+
+dashboard_bp = Blueprint("dashboard", __name__)
+
+
+@dashboard_bp.get("")
+def dashboard():
+    """
+    Request/packet counts and turnaround from the precomputed summary table.
+    Advisors see their own numbers; admins see everyone, or one advisor
+    with ?advisor_id=<id>.
+    """
+    if "uid" not in session:
+        return {"error": "Unauthorized"}, 401
+
+    if session.get("role") == "admin":
+        advisor_id = request.args.get("advisor_id", type=int)
+    else:
+        advisor_id = session["uid"]
+    return dashboard_stats.summary(advisor_id)
+
+
+@dashboard_bp.post("/reconcile")
+@admin_required
+def reconcile():
+    """
+    Admin-only: rebuild the summary table now instead of waiting for the
+    periodic job.
+    """
+    return dashboard_stats.reconcile()
@@ -1,38 +1,68 @@
-from flask import Blueprint, request, session
+from flask import Blueprint, Response, request, session, stream_with_context
 from database import db_session
 from models import (
     Packet,
     PacketSection,
+    PER_STUDENT_SECTION_TYPES,
     Template,
     TemplateSection,
     StudentRequest,
     SourceContent,
 )
-from services.docx_service import render_packet_docx
-from services.latex_service import render_packet_pdf
+from services.archive_service import iter_zip, iter_file_chunks
+from services.export_service import (
+    export_filename,
+    render_export_once,
+    store_export_once,
+    stored_export_name,
+)
+from services.single_flight import LockTimeout
+from services.reproducible import deterministic_exports
+from services.events import iter_sse, publish_event, queue_event
+from services.storage import get_export_storage, InvalidArtifactName
+from services.sync import sync_response, watermark
+from services.placeholders import PlaceholderContext, fill_content
+from services import export_store
 import os
 import json
-from flask import send_from_directory
-from datetime import datetime
+import hashlib
+from io import BytesIO
+from flask import abort, send_file
+import serializers as ser
+from routes.templates import admin_required
+from utils import parse_iso_date
 
 packets_bp = Blueprint("packets", __name__)
 
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PDF_MIMETYPE = "application/pdf"
+
 def require_auth():
     if "uid" not in session:
         return False, ({"error": "Unauthorized"}, 401)
     return True, None
 
-def render_intro_text(intro_source_body: str, student_req: StudentRequest) -> str:
+def wants_direct_download(data):
+    """
+    Direct download mode: either {"download": true} in the body or ?download=1.
+    """
+    if data.get("download") is True:
+        return True
+    return request.args.get("download", "").lower() in ("1", "true", "yes")
+
+def send_export_bytes(payload: bytes, filename: str, mimetype: str):
     """
-    Fill placeholders in the intro template with student-specific info.
+    Stream an in-memory export back in the same response.
+    send_file sets Content-Length from the buffer size. Reproducible exports
+    also get a content ETag, since equal bytes mean equal content.
     """
-    # super basic replacement; can switch to Jinja if you want
-    text = intro_source_body
-    text = text.replace("{{student_name}}", student_req.student_name or "")
-    text = text.replace("{{student_email}}", student_req.student_email or "")
-    text = text.replace("{{source_institution}}", student_req.source_institution or "")
-    text = text.replace("{{target_program}}", student_req.target_program or "")
-    return text
+    return send_file(
+        BytesIO(payload),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=filename,
+        etag=hashlib.sha1(payload).hexdigest() if deterministic_exports() else False,
+    )
 
 def add_info_block_to_packet(packet_id):
     """
@@ -108,17 +138,11 @@ def add_info_block_to_packet(packet_id):
     )
 
     db_session.add(new_sec)
+    db_session.flush()
+    queue_event("packet.section_added", packet, section_id=new_sec.id)
     db_session.commit()
 
-    return {
-        "id": new_sec.id,
-        "packet_id": new_sec.packet_id,
-        "title": new_sec.title,
-        "display_order": new_sec.display_order,
-        "section_type": new_sec.section_type,
-        "content_type": new_sec.content_type,
-        "content": new_sec.content,
-    }, 201
+    return ser.PACKET_SECTION.dump(new_sec), 201
 
 
 @packets_bp.post("/generate")
@@ -169,6 +193,9 @@ def generate_packet():
     db_session.add(packet)
     db_session.flush()  # so packet.id is available
 
+    # shared by every intro section of this packet
+    placeholder_ctx = PlaceholderContext(sr, tmpl)
+
     # ----- add sections from Template -----
     # tmpl.sections is already ordered by display_order (per your relationship)
     for sec in tmpl.sections:
@@ -182,6 +209,8 @@ def generate_packet():
         if sc is not None:
             content_type = sc.content_type
             content_body = sc.body
+            if sec.section_type == "intro":
+                content_body = fill_content(sc, placeholder_ctx)
         else:
             # fallback by section_type
             if sec.section_type == "advisor_notes":
@@ -254,24 +283,11 @@ def generate_packet():
                 )
                 db_session.add(ps)
                 order += 1
+    db_session.flush()
+    queue_event("packet.created", packet)
     db_session.commit()
 
-    return {
-        "id": packet.id,
-        "status": packet.status,
-        "request_id": packet.request_id,
-        "template_id": packet.template_id,
-        "sections": [
-            {
-                "id": ps.id,
-                "title": ps.title,
-                "display_order": ps.display_order,
-                "section_type": ps.section_type,
-                "content_type": ps.content_type,
-            }
-            for ps in packet.sections
-        ],
-    }, 201
+    return ser.PACKET.dump(packet), 201
 
 
 @packets_bp.post("/finalize")
@@ -288,9 +304,10 @@ def finalize():
         return {"error": "Packet not found"}, 404
 
     p.status = "finalized"
+    queue_event("packet.finalized", p)
     db_session.commit()
 
-    return {"id": p.id, "status": p.status}
+    return ser.PACKET_STATUS.dump(p)
 
 @packets_bp.post("/export")
 def export():
@@ -301,38 +318,214 @@ def export():
     data = request.get_json() or {}
     pid = data.get("packet_id")
     fmt = data.get("format", "docx")  # "docx" | "pdf"
+    # optional: "download": true -> respond with the file bytes instead of a path
 
     p = db_session.query(Packet).get(pid)
     if not p:
         return {"error": "Packet not found"}, 404
 
+    # Imported on first use so workers that never export don't pay for
+    # python-docx/lxml and the LaTeX template at startup.
+    from services.docx_service import render_packet_docx_bytes
+    from services.latex_service import pdf_export_available, render_packet_pdf_bytes
+
     sections = p.sections
-    export_dir = os.getenv("EXPORT_DIR", "exports")
-
-    if fmt == "pdf" and os.getenv("ENABLE_LATEX", "false").lower() == "true":
-        pdf_path, err_msg = render_packet_pdf(
-            p,
-            sections,
-            export_dir=export_dir,
-            latex_bin=os.getenv("LATEX_BIN", "pdflatex"),
-        )
-        if err_msg:
-            return {"error": err_msg}, 500
 
-        # 🔧 normalize Windows backslashes to URL-style forward slashes
-        web_path = pdf_path.replace("\\", "/")
-        return {"path": web_path}
+    if fmt == "pdf" and pdf_export_available():
+        fmt, mimetype = "pdf", PDF_MIMETYPE
+
+        def render():
+            return render_packet_pdf_bytes(
+                p,
+                sections,
+                latex_bin=os.getenv("LATEX_BIN", "pdflatex"),
+            )
+    else:
+        fmt, mimetype = "docx", DOCX_MIMETYPE
+
+        def render():
+            return render_packet_docx_bytes(p, sections), None
 
-    path = render_packet_docx(p, sections, export_dir=export_dir)
+    direct = wants_direct_download(data)
 
-    # 🔧 normalize here too
-    web_path = path.replace("\\", "/")  # e.g. "exports/packet_1.docx"
-    return {"path": web_path}
+    # Concurrent requests for the same packet/format/content share one render.
+    # Direct downloads coalesce in this process and never touch storage;
+    # path mode also coalesces across worker processes via the lock file.
+    if direct:
+        name, payload, err_msg = render_export_once(p, fmt, render)
+    else:
+        try:
+            name, payload, err_msg = store_export_once(p, fmt, render)
+        except LockTimeout:
+            return {"error": "Export already in progress, please retry"}, 503
+    if err_msg:
+        return {"error": err_msg}, 500
+    publish_event("packet.exported", p, format=fmt, filename=name, download=direct)
+
+    if direct:
+        return send_export_bytes(payload, name, mimetype)
+
+    # URL path under this blueprint, e.g. "exports/packet_1.docx"
+    return {"path": f"exports/{name}"}
+
+@packets_bp.get("")
+def list_packets():
+    """
+    GET /api/packets[?request_id=1&status=draft][&since=<cursor>&limit=500]
+
+    Advisors see packets for their own students, admins see all. Without
+    `since` returns everything plus a `cursor`; with it, only packets
+    created/updated/deleted after that cursor (see services.sync).
+    """
+    ok, err = require_auth()
+    if not ok:
+        return err
+
+    q = db_session.query(
+        Packet.id,
+        Packet.status,
+        Packet.request_id,
+        Packet.template_id,
+        Packet.created_at,
+        Packet.updated_at,
+    )
+    if session.get("role") != "admin":
+        q = q.join(StudentRequest, Packet.request_id == StudentRequest.id).filter(
+            StudentRequest.advisor_id == session["uid"]
+        )
+    if request.args.get("request_id"):
+        q = q.filter(Packet.request_id == request.args.get("request_id", type=int))
+    if request.args.get("status"):
+        q = q.filter(Packet.status == request.args["status"])
+
+    since = request.args.get("since")
+    if since:
+        return sync_response(
+            q, Packet, since, ser.PACKET_LIST, limit=request.args.get("limit", 500, type=int)
+        )
+
+    cursor = watermark(Packet)
+    rows = q.order_by(Packet.updated_at.desc(), Packet.id.desc()).all()
+    return {"items": ser.PACKET_LIST.many(rows), "cursor": cursor}
 
-EXPORT_DIR = os.path.abspath("exports")
 @packets_bp.get("/exports/<path:filename>")
 def download_export(filename):
-    return send_from_directory(EXPORT_DIR, filename, as_attachment=True)
+    storage = get_export_storage()
+    try:
+        if not storage.exists(filename):
+            abort(404)
+    except InvalidArtifactName:
+        abort(404)
+
+    local = storage.local_path(filename)
+    response = send_file(
+        local or storage.open(filename),
+        mimetype=PDF_MIMETYPE if filename.endswith(".pdf") else DOCX_MIMETYPE,
+        as_attachment=True,
+        download_name=filename,
+    )
+    export_store.touch(filename)
+    return response
+
+
+def iter_archive_entries(packet_ids, fmt):
+    """
+    Yield (arcname, chunks) for each packet, reusing stored exports when
+    they are fresh and rendering in memory otherwise. Packets are loaded in
+    small batches and dropped from the session once written.
+    """
+    from services.docx_service import render_packet_docx_bytes
+    from services.latex_service import render_packet_pdf_bytes
+
+    storage = get_export_storage()
+    batch_size = 50
+    for start in range(0, len(packet_ids), batch_size):
+        batch = (
+            db_session.query(Packet)
+            .filter(Packet.id.in_(packet_ids[start:start + batch_size]))
+            .order_by(Packet.id)
+            .all()
+        )
+        reused = []
+        for p in batch:
+            arcname = export_filename(p.id, fmt)
+            if stored_export_name(p, fmt, storage):
+                reused.append(arcname)
+                yield arcname, iter_file_chunks(storage.open(arcname))
+            elif fmt == "pdf":
+                payload, err_msg = render_packet_pdf_bytes(
+                    p,
+                    p.sections,
+                    latex_bin=os.getenv("LATEX_BIN", "pdflatex"),
+                )
+                if err_msg:
+                    yield f"packet_{p.id}.error.txt", [err_msg.encode("utf-8")]
+                else:
+                    yield arcname, [payload]
+            else:
+                yield arcname, [render_packet_docx_bytes(p, p.sections)]
+        export_store.touch(*reused)
+        db_session.expunge_all()
+
+
+@packets_bp.get("/archive")
+def export_archive():
+    """
+    Stream a ZIP of rendered packets, built incrementally.
+
+    Query params (all optional):
+      format=docx|pdf                    (default docx)
+      status=finalized|draft|all         (default finalized)
+      program_id=1                       (template's SourceProgram)
+      target_program=Computer Science BS
+      source_institution=Montgomery College   (transfer cohort)
+      from=2025-01-01&to=2025-06-01      (packet created_at range, ISO dates)
+    """
+    ok, err = require_auth()
+    if not ok:
+        return err
+
+    args = request.args
+    fmt = args.get("format", "docx")
+    if fmt not in ("docx", "pdf"):
+        return {"error": "format must be docx or pdf"}, 400
+    from services.latex_service import pdf_export_available
+    if fmt == "pdf" and not pdf_export_available():
+        return {"error": "PDF export is not enabled"}, 400
+
+    q = (
+        db_session.query(Packet.id)
+        .join(StudentRequest, Packet.request_id == StudentRequest.id)
+        .join(Template, Packet.template_id == Template.id)
+    )
+
+    status = args.get("status", "finalized")
+    if status != "all":
+        q = q.filter(Packet.status == status)
+    if args.get("program_id"):
+        q = q.filter(Template.program_id == args.get("program_id", type=int))
+    if args.get("target_program"):
+        q = q.filter(StudentRequest.target_program == args["target_program"])
+    if args.get("source_institution"):
+        q = q.filter(StudentRequest.source_institution == args["source_institution"])
+
+    date_from = parse_iso_date(args.get("from"))
+    date_to = parse_iso_date(args.get("to"))
+    if (args.get("from") and not date_from) or (args.get("to") and not date_to):
+        return {"error": "from/to must be ISO dates"}, 400
+    if date_from:
+        q = q.filter(Packet.created_at >= date_from)
+    if date_to:
+        q = q.filter(Packet.created_at < date_to)
+
+    packet_ids = [pid for (pid,) in q.order_by(Packet.id)]
+
+    stream = iter_zip(iter_archive_entries(packet_ids, fmt))
+    return Response(
+        stream_with_context(stream),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="packets_{fmt}.zip"'},
+    )
 
 
 @packets_bp.post("/<int:packet_id>/info-blocks")
@@ -351,4 +544,103 @@ def add_info_block_route(packet_id):
     if not ok:
         return err
 
-    return add_info_block_to_packet(packet_id)
\ No newline at end of file
+    return add_info_block_to_packet(packet_id)
+
+@packets_bp.patch("/<int:packet_id>/sections/<int:section_id>")
+def update_packet_section(packet_id, section_id):
+    """
+    Advisor: edit the content of an intro / degree_audit / advisor_notes section.
+
+    Body:
+      {
+        "content": "New text or audit table JSON"
+      }
+    """
+    ok, err = require_auth()
+    if not ok:
+        return err
+
+    ps = db_session.query(PacketSection).get(section_id)
+    if not ps or ps.packet_id != packet_id:
+        return {"error": "PacketSection not found"}, 404
+    if ps.packet.status != "draft":
+        return {"error": "Cannot modify a finalized packet"}, 400
+    if ps.section_type not in PER_STUDENT_SECTION_TYPES:
+        return {"error": f"{ps.section_type} sections cannot be edited"}, 400
+
+    data = request.get_json() or {}
+    if "content" not in data:
+        return {"error": "content is required"}, 400
+
+    ps.content = data["content"]
+    queue_event("packet.section_updated", ps.packet, section_id=ps.id)
+    db_session.commit()
+
+    from services.html_service import invalidate_section
+    invalidate_section(ps.id)
+
+    return ser.PACKET_SECTION.dump(ps)
+
+
+@packets_bp.get("/<int:packet_id>/preview")
+def preview_packet(packet_id):
+    """
+    Lightweight HTML preview of a packet (no DOCX/PDF rendering).
+    Section HTML is cached and only re-rendered for sections that changed.
+    """
+    ok, err = require_auth()
+    if not ok:
+        return err
+
+    from services.html_service import render_packet_html
+
+    p = db_session.query(Packet).get(packet_id)
+    if not p:
+        return {"error": "Packet not found"}, 404
+
+    return Response(render_packet_html(p, p.sections), mimetype="text/html")
+
+
+@packets_bp.get("/export-store/stats")
+@admin_required
+def export_store_stats():
+    """
+    Admin-only: size/count of stored exports, budget, TTL and last sweep.
+    """
+    return export_store.stats()
+
+
+@packets_bp.post("/export-store/sweep")
+@admin_required
+def export_store_sweep():
+    """
+    Admin-only: run a sweep now instead of waiting for the background one.
+    """
+    return export_store.sweep()
+
+
+@packets_bp.get("/events")
+def packet_events():
+    """
+    Server-sent events for packet activity: packet.created,
+    packet.section_added, packet.section_updated, packet.finalized and
+    packet.exported. Advisors receive events for their own students' packets,
+    admins for all. Reconnecting clients send Last-Event-ID to resume.
+    """
+    ok, err = require_auth()
+    if not ok:
+        return err
+
+    advisor_id = None if session.get("role") == "admin" else session["uid"]
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+
+    # no stream_with_context: the stream outlives the request's DB session
+    return Response(
+        iter_sse(advisor_id, last_id, heartbeat=float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,14 @@
-from flask import Blueprint, request, jsonify, session
-from models import StudentRequest
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+from models import StudentRequest, Packet
 from database import db_session
 from email_validator import validate_email, EmailNotValidError
+import serializers as ser
+from services.search import search_request_ids
+from services.import_service import import_requests, ImportAborted, ImportFormatError
+from services import report_service
+from services.sync import sync_response, watermark
+from utils import check_email_deliverability, parse_iso_date
+import io
 
 requests_bp = Blueprint("requests", __name__)
 
@@ -17,7 +24,7 @@ def create_request():
 
     data = request.get_json() or {}
     try:
-        validate_email(data.get("student_email", ""))
+        validate_email(data.get("student_email", ""), check_deliverability=check_email_deliverability())
     except EmailNotValidError:
         return {"error": "Invalid student email"}, 400
 
@@ -32,37 +39,134 @@ def create_request():
     db_session.commit()
     return {"id": sr.id}, 201
 
+def request_rows_query():
+    """
+    Columns for STUDENT_REQUEST_LIST, with the latest packet per request
+    resolved in SQL rather than per row.
+    """
+    latest = (
+        db_session.query(Packet)
+        .filter(Packet.request_id == StudentRequest.id)
+        .order_by(Packet.updated_at.desc(), Packet.id.desc())
+        .limit(1)
+    )
+    return db_session.query(
+        StudentRequest.id,
+        StudentRequest.student_name,
+        StudentRequest.student_email,
+        StudentRequest.source_institution,
+        StudentRequest.target_program,
+        StudentRequest.created_at,
+        StudentRequest.updated_at,
+        latest.with_entities(Packet.status).scalar_subquery().label("latest_packet_status"),
+        latest.with_entities(Packet.updated_at).scalar_subquery().label("latest_packet_updated_at"),
+    )
+
 @requests_bp.get("")
 def list_requests():
     ok, err = require_auth()
     if not ok: return err
 
-    rows = (
-        db_session.query(StudentRequest)
-        .order_by(StudentRequest.created_at.desc())
-        .all()
+    since = request.args.get("since")
+    if since:
+        return sync_response(
+            request_rows_query(), StudentRequest, since, ser.STUDENT_REQUEST_LIST,
+            limit=request.args.get("limit", 500, type=int),
+        )
+
+    cursor = watermark(StudentRequest)  # taken first so nothing falls between
+    rows = request_rows_query().order_by(StudentRequest.created_at.desc()).all()
+
+    return {"items": ser.STUDENT_REQUEST_LIST.many(rows), "cursor": cursor}
+
+@requests_bp.get("/search")
+def search_requests():
+    """
+    GET /api/requests/search?q=<text>&limit=20&cursor=<next_cursor>&fuzzy=true
+
+    Matches partial name, email, source institution or target program.
+    Advisors search their own requests; admins search everyone's, or one
+    advisor's with advisor_id=<id>.
+    """
+    ok, err = require_auth()
+    if not ok: return err
+
+    limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+    if session.get("role") == "admin":
+        advisor_id = request.args.get("advisor_id", type=int)
+    else:
+        advisor_id = session["uid"]
+
+    ids, next_cursor, mode = search_request_ids(
+        request.args.get("q", ""),
+        advisor_id=advisor_id,
+        limit=limit,
+        cursor=request.args.get("cursor"),
+        fuzzy=request.args.get("fuzzy", "false").lower() == "true",
     )
+    rows = {r.id: r for r in request_rows_query().filter(StudentRequest.id.in_(ids))} if ids else {}
+    return {
+        "items": ser.STUDENT_REQUEST_LIST.many(rows[i] for i in ids if i in rows),
+        "next_cursor": next_cursor,
+        "mode": mode,
+    }
 
-    result = []
-    for r in rows:
-        # Determine latest packet status
-        if hasattr(r, "packets") and r.packets:
-            latest_packet = max(r.packets, key=lambda p: p.updated_at or p.created_at)
-            latest_packet_status = latest_packet.status
-            latest_packet_updated_at = latest_packet.updated_at.isoformat()
-        else:
-            latest_packet_status = None
-            latest_packet_updated_at = None
-
-        result.append({
-            "id": r.id,
-            "student_name": r.student_name,
-            "student_email": r.student_email,
-            "source_institution": r.source_institution,
-            "target_program": r.target_program,
-            "created_at": r.created_at.isoformat(),
-            "latest_packet_status": latest_packet_status,
-            "latest_packet_updated_at": latest_packet_updated_at,
-        })
-
-    return {"items": result}
\ No newline at end of file
+@requests_bp.post("/import")
+def import_requests_csv():
+    """
+    Bulk-create requests for the current advisor from a CSV upload, either
+    as multipart form field "file" or as a raw text/csv body.
+    Safe to re-run: rows already imported are reported as duplicates.
+    """
+    ok, err = require_auth()
+    if not ok: return err
+
+    upload = request.files.get("file")
+    raw = upload.stream if upload else io.BufferedReader(request.stream)
+    text_stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        return import_requests(text_stream, advisor_id=session["uid"])
+    except ImportAborted as e:
+        # earlier batches are committed; say how far the import got
+        return {"error": str(e), "error_after_line": e.after_line, **e.summary}, 400
+    except ImportFormatError as e:
+        return {"error": str(e)}, 400
+
+@requests_bp.get("/report")
+def requests_report():
+    """
+    GET /api/requests/report?format=csv|jsonl&from=2025-01-01&to=2025-06-01
+        &target_program=...&program_id=...&status=draft|finalized
+
+    One row per request/packet pair (requests without packets included),
+    streamed as it is read. Advisors get their own requests, admins everyone's.
+    """
+    ok, err = require_auth()
+    if not ok: return err
+
+    args = request.args
+    fmt = args.get("format", "csv")
+    if fmt not in ("csv", "jsonl"):
+        return {"error": "format must be csv or jsonl"}, 400
+    date_from = parse_iso_date(args.get("from"))
+    date_to = parse_iso_date(args.get("to"))
+    if (args.get("from") and not date_from) or (args.get("to") and not date_to):
+        return {"error": "from/to must be ISO dates"}, 400
+
+    rows = report_service.report_query(
+        advisor_id=None if session.get("role") == "admin" else session["uid"],
+        target_program=args.get("target_program"),
+        program_id=args.get("program_id", type=int),
+        status=args.get("status"),
+        date_from=date_from,
+        date_to=date_to,
+    )
+    if fmt == "csv":
+        body, mimetype = report_service.iter_csv(rows), "text/csv"
+    else:
+        body, mimetype = report_service.iter_jsonl(rows), "application/x-ndjson"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="requests_report.{fmt}"'},
+    )
@@ -1,8 +1,12 @@
 from flask import Blueprint, session, request
+from sqlalchemy import func
 from functools import wraps
 
 from database import db_session
 from models import Template, TemplateSection, SourceContent, SourceProgram
+import serializers as ser
+from response_cache import cached_response, response_cache_stats
+from services.markdown import parse_markdown
 
 templates_bp = Blueprint("templates", __name__)
 
@@ -26,6 +30,7 @@ def admin_required(fn):
 ## ----------------- TEMPLATE ADVISOR ROUTES -----------------
 
 @templates_bp.get("/source-content")
+@cached_response("source_content")
 def list_source_content_public():
     """
     Advisors: list all active source content blocks they can insert into packets.
@@ -33,57 +38,69 @@ def list_source_content_public():
     """
     tag = request.args.get("usage_tag")
 
-    q = db_session.query(SourceContent).filter_by(active=True)
+    # column tuples only; the preview is cut in SQL so full bodies never load
+    q = db_session.query(
+        SourceContent.id,
+        SourceContent.title,
+        SourceContent.content_type,
+        func.substr(SourceContent.body, 1, 200).label("body"),
+        SourceContent.usage_tag,
+    ).filter(SourceContent.active.is_(True))
     if tag:
         q = q.filter(SourceContent.usage_tag == tag)
 
     rows = q.order_by(SourceContent.title).all()
 
-    return {
-        "items": [
-            {
-                "id": sc.id,
-                "title": sc.title,
-                "content_type": sc.content_type,
-                "body_preview": sc.body[:200],
-                "usage_tag": sc.usage_tag,  # NEW
-            }
-            for sc in rows
-        ]
-    }
+    return {"items": ser.SOURCE_CONTENT_PUBLIC.many(rows)}
 
 
 @templates_bp.get("")
+@cached_response("templates", "source_programs", "template_sections")
 def list_templates():
     """
     List all templates with high-level info so UI can display them.
     Advisors can also see this. Not admin-only.
     """
-    rows = db_session.query(Template).all()
-    return {
-        "items": [
-            {
-                "id": t.id,
-                "name": t.name,
-                "program_name": t.program.name if t.program else None,
-                "program_id": t.program_id,
-                "active": t.active,
-                "sections": [
-                    {
-                        "id": s.id,
-                        "title": s.title,
-                        "section_type": s.section_type,
-                        "display_order": s.display_order,
-                        "optional": s.optional,
-                    }
-                    for s in t.sections
-                ],
-            }
-            for t in rows
-        ]
-    }
+    # Two column queries instead of one query per template for program + sections
+    templates = (
+        db_session.query(
+            Template.id,
+            Template.name,
+            SourceProgram.name.label("program_name"),
+            Template.program_id,
+            Template.active,
+        )
+        .outerjoin(SourceProgram, Template.program_id == SourceProgram.id)
+        .order_by(Template.id)
+        .all()
+    )
+    section_rows = (
+        db_session.query(
+            TemplateSection.template_id,
+            TemplateSection.id,
+            TemplateSection.title,
+            TemplateSection.section_type,
+            TemplateSection.display_order,
+            TemplateSection.optional,
+        )
+        .order_by(TemplateSection.template_id, TemplateSection.display_order)
+        .all()
+    )
+
+    sections_by_template = {}
+    dump_section = ser.TEMPLATE_SECTION_SUMMARY.dump
+    for s in section_rows:
+        sections_by_template.setdefault(s.template_id, []).append(dump_section(s))
+
+    items = []
+    for t in templates:
+        item = ser.TEMPLATE_SUMMARY.dump(t)
+        item["sections"] = sections_by_template.get(t.id, [])
+        items.append(item)
+    return {"items": items}
 
 @templates_bp.get("/<int:template_id>/builder")
+@cached_response("templates", "template_sections", "source_content", "source_programs")
 def template_builder_view(template_id):
     """
     Return all sections in this template, including:
@@ -97,15 +114,8 @@ def template_builder_view(template_id):
     result_sections = []
     for s in t.sections:
         sc = s.source_content
-        preview = None
-        if sc:
-            # short preview body (first ~300 chars)
-            preview = {
-                "source_content_id": sc.id,
-                "title": sc.title,
-                "content_type": sc.content_type,
-                "body_preview": sc.body[:300],
-            }
+        # short preview body (first ~300 chars)
+        preview = ser.SOURCE_CONTENT_PREVIEW.dump(sc) if sc else None
 
         result_sections.append({
             "template_section_id": s.id,
@@ -130,24 +140,13 @@ def list_template_sections(template_id):
     Response shape matches what the React code expects.
     """
     sections = (
-        db_session.query(TemplateSection)
+        db_session.query(*[getattr(TemplateSection, c) for c in ser.TEMPLATE_SECTION_LIST.columns])
         .filter_by(template_id=template_id)
         .order_by(TemplateSection.display_order, TemplateSection.id)
         .all()
     )
 
-    items = []
-    for s in sections:
-        items.append({
-            "id": s.id,
-            "title": s.title,
-            "section_type": s.section_type,
-            "display_order": s.display_order,
-            "optional": s.optional,
-            "source_content_id": s.source_content_id,
-        })
-
-    return {"items": items}
+    return {"items": ser.TEMPLATE_SECTION_LIST.many(sections)}
 ## ----------------- TEMPLATE ADMIN ROUTES -----------------
 
 @templates_bp.post("")
@@ -184,14 +183,7 @@ def create_template():
     db_session.add(t)
     db_session.commit()
 
-    return {
-        "id": t.id,
-        "name": t.name,
-        "program_id": t.program_id,
-        "program_name": t.program.name if t.program else None,
-        "active": t.active,
-        "created_at": t.created_at.isoformat(),
-    }, 201
+    return ser.TEMPLATE.dump(t), 201
 
 
 @templates_bp.patch("/<int:template_id>")
@@ -226,14 +218,7 @@ def update_template(template_id):
 
     db_session.commit()
 
-    return {
-        "id": t.id,
-        "name": t.name,
-        "program_id": t.program_id,
-        "program_name": t.program.name if t.program else None,
-        "active": t.active,
-        "created_at": t.created_at.isoformat(),
-    }
+    return ser.TEMPLATE.dump(t)
 
 @templates_bp.post("/<int:template_id>/sections")
 @admin_required
@@ -287,15 +272,7 @@ def create_template_section(template_id):
     db_session.add(s)
     db_session.commit()
 
-    return {
-        "id": s.id,
-        "template_id": s.template_id,
-        "title": s.title,
-        "section_type": s.section_type,
-        "optional": s.optional,
-        "display_order": s.display_order,
-        "source_content_id": s.source_content_id,
-    }, 201
+    return ser.TEMPLATE_SECTION.dump(s), 201
 
 @templates_bp.patch("/sections/<int:section_id>")
 @admin_required
@@ -338,15 +315,7 @@ def update_template_section(section_id):
 
     db_session.commit()
 
-    return {
-        "id": s.id,
-        "template_id": s.template_id,
-        "title": s.title,
-        "section_type": s.section_type,
-        "optional": s.optional,
-        "display_order": s.display_order,
-        "source_content_id": s.source_content_id,
-    }
+    return ser.TEMPLATE_SECTION.dump(s)
 
 @templates_bp.delete("/sections/<int:section_id>")
 @admin_required
@@ -372,20 +341,18 @@ def list_source_content():
     """
     Admin-only: list all source content blocks.
     """
-    rows = db_session.query(SourceContent).order_by(SourceContent.title).all()
-    return {
-        "items": [
-            {
-                "id": sc.id,
-                "title": sc.title,
-                "content_type": sc.content_type,
-                "active": sc.active,
-                "created_at": sc.created_at.isoformat(),
-                "updated_at": sc.updated_at.isoformat() if sc.updated_at else None,
-            }
-            for sc in rows
-        ]
-    }
+    rows = (
+        db_session.query(*[getattr(SourceContent, c) for c in ser.SOURCE_CONTENT_ADMIN.columns])
+        .order_by(SourceContent.title)
+        .all()
+    )
+    return {"items": ser.SOURCE_CONTENT_ADMIN.many(rows)}
+
+
+def _warm_markdown(sc):
+    # parse now so the first export of a packet using this block doesn't have to
+    if sc.content_type == "markdown":
+        parse_markdown(sc.body)
 
 
 @templates_bp.post("/source-content")
@@ -419,16 +386,9 @@ def create_source_content():
 
     db_session.add(sc)
     db_session.commit()
+    _warm_markdown(sc)
 
-    return {
-        "id": sc.id,
-        "title": sc.title,
-        "content_type": sc.content_type,
-        "active": sc.active,
-        "usage_tag": sc.usage_tag,  # NEW
-        "created_at": sc.created_at.isoformat(),
-        "updated_at": sc.updated_at.isoformat() if sc.updated_at else None,
-    }, 201
+    return ser.SOURCE_CONTENT.dump(sc), 201
 
 
 @templates_bp.patch("/source-content/<int:content_id>")
@@ -463,37 +423,25 @@ def update_source_content(content_id):
         sc.usage_tag = data["usage_tag"]
 
     db_session.commit()
+    _warm_markdown(sc)
 
-    return {
-        "id": sc.id,
-        "title": sc.title,
-        "content_type": sc.content_type,
-        "active": sc.active,
-        "usage_tag": sc.usage_tag,  # NEW
-        "created_at": sc.created_at.isoformat(),
-        "updated_at": sc.updated_at.isoformat() if sc.updated_at else None,
-    }
+    return ser.SOURCE_CONTENT.dump(sc)
 
 # ----------------- SOURCE PROGRAM ADMIN ROUTES -----------------
 
 @templates_bp.get("/programs")
+@cached_response("source_programs")
 def list_source_programs():
     """
     List all source programs.
     Advisors can see this too (so they can see IDs to use).
     """
-    rows = db_session.query(SourceProgram).order_by(SourceProgram.name).all()
-    return {
-        "items": [
-            {
-                "id": p.id,
-                "name": p.name,
-                "active": p.active,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-            }
-            for p in rows
-        ]
-    }
+    rows = (
+        db_session.query(*[getattr(SourceProgram, c) for c in ser.SOURCE_PROGRAM.columns])
+        .order_by(SourceProgram.name)
+        .all()
+    )
+    return {"items": ser.SOURCE_PROGRAM.many(rows)}
 
 
 @templates_bp.post("/programs")
@@ -526,12 +474,7 @@ def create_source_program():
     db_session.add(p)
     db_session.commit()
 
-    return {
-        "id": p.id,
-        "name": p.name,
-        "active": p.active,
-        "created_at": p.created_at.isoformat() if p.created_at else None,
-    }, 201
+    return ser.SOURCE_PROGRAM.dump(p), 201
 
 
 @templates_bp.patch("/programs/<int:program_id>")
@@ -559,11 +502,13 @@ def update_source_program(program_id):
 
     db_session.commit()
 
-    return {
-        "id": p.id,
-        "name": p.name,
-        "active": p.active,
-        "created_at": p.created_at.isoformat() if p.created_at else None,
-    }
+    return ser.SOURCE_PROGRAM.dump(p)
 
 
+@templates_bp.get("/cache/stats")
+@admin_required
+def cache_stats():
+    """
+    Admin-only: hit/miss counters and size of the GET response cache.
+    """
+    return response_cache_stats()
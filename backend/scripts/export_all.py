@@ -0,0 +1,178 @@
+"""
+Bulk re-export of packets, fanned out across a process pool.
+
+Usage (from backend/):
+    python -m scripts.export_all --status finalized --format docx
+    python -m scripts.export_all --program-id 1 --since 2025-01-01 --workers 8
+
+python-docx rendering is CPU-bound, so each packet is rendered in a separate
+worker process. Packet ids are read from the DB in keyset-paginated chunks.
+The run is resumable: a packet whose stored export is already newer than its
+content is skipped (use --force to re-render everything), and files are
+written atomically so an interrupted run never leaves a truncated export.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sqlalchemy.orm import selectinload
+import argparse
+import os
+import sys
+import time
+
+from database import db_session, engine, init_db
+from models import Packet, StudentRequest, Template
+from services.export_store import record_artifact
+from services.export_service import export_filename, export_lock_path, stored_export_name
+from services.single_flight import file_lock
+from services.storage import LocalFileStorage
+
+
+def _init_worker():
+    # Connections inherited from the parent must not be shared across processes.
+    engine.dispose(close=False)
+
+
+def _export_one(packet_id, fmt, export_dir, latex_bin):
+    """
+    Runs in a worker process. Returns (packet_id, (name, size), error).
+    """
+    try:
+        p = db_session.get(Packet, packet_id)
+        if p is None:
+            return packet_id, None, "Packet not found"
+
+        name = export_filename(p.id, fmt)
+        # same lock the web workers take, so a concurrent web export isn't clobbered
+        with file_lock(export_lock_path(name, export_dir)):
+            if fmt == "pdf":
+                from services.latex_service import render_packet_pdf_bytes
+                payload, err_msg = render_packet_pdf_bytes(p, p.sections, latex_bin=latex_bin)
+                if err_msg:
+                    return packet_id, None, err_msg
+            else:
+                from services.docx_service import render_packet_docx_bytes
+                payload = render_packet_docx_bytes(p, p.sections)
+
+            LocalFileStorage(export_dir).put(name, payload)
+        return packet_id, (name, len(payload)), None
+    except Exception as e:
+        return packet_id, None, str(e)
+    finally:
+        db_session.remove()
+
+
+def build_query(args):
+    q = (
+        db_session.query(Packet)
+        .join(StudentRequest, Packet.request_id == StudentRequest.id)
+        .join(Template, Packet.template_id == Template.id)
+    )
+    if args.status != "all":
+        q = q.filter(Packet.status == args.status)
+    if args.program_id:
+        q = q.filter(Template.program_id == args.program_id)
+    if args.target_program:
+        q = q.filter(StudentRequest.target_program == args.target_program)
+    if args.since:
+        q = q.filter(Packet.created_at >= args.since)
+    if args.until:
+        q = q.filter(Packet.created_at < args.until)
+    return q
+
+
+def iter_chunks(q, chunk_size):
+    """
+    Keyset pagination over packets by id, yielding lists of Packet objects
+    (with sections preloaded for the freshness check).
+    """
+    last_id = 0
+    while True:
+        chunk = (
+            q.filter(Packet.id > last_id)
+            .options(selectinload(Packet.sections))
+            .order_by(Packet.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+        yield chunk
+        db_session.expunge_all()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-export packets in parallel.")
+    parser.add_argument("--format", choices=["docx", "pdf"], default="docx")
+    parser.add_argument("--status", choices=["finalized", "draft", "all"], default="finalized")
+    parser.add_argument("--program-id", type=int)
+    parser.add_argument("--target-program")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created_at >= (ISO date)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created_at < (ISO date)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--export-dir", default=os.getenv("EXPORT_DIR", "exports"))
+    parser.add_argument("--force", action="store_true", help="re-render even if a fresh export exists")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.format == "pdf":
+        from services.latex_service import pdf_export_available
+        if not pdf_export_available():
+            print("PDF export is not enabled (set ENABLE_LATEX=true or PDF_ENGINE=native).", file=sys.stderr)
+            return 2
+
+    init_db()
+    storage = LocalFileStorage(args.export_dir)
+    latex_bin = os.getenv("LATEX_BIN", "pdflatex")
+    q = build_query(args)
+    total = q.count()
+
+    done = skipped = failed = 0
+    started = time.monotonic()
+
+    def report():
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0.0
+        print(
+            f"[{done + skipped + failed}/{total}] exported={done} skipped={skipped} "
+            f"failed={failed} ({rate:.1f} packets/s)",
+            flush=True,
+        )
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        for chunk in iter_chunks(q, args.chunk_size):
+            todo = []
+            for p in chunk:
+                if not args.force and stored_export_name(p, args.format, storage):
+                    skipped += 1
+                else:
+                    todo.append(p.id)
+
+            results = pool.map(
+                _export_one,
+                todo,
+                [args.format] * len(todo),
+                [args.export_dir] * len(todo),
+                [latex_bin] * len(todo),
+                chunksize=max(1, len(todo) // (args.workers * 4)),
+            )
+            for packet_id, artifact, err in results:
+                if err:
+                    failed += 1
+                    print(f"packet {packet_id}: {err}", file=sys.stderr)
+                else:
+                    record_artifact(*artifact, commit=False)
+                    done += 1
+            db_session.commit()
+            report()
+
+    if total == 0:
+        report()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Bulk import student requests from an admissions CSV export.
+
+Usage (from backend/):
+    python -m scripts.import_requests students.csv --advisor-email advisor@umbc.edu
+    python -m scripts.import_requests students.csv --advisor-email a@umbc.edu --batch-size 2000
+
+Same rules as POST /api/requests/import: rows are streamed and inserted in
+batches, and re-running on the same file only reports duplicates.
+"""
+import argparse
+import sys
+
+from database import db_session, init_db
+from models import User
+from services.import_service import ImportAborted, ImportFormatError, import_requests
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import student requests from CSV.")
+    parser.add_argument("csv_path", help="CSV file with student_name,student_email[,source_institution,target_program]")
+    parser.add_argument("--advisor-email", required=True, help="advisor who will own the imported requests")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per INSERT/commit (default IMPORT_BATCH_SIZE or 500)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    init_db()
+    try:
+        advisor = db_session.query(User).filter_by(email=args.advisor_email.strip().lower()).first()
+        if advisor is None:
+            print(f"No user with email {args.advisor_email}", file=sys.stderr)
+            return 2
+
+        with open(args.csv_path, encoding="utf-8-sig", newline="") as f:
+            summary = import_requests(f, advisor.id, size=args.batch_size)
+    except ImportAborted as e:
+        print(str(e), file=sys.stderr)
+        print(f"inserted {e.summary['inserted']} before that line; re-run once the file is fixed", file=sys.stderr)
+        return 2
+    except ImportFormatError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        db_session.remove()
+
+    for e in summary["errors"]:
+        print(f"line {e['row']}: {e['error']}", file=sys.stderr)
+    if summary["errors_truncated"]:
+        print("(more errors not shown)", file=sys.stderr)
+    print(f"inserted {summary['inserted']}, duplicates {summary['duplicates']}, invalid {summary['invalid']}")
+    return 1 if summary["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
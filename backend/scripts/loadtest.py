@@ -0,0 +1,424 @@
+"""
+End-to-end load test: start the API from app.py on a local port against a
+freshly seeded SQLite database, then drive it with many concurrent simulated
+advisors and report throughput and latency percentiles per route.
+
+Usage (from backend/):
+    python -m scripts.loadtest
+    python -m scripts.loadtest --advisors 50 --duration 120 --format pdf
+    python -m scripts.loadtest --json results.json      # keep numbers to compare runs
+
+Each advisor logs in with its own session and then loops over a weighted
+mix of listings, request creation, packet generation, info-block additions,
+exports and the occasional re-login, with a short think time in between.
+The server runs in its own process (`flask run`, threaded), so client
+threads don't compete with it for the GIL. Its log is scanned for
+"database is locked" so SQLite write contention shows up in the report
+even when the client only sees a 500.
+
+Pass --url to point at a server you started yourself; it must already be
+seeded with the users this script would create (see seed_database); the
+template and info-block ids are read from its public listings. Start it with
+EMAIL_CHECK_DELIVERABILITY=false so logins don't wait on DNS lookups.
+"""
+import argparse
+from collections import defaultdict
+import http.cookiejar
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = "Passw0rd!"
+LOCK_MARKER = "database is locked"
+
+# action -> relative weight in each advisor's loop
+MIX = {
+    "list_requests": 25,
+    "list_packets": 15,
+    "create_request": 10,
+    "generate": 15,
+    "add_info_block": 15,
+    "export": 15,
+    "login": 5,
+}
+
+
+def advisor_email(n):
+    return f"loadtest-advisor-{n}@umbc.edu"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test against a local API server.")
+    parser.add_argument("--advisors", type=int, default=20, help="concurrent simulated advisors (default 20)")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run after login (default 60)")
+    parser.add_argument("--think-ms", type=float, default=50, help="mean pause between an advisor's calls (default 50)")
+    parser.add_argument("--requests-per-advisor", type=int, default=25, help="student requests seeded per advisor")
+    parser.add_argument("--format", choices=("docx", "pdf"), default="docx", help="export format (pdf uses PDF_ENGINE=native)")
+    parser.add_argument("--port", type=int, default=0, help="port for the server (default: a free one)")
+    parser.add_argument("--db", help="SQLite file to use (default: a temporary file)")
+    parser.add_argument("--url", help="use an already running, already seeded server instead of starting one")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a repeatable action mix")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+# ----------------- setup -----------------
+
+def seed_database(advisors, requests_per_advisor):
+    """
+    Base seed data plus one user and a batch of student requests per
+    simulated advisor. DATABASE_URL must be set before this is called.
+    """
+    # imported here: database.py reads DATABASE_URL at import time
+    from sqlalchemy import insert
+
+    from database import db_session
+    from models import SourceContent, StudentRequest, Template, User
+    from scripts import seed
+    from services.dashboard_stats import add_request, apply_deltas, new_deltas
+    from utils import hash_password
+
+    seed.main()
+    try:
+        password_hash = hash_password(PASSWORD)  # one hash, shared: hashing is slow by design
+        users = [User(email=advisor_email(n), password_hash=password_hash, role="advisor") for n in range(advisors)]
+        db_session.add_all(users)
+        db_session.flush()
+        rows, deltas = [], new_deltas()
+        for u in users:
+            for i in range(requests_per_advisor):
+                rows.append({
+                    "student_name": f"Load Student {u.id}-{i}",
+                    "student_email": f"student-{u.id}-{i}@example.edu",
+                    "source_institution": "Montgomery College",
+                    "target_program": "Computer Science BS",
+                    "advisor_id": u.id,
+                })
+                add_request(deltas, u.id, "Computer Science BS")
+        if rows:
+            # bulk INSERT skips the flush hooks, so update the dashboard here
+            db_session.execute(insert(StudentRequest), rows)
+            apply_deltas(db_session, deltas)
+        db_session.commit()
+        template_id = db_session.query(Template.id).filter_by(active=True).order_by(Template.id).first()[0]
+        block_ids = [
+            row[0] for row in
+            db_session.query(SourceContent.id).filter_by(usage_tag="extra_info_block", active=True)
+        ]
+    finally:
+        db_session.remove()
+    return template_id, block_ids
+
+
+def fetch_ids(base_url):
+    """Active template and info-block ids from a running server's public listings."""
+    def get(path):
+        with urllib.request.urlopen(base_url + path, timeout=10) as resp:
+            return json.load(resp)["items"]
+
+    template_id = next(t["id"] for t in get("/api/templates") if t["active"])
+    block_ids = [b["id"] for b in get("/api/templates/source-content?usage_tag=extra_info_block")]
+    return template_id, block_ids
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """`flask --app app run` in a subprocess, with its log scanned for lock errors."""
+
+    def __init__(self, port, env):
+        self.url = f"http://127.0.0.1:{port}"
+        self.lock_errors = 0
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "flask", "--app", "app", "run",
+             "--host", "127.0.0.1", "--port", str(port), "--no-reload", "--no-debugger", "--with-threads"],
+            cwd=BACKEND_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace",
+        )
+        self._reader = threading.Thread(target=self._read_log, daemon=True)
+        self._reader.start()
+
+    def _read_log(self):
+        for line in self.proc.stderr:
+            if LOCK_MARKER in line:
+                self.lock_errors += 1
+
+    def wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.proc.returncode}")
+            try:
+                with urllib.request.urlopen(self.url + "/api/health", timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError("server did not become ready")
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self._reader.join(timeout=2)
+
+
+# ----------------- measurement -----------------
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)                  # route -> [seconds]
+        self.errors = defaultdict(lambda: defaultdict(int))  # route -> kind -> count
+
+    def record(self, route, seconds, error=None):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            if error:
+                self.errors[route][error] += 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def classify(status, body):
+    if LOCK_MARKER in body:
+        return "sqlite_locked"
+    if status >= 400:
+        return f"http_{status}"
+    return None
+
+
+class Advisor:
+    def __init__(self, n, base_url, recorder, template_id, block_ids, fmt, think_ms, rng):
+        self.email = advisor_email(n)
+        self.base_url = base_url
+        self.recorder = recorder
+        self.template_id = template_id
+        self.block_ids = block_ids
+        self.fmt = fmt
+        self.think_ms = think_ms
+        self.rng = rng
+        self.request_ids = []
+        self.packet_ids = []
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def call(self, method, path, route, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        started = time.perf_counter()
+        status, body = 0, ""
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                status, body = resp.status, resp.read().decode("utf-8", "replace")
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read().decode("utf-8", "replace")
+        except OSError as e:
+            self.recorder.record(route, time.perf_counter() - started, f"connection_{type(e).__name__}")
+            return None
+        self.recorder.record(route, time.perf_counter() - started, classify(status, body))
+        if status >= 400:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {}
+
+    # ----- actions -----
+
+    def login(self):
+        return self.call("POST", "/api/auth/login", "POST /api/auth/login",
+                         {"email": self.email, "password": PASSWORD})
+
+    def list_requests(self):
+        body = self.call("GET", "/api/requests", "GET /api/requests")
+        if body and not self.request_ids:
+            self.request_ids = [item["id"] for item in body.get("items", [])]
+
+    def list_packets(self):
+        self.call("GET", "/api/packets", "GET /api/packets")
+
+    def create_request(self):
+        tag = f"{self.rng.getrandbits(48):012x}"
+        body = self.call("POST", "/api/requests", "POST /api/requests", {
+            "student_name": f"Walk-in {tag}",
+            "student_email": f"walkin-{tag}@example.edu",
+            "source_institution": "Howard Community College",
+            "target_program": "Computer Science BS",
+        })
+        if body and "id" in body:
+            self.request_ids.append(body["id"])
+
+    def generate(self):
+        if not self.request_ids:
+            return self.list_requests()
+        body = self.call("POST", "/api/packets/generate", "POST /api/packets/generate", {
+            "request_id": self.rng.choice(self.request_ids),
+            "template_id": self.template_id,
+        })
+        if body and "id" in body:
+            self.packet_ids.append(body["id"])
+
+    def add_info_block(self):
+        if not self.packet_ids or not self.block_ids:
+            return self.generate()
+        pid = self.rng.choice(self.packet_ids)
+        self.call("POST", f"/api/packets/{pid}/info-blocks", "POST /api/packets/:id/info-blocks",
+                  {"source_content_id": self.rng.choice(self.block_ids)})
+
+    def export(self):
+        if not self.packet_ids:
+            return self.generate()
+        self.call("POST", "/api/packets/export", f"POST /api/packets/export ({self.fmt})",
+                  {"packet_id": self.rng.choice(self.packet_ids), "format": self.fmt})
+
+    def run(self, deadline):
+        actions = list(MIX)
+        weights = [MIX[a] for a in actions]
+        self.login()
+        self.list_requests()
+        while time.monotonic() < deadline:
+            getattr(self, self.rng.choices(actions, weights)[0])()
+            if self.think_ms:
+                time.sleep(self.rng.expovariate(1000 / self.think_ms))
+
+
+# ----------------- report -----------------
+
+def summarize(recorder, elapsed, server_lock_errors):
+    routes = {}
+    total = total_errors = 0
+    for route in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[route])
+        errors = dict(recorder.errors.get(route, {}))
+        n_err = sum(errors.values())
+        total += len(values)
+        total_errors += n_err
+        routes[route] = {
+            "count": len(values),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+            "errors": n_err,
+            "error_rate": round(n_err / len(values), 4),
+            "error_kinds": errors,
+        }
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total, 4) if total else 0.0,
+        "sqlite_lock_errors_in_server_log": server_lock_errors,
+        "routes": routes,
+    }
+
+
+def print_report(result):
+    header = f"{'route':<44} {'count':>7} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'err%':>6}"
+    print(header)
+    print("-" * len(header))
+    for route, r in result["routes"].items():
+        print(
+            f"{route:<44} {r['count']:>7} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+            f" {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['error_rate'] * 100:>5.1f}%"
+        )
+    print("-" * len(header))
+    print(
+        f"{result['requests']} requests in {result['elapsed_s']}s: {result['throughput_rps']} req/s,"
+        f" {result['errors']} errors ({result['error_rate'] * 100:.2f}%)"
+    )
+    kinds = defaultdict(int)
+    for r in result["routes"].values():
+        for kind, n in r["error_kinds"].items():
+            kinds[kind] += n
+    for kind, n in sorted(kinds.items()):
+        print(f"  {kind}: {n}")
+    if result["sqlite_lock_errors_in_server_log"] is not None:
+        print(f"  'database is locked' in server log: {result['sqlite_lock_errors_in_server_log']}")
+    print("(latencies in ms)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    server = None
+    tmpdir = tempfile.TemporaryDirectory(prefix="loadtest-")
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            template_id, block_ids = fetch_ids(base_url)
+        else:
+            db_path = os.path.abspath(args.db or os.path.join(tmpdir.name, "loadtest.db"))
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{db_path}",
+                EXPORT_DIR=os.path.join(tmpdir.name, "exports"),
+                PDF_ENGINE="native",
+                EMAIL_CHECK_DELIVERABILITY="false",
+                PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.getenv("PYTHONPATH")])),
+            )
+            os.environ.update(DATABASE_URL=env["DATABASE_URL"], EXPORT_DIR=env["EXPORT_DIR"])
+            print(f"Seeding {db_path} with {args.advisors} advisors ...", file=sys.stderr)
+            template_id, block_ids = seed_database(args.advisors, args.requests_per_advisor)
+            server = Server(args.port or free_port(), env)
+            server.wait_ready()
+            base_url = server.url
+
+        recorder = Recorder()
+        advisors = [
+            Advisor(n, base_url, recorder, template_id, block_ids, args.format, args.think_ms,
+                    random.Random(rng.getrandbits(64)))
+            for n in range(args.advisors)
+        ]
+        print(f"Running {args.advisors} advisors for {args.duration:g}s against {base_url} ...", file=sys.stderr)
+        started = time.monotonic()
+        deadline = started + args.duration
+        threads = [threading.Thread(target=a.run, args=(deadline,), daemon=True) for a in advisors]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.stop()
+        tmpdir.cleanup()
+
+    result = summarize(recorder, elapsed, server.lock_errors if server is not None else None)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["error_rate"] > 0.01 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
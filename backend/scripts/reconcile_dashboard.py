@@ -0,0 +1,27 @@
+"""
+Rebuild the dashboard summary table from student_requests and packets.
+
+Usage (from backend/):
+    python -m scripts.reconcile_dashboard
+
+Run once after upgrading (to backfill existing rows) or from cron when the
+in-app periodic job is disabled (DASHBOARD_RECONCILE_INTERVAL=0).
+"""
+import sys
+
+from database import db_session, init_db
+from services.dashboard_stats import reconcile
+
+
+def main():
+    init_db()
+    try:
+        result = reconcile()
+    finally:
+        db_session.remove()
+    print(f"dashboard_stats: {result['rows']} rows, {result['drifted']} drifted")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""
+Enforce the export store's TTL and disk budget once.
+
+Usage (from backend/):
+    python -m scripts.sweep_exports
+
+Meant for cron when the in-app background sweeper is off
+(EXPORT_SWEEP_INTERVAL=0, the default).
+"""
+import sys
+
+from database import db_session, init_db
+from services.export_store import sweep
+
+
+def main():
+    init_db()
+    try:
+        result = sweep()
+    finally:
+        db_session.remove()
+    print(", ".join(f"{k}: {v}" for k, v in result.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
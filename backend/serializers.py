@@ -0,0 +1,174 @@
+"""
+Declarative response serializers.
+
+Each Serializer lists its output fields once and compiles them into a
+single generated function (plain attribute reads, no per-field dispatch),
+so dumping a row costs about as much as the hand-written dict literal it
+replaces. Rows can be ORM objects or SQLAlchemy Row tuples from column
+queries -- both expose the same attribute names.
+"""
+
+
+def iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def preview(length):
+    def _preview(value):
+        return value[:length] if value is not None else None
+    return _preview
+
+
+class Field:
+    def __init__(self, name, attr=None, convert=None):
+        self.name = name
+        self.attr = attr or name
+        self.convert = convert
+
+
+class Serializer:
+    def __init__(self, *fields):
+        self.fields = [f if isinstance(f, Field) else Field(f) for f in fields]
+        self.dump = self._compile()
+
+    def _compile(self):
+        env = {}
+        items = []
+        for i, f in enumerate(self.fields):
+            if not all(part.isidentifier() for part in f.attr.split(".")):
+                raise ValueError(f"invalid attribute path: {f.attr!r}")
+            expr = f"obj.{f.attr}"
+            if f.convert is not None:
+                env[f"_c{i}"] = f.convert
+                expr = f"_c{i}({expr})"
+            items.append(f"{f.name!r}: {expr}")
+        src = "def dump(obj):\n    return {" + ", ".join(items) + "}\n"
+        exec(compile(src, f"<serializer {id(self):x}>", "exec"), env)
+        return env["dump"]
+
+    def many(self, rows):
+        dump = self.dump
+        return [dump(r) for r in rows]
+
+    @property
+    def columns(self):
+        return [f.attr for f in self.fields]
+
+
+# ----- StudentRequest -----
+
+STUDENT_REQUEST_LIST = Serializer(
+    "id",
+    "student_name",
+    "student_email",
+    "source_institution",
+    "target_program",
+    Field("created_at", convert=iso),
+    Field("updated_at", convert=iso),
+    "latest_packet_status",
+    Field("latest_packet_updated_at", convert=iso),
+)
+
+# ----- SourceProgram -----
+
+SOURCE_PROGRAM = Serializer("id", "name", "active", Field("created_at", convert=iso))
+
+# ----- SourceContent -----
+
+SOURCE_CONTENT_PUBLIC = Serializer(
+    "id",
+    "title",
+    "content_type",
+    Field("body_preview", attr="body", convert=preview(200)),
+    "usage_tag",
+)
+
+SOURCE_CONTENT_ADMIN = Serializer(
+    "id",
+    "title",
+    "content_type",
+    "active",
+    Field("created_at", convert=iso),
+    Field("updated_at", convert=iso),
+)
+
+SOURCE_CONTENT = Serializer(
+    "id",
+    "title",
+    "content_type",
+    "active",
+    "usage_tag",
+    Field("created_at", convert=iso),
+    Field("updated_at", convert=iso),
+)
+
+SOURCE_CONTENT_PREVIEW = Serializer(
+    Field("source_content_id", attr="id"),
+    "title",
+    "content_type",
+    Field("body_preview", attr="body", convert=preview(300)),
+)
+
+# ----- TemplateSection -----
+
+TEMPLATE_SECTION_SUMMARY = Serializer("id", "title", "section_type", "display_order", "optional")
+
+TEMPLATE_SECTION_LIST = Serializer(
+    "id", "title", "section_type", "display_order", "optional", "source_content_id"
+)
+
+TEMPLATE_SECTION = Serializer(
+    "id",
+    "template_id",
+    "title",
+    "section_type",
+    "optional",
+    "display_order",
+    "source_content_id",
+)
+
+# ----- Template -----
+
+TEMPLATE_SUMMARY = Serializer("id", "name", "program_name", "program_id", "active")
+
+TEMPLATE = Serializer(
+    "id",
+    "name",
+    "program_id",
+    Field("program_name", attr="program", convert=lambda p: p.name if p else None),
+    "active",
+    Field("created_at", convert=iso),
+)
+
+# ----- Packet / PacketSection -----
+
+PACKET_STATUS = Serializer("id", "status")
+
+PACKET_SECTION_SUMMARY = Serializer("id", "title", "display_order", "section_type", "content_type")
+
+PACKET_SECTION = Serializer(
+    "id",
+    "packet_id",
+    "title",
+    "display_order",
+    "section_type",
+    "content_type",
+    "content",
+)
+
+PACKET_LIST = Serializer(
+    "id",
+    "status",
+    "request_id",
+    "template_id",
+    Field("created_at", convert=iso),
+    Field("updated_at", convert=iso),
+)
+
+PACKET = Serializer(
+    "id",
+    "status",
+    "request_id",
+    "template_id",
+    Field("sections", convert=PACKET_SECTION_SUMMARY.many),
+)
@@ -0,0 +1,60 @@
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """
+    Write-only, non-seekable file object for zipfile.
+
+    zipfile falls back to streaming mode (data descriptors after each entry)
+    when the target cannot seek, so every byte it writes can be handed to the
+    HTTP response straight away instead of being kept around.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def iter_file_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """
+    Read an open binary file in chunks and close it when done.
+    """
+    with fileobj as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_zip(entries):
+    """
+    Build a ZIP archive on the fly.
+
+    entries: iterable of (arcname, iterable_of_bytes). Entries are consumed
+    lazily, one at a time, so memory use is bounded by a single entry's
+    chunks regardless of how many entries the archive holds.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for arcname, chunks in entries:
+            with zf.open(arcname, mode="w") as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    # central directory
+    yield from sink.drain()
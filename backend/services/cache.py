@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import hashlib
+import threading
+
+
+def content_key(*parts) -> str:
+    """
+    Stable sha256 over the given parts (None-safe), for content-addressed caches.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(b"\x1f")
+        h.update(str("" if part is None else part).encode("utf-8"))
+    return h.hexdigest()
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU with hit/miss counters.
+
+    maxsize bounds the number of entries. If max_bytes is given, entries
+    are also evicted once the summed sizeof(value) goes over it.
+    """
+
+    def __init__(self, maxsize=256, max_bytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda v: 0)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizeof(self._data.pop(key))
+            self._data[key] = value
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, old = self._data.popitem(last=False)
+                self._bytes -= self._sizeof(old)
+                self.evictions += 1
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data.pop(key)
+            self._bytes -= self._sizeof(value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
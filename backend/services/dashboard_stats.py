@@ -0,0 +1,284 @@
+"""
+Incrementally maintained dashboard aggregates (see models.DashboardStat).
+
+An after_flush hook turns every inserted, updated or deleted StudentRequest
+and Packet into +/- deltas and applies them to dashboard_stats in the same
+transaction, so the counters commit or roll back together with the rows
+they describe. Writers that use bulk statements (which skip the flush) call
+apply_deltas() themselves.
+
+Turnaround is measured from the request's created_at to
+Packet.finalized_at, which a before_flush hook stamps when a packet becomes
+finalized and clears when it stops being finalized; the incremental path
+and reconcile() both read that column, so adding and removing a packet's
+turnaround cancel exactly.
+
+reconcile() rebuilds the table from student_requests/packets to repair
+drift from raw SQL, old rows, or anything else that bypassed the hook. Run
+it with scripts/reconcile_dashboard.py from cron, or opt in to a background
+thread with DASHBOARD_RECONCILE_INTERVAL (in one process only).
+"""
+from collections import defaultdict
+from datetime import datetime
+import os
+import threading
+import time
+
+from sqlalchemy import delete, event, func, insert, inspect, text, update
+from sqlalchemy.orm import attributes
+
+from database import db_session, schema_extension
+from models import DashboardStat, Packet, StudentRequest
+
+REQUESTS_BY_PROGRAM = "requests_by_program"
+PACKETS_BY_STATUS = "packets_by_status"
+TURNAROUND = "turnaround"
+
+_stats_table = DashboardStat.__table__
+_reconciler = None
+
+
+@schema_extension("1")
+def add_finalized_at(conn):
+    # packets.finalized_at was added after the table; backfill with the
+    # closest thing older rows have
+    if "finalized_at" in {c["name"] for c in inspect(conn).get_columns("packets")}:
+        return
+    conn.execute(text("ALTER TABLE packets ADD COLUMN finalized_at DATETIME"))
+    conn.execute(text("UPDATE packets SET finalized_at = updated_at WHERE status = 'finalized'"))
+
+
+def new_deltas():
+    # (advisor_id, metric, dimension) -> [count, total]
+    return defaultdict(lambda: [0, 0.0])
+
+
+def add_request(deltas, advisor_id, target_program, sign=1):
+    deltas[(advisor_id, REQUESTS_BY_PROGRAM, target_program or "")][0] += sign
+
+
+def _turnaround_seconds(req, finalized_at):
+    if req is None or req.created_at is None or finalized_at is None:
+        return 0.0
+    return max((finalized_at - req.created_at).total_seconds(), 0.0)
+
+
+def _add_packet(deltas, req, status, sign, finalized_at):
+    if req is None:
+        return
+    deltas[(req.advisor_id, PACKETS_BY_STATUS, status or "draft")][0] += sign
+    if status == "finalized":
+        entry = deltas[(req.advisor_id, TURNAROUND, "")]
+        entry[0] += sign
+        entry[1] += sign * _turnaround_seconds(req, finalized_at)
+
+
+def _old_new(obj, attr):
+    hist = attributes.get_history(obj, attr)
+    new = getattr(obj, attr)
+    return (hist.deleted[0] if hist.deleted else new), new
+
+
+@event.listens_for(db_session, "before_flush")
+def _stamp_finalized(sess, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in list(sess.new) + list(sess.dirty):
+        if not isinstance(obj, Packet):
+            continue
+        if obj.status == "finalized" and obj.finalized_at is None:
+            obj.finalized_at = now
+        elif obj.status != "finalized" and obj.finalized_at is not None:
+            obj.finalized_at = None
+
+
+def _flush_deltas(sess):
+    deltas = new_deltas()
+
+    for obj in sess.new:
+        if isinstance(obj, StudentRequest):
+            add_request(deltas, obj.advisor_id, obj.target_program)
+        elif isinstance(obj, Packet):
+            _add_packet(deltas, sess.get(StudentRequest, obj.request_id), obj.status, 1, obj.finalized_at)
+
+    for obj in sess.deleted:
+        if isinstance(obj, StudentRequest):
+            add_request(deltas, obj.advisor_id, obj.target_program, -1)
+        elif isinstance(obj, Packet):
+            _add_packet(deltas, sess.get(StudentRequest, obj.request_id), obj.status, -1, obj.finalized_at)
+
+    for obj in sess.dirty:
+        if isinstance(obj, StudentRequest):
+            old_adv, new_adv = _old_new(obj, "advisor_id")
+            old_prog, new_prog = _old_new(obj, "target_program")
+            if (old_adv, old_prog or "") != (new_adv, new_prog or ""):
+                add_request(deltas, old_adv, old_prog, -1)
+                add_request(deltas, new_adv, new_prog, 1)
+        elif isinstance(obj, Packet):
+            old, new = _old_new(obj, "status")
+            old_at, new_at = _old_new(obj, "finalized_at")
+            if (old or "draft") != (new or "draft") or old_at != new_at:
+                req = sess.get(StudentRequest, obj.request_id)
+                _add_packet(deltas, req, old, -1, old_at)
+                _add_packet(deltas, req, new, 1, new_at)
+
+    return deltas
+
+
+def apply_deltas(conn, deltas):
+    """
+    Add deltas to dashboard_stats using `conn` (a Connection or Session),
+    inside whatever transaction it is in.
+    """
+    c = _stats_table.c
+    for (advisor_id, metric, dimension), (count, total) in deltas.items():
+        if not count and not total:
+            continue
+        key = (c.advisor_id == advisor_id) & (c.metric == metric) & (c.dimension == dimension)
+        result = conn.execute(
+            update(_stats_table).where(key).values({c["count"]: c["count"] + count, c.total: c.total + total})
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(_stats_table).values(
+                advisor_id=advisor_id, metric=metric, dimension=dimension, count=count, total=total,
+            ))
+
+
+@event.listens_for(db_session, "after_flush")
+def _maintain_stats(sess, flush_context):
+    deltas = _flush_deltas(sess)
+    if deltas:
+        apply_deltas(sess.connection(), deltas)
+
+
+def summary(advisor_id=None):
+    """
+    Dashboard numbers for one advisor, or everyone when advisor_id is None.
+    Reads only dashboard_stats, so cost does not grow with request volume.
+    """
+    q = db_session.query(
+        DashboardStat.metric,
+        DashboardStat.dimension,
+        func.sum(DashboardStat.count),
+        func.sum(DashboardStat.total),
+    ).group_by(DashboardStat.metric, DashboardStat.dimension)
+    if advisor_id is not None:
+        q = q.filter(DashboardStat.advisor_id == advisor_id)
+
+    by_program, by_status = {}, {"draft": 0, "finalized": 0}
+    finalized, seconds = 0, 0.0
+    for metric, dimension, count, total in q:
+        if metric == REQUESTS_BY_PROGRAM and count:
+            by_program[dimension] = count
+        elif metric == PACKETS_BY_STATUS:
+            by_status[dimension] = count
+        elif metric == TURNAROUND:
+            finalized, seconds = count, total
+
+    return {
+        "requests_total": sum(by_program.values()),
+        "requests_by_program": by_program,
+        "packets_by_status": by_status,
+        "turnaround": {
+            "finalized": finalized,
+            "avg_hours": round(seconds / finalized / 3600, 2) if finalized else None,
+        },
+    }
+
+
+def _lock_stats():
+    """
+    Take the write lock on dashboard_stats for the rest of the transaction,
+    so no flush can commit deltas between reconcile()'s reads and its
+    replace. On SQLite any write takes the database write lock (and starts
+    the transaction the reads then run in).
+    """
+    if db_session.get_bind().dialect.name == "sqlite":
+        db_session.execute(text("UPDATE dashboard_stats SET count = count WHERE 0"))
+    else:
+        db_session.execute(text("LOCK TABLE dashboard_stats IN EXCLUSIVE MODE"))
+
+
+def reconcile():
+    """
+    Recompute every aggregate from the source tables and replace
+    dashboard_stats in one transaction that holds the write lock throughout.
+    Returns how many rows had drifted.
+    """
+    _lock_stats()
+    deltas = new_deltas()
+    q = db_session.query(
+        StudentRequest.advisor_id, StudentRequest.target_program, func.count(StudentRequest.id)
+    ).group_by(StudentRequest.advisor_id, StudentRequest.target_program)
+    for advisor_id, program, n in q:
+        add_request(deltas, advisor_id, program, n)
+
+    q = (
+        db_session.query(StudentRequest.advisor_id, Packet.status, func.count(Packet.id))
+        .join(StudentRequest, Packet.request_id == StudentRequest.id)
+        .group_by(StudentRequest.advisor_id, Packet.status)
+    )
+    for advisor_id, status, n in q:
+        deltas[(advisor_id, PACKETS_BY_STATUS, status or "draft")][0] += n
+
+    q = (
+        db_session.query(StudentRequest.advisor_id, StudentRequest.created_at, Packet.finalized_at)
+        .join(StudentRequest, Packet.request_id == StudentRequest.id)
+        .filter(Packet.status == "finalized")
+        .yield_per(1000)
+    )
+    for advisor_id, created_at, finalized_at in q:
+        entry = deltas[(advisor_id, TURNAROUND, "")]
+        entry[0] += 1
+        if created_at and finalized_at:
+            entry[1] += max((finalized_at - created_at).total_seconds(), 0.0)
+
+    fresh = {k: (count, total) for k, (count, total) in deltas.items() if count or total}
+    current = {
+        (a, m, d): (count, total)
+        for a, m, d, count, total in db_session.query(
+            DashboardStat.advisor_id, DashboardStat.metric, DashboardStat.dimension,
+            DashboardStat.count, DashboardStat.total,
+        )
+        if count or total
+    }
+    drifted = sum(
+        1 for k in set(fresh) | set(current)
+        if fresh.get(k, (0, 0.0))[0] != current.get(k, (0, 0.0))[0]
+        or abs(fresh.get(k, (0, 0.0))[1] - current.get(k, (0, 0.0))[1]) > 1.0
+    )
+
+    db_session.execute(delete(DashboardStat))
+    if fresh:
+        db_session.execute(insert(DashboardStat), [
+            {"advisor_id": a, "metric": m, "dimension": d, "count": count, "total": total}
+            for (a, m, d), (count, total) in fresh.items()
+        ])
+    db_session.commit()
+    return {"rows": len(fresh), "drifted": drifted}
+
+
+def start_reconciler(app):
+    """
+    Run reconcile() every DASHBOARD_RECONCILE_INTERVAL seconds in a daemon thread.
+    Off by default: every process that builds the app would start one.
+    """
+    global _reconciler
+    interval = int(os.getenv("DASHBOARD_RECONCILE_INTERVAL", "0"))
+    if interval <= 0 or _reconciler is not None:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                result = reconcile()
+                if result["drifted"]:
+                    app.logger.warning("Dashboard stats drift repaired: %s", result)
+            except Exception:
+                app.logger.exception("Dashboard reconcile failed")
+                db_session.rollback()
+            finally:
+                db_session.remove()
+
+    _reconciler = threading.Thread(target=loop, name="dashboard-reconciler", daemon=True)
+    _reconciler.start()
@@ -1,10 +1,18 @@
 from docx import Document
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.oxml import OxmlElement
+from docx.oxml import OxmlElement, parse_xml
 from docx.oxml.ns import qn
-from collections import OrderedDict, defaultdict
-from pathlib import Path
+from docx.shared import Pt, RGBColor
+from io import BytesIO
+from lxml import etree
 import json
+import os
+
+from models import PER_STUDENT_SECTION_TYPES
+from services.cache import LRUCache, content_key
+from services.markdown import parse_markdown, safe_href
+from services.reproducible import export_timestamp, normalize_zip
+from services.tables import group_term_rows
 
 def _shade_cell(cell, fill_hex: str = "C6EFCE"):
     """
@@ -33,41 +41,14 @@ def render_table(doc, table_json_str):
         doc.add_paragraph("[No table data]")
         return
 
-    # We will use all columns *except* the first ("Term") as table columns
-    # and show the term as a heading above each table.
-    visible_cols = columns[1:] if len(columns) > 1 else columns
-
-    # Group rows by term, and track benchmark rows to show as notes
-    grouped = OrderedDict()          # term -> list of row_values (without term)
-    benchmarks = defaultdict(list)   # term -> list of benchmark strings
-    last_term = None
-
-    for row in rows:
-        if not row:
-            continue
-        term = str(row[0])
-
-        # Detect benchmark rows by name
-        if "benchmark" in term.lower():
-            # Attach this benchmark text to the last non-benchmark term we saw
-            note = row[3] if len(row) > 3 else ""
-            if last_term is not None and note:
-                benchmarks[last_term].append(note)
-            continue
-
-        # Normal term row: store without the term column
-        last_term = term
-        grouped.setdefault(term, []).append(row[1:])
-
-    # Figure out which index is "Credits" so we can center it
-    try:
-        credits_idx = visible_cols.index("Credits")
-    except ValueError:
-        credits_idx = None
+    term_table = group_term_rows(columns, rows)
+    visible_cols = term_table.visible_cols
+    benchmarks = term_table.benchmarks
+    credits_idx = term_table.credits_idx
 
     # ----- Render a separate table for each term -----
     first_term = True
-    for term, term_rows in grouped.items():
+    for term, term_rows in term_table.grouped.items():
         if not first_term:
             # Add a blank paragraph between terms for spacing
             doc.add_paragraph()
@@ -124,11 +105,144 @@ def render_table(doc, table_json_str):
                 p.add_run(note)
 
 
-def render_packet_docx(packet, sections, export_dir="exports"):
-    export_path = Path(export_dir)
-    export_path.mkdir(parents=True, exist_ok=True)
-    filename = export_path / f"packet_{packet.id}.docx"
+def _add_inlines(paragraph, inlines, bold=False, italic=False):
+    for node in inlines:
+        kind = node[0]
+        if kind in ("text", "code"):
+            run = paragraph.add_run(node[1])
+            run.bold = bold or None
+            run.italic = italic or None
+            if kind == "code":
+                run.font.name = "Courier New"
+        elif kind == "br":
+            paragraph.add_run().add_break()
+        elif kind == "strong":
+            _add_inlines(paragraph, node[1], True, italic)
+        elif kind == "em":
+            _add_inlines(paragraph, node[1], bold, True)
+        elif kind == "link":
+            _add_link(paragraph, node[1], node[2], bold, italic)
+
+
+def _add_link(paragraph, inlines, href, bold, italic):
+    """
+    A link as a HYPERLINK field rather than a w:hyperlink element: the
+    field needs no relationship in the document part, so the OXML can be
+    cached and copied into other documents as-is.
+    """
+    href = safe_href(href)
+    if href is None:
+        _add_inlines(paragraph, inlines, bold, italic)
+        return
+    field = OxmlElement("w:fldSimple")
+    field.set(qn("w:instr"), ' HYPERLINK "%s" ' % href.replace('"', "%22"))
+    paragraph._p.append(field)
+    start = len(paragraph.runs)
+    _add_inlines(paragraph, inlines, bold, italic)
+    for run in paragraph.runs[start:]:
+        run.font.underline = True
+        run.font.color.rgb = RGBColor(0x05, 0x63, 0xC1)
+        field.append(run._r)
+
+
+def render_markdown(doc, text):
+    for block in parse_markdown(text):
+        kind = block[0]
+        if kind == "heading":
+            # the section title is level 2, so markdown headings nest below it
+            heading = doc.add_heading(level=min(block[1] + 2, 9))
+            _add_inlines(heading, block[2])
+        elif kind == "paragraph":
+            _add_inlines(doc.add_paragraph(), block[1])
+        elif kind == "list":
+            ordered, start, items = block[1], block[2], block[3]
+            for n, item in enumerate(items):
+                if ordered:
+                    # numbered explicitly; "List Number" would continue
+                    # counting across every list in the document
+                    p = doc.add_paragraph()
+                    p.paragraph_format.left_indent = Pt(18)
+                    p.paragraph_format.first_line_indent = Pt(-18)
+                    p.add_run(f"{start + n}.\t")
+                else:
+                    p = doc.add_paragraph(style="List Bullet")
+                _add_inlines(p, item)
+        elif kind == "table":
+            header, rows = block[1], block[2]
+            table = doc.add_table(rows=1 + len(rows), cols=len(header))
+            table.style = "Table Grid"
+            for j, cell_inlines in enumerate(header):
+                cell = table.rows[0].cells[j]
+                _add_inlines(cell.paragraphs[0], cell_inlines, bold=True)
+                _shade_cell(cell, "C6EFCE")
+            for i, row in enumerate(rows):
+                for j, cell_inlines in enumerate(row):
+                    _add_inlines(table.rows[i + 1].cells[j].paragraphs[0], cell_inlines)
+
+
+# Bump when the OXML produced for a section changes, so cached fragments are not reused.
+DOCX_RENDERER_VERSION = "2"
+
+_fragment_cache = LRUCache(
+    maxsize=int(os.getenv("DOCX_FRAGMENT_CACHE_SIZE", "256")),
+    max_bytes=int(os.getenv("DOCX_FRAGMENT_CACHE_BYTES", str(32 * 1024 * 1024))),
+    sizeof=lambda frags: sum(len(f) for f in frags),
+)
+
+
+def render_section(doc, s):
+    doc.add_heading(s.title, level=2)
+
+    if s.content_type in ("table", "audit_table"):
+        render_table(doc, s.content or "{}")
+    elif s.content_type == "markdown":
+        render_markdown(doc, s.content)
+    else:
+        doc.add_paragraph(s.content or "")
+
+
+def _render_section_fragments(s):
+    """
+    Render a section into a scratch document and serialize the resulting
+    body elements (heading, term tables, benchmark paragraphs).
+    """
+    scratch = Document()
+    render_section(scratch, s)
+    sect_pr = qn("w:sectPr")
+    return tuple(
+        etree.tostring(el) for el in scratch.element.body if el.tag != sect_pr
+    )
+
+
+def section_fragments(s):
+    key = content_key(DOCX_RENDERER_VERSION, s.title, s.content_type, s.content)
+    frags = _fragment_cache.get(key)
+    if frags is None:
+        frags = _fragment_cache.put(key, _render_section_fragments(s))
+    return frags
+
+
+def _append_fragments(doc, frags):
+    body = doc.element.body
+    sect_pr = body.sectPr
+    for frag in frags:
+        el = parse_xml(frag)
+        if sect_pr is not None:
+            sect_pr.addprevious(el)
+        else:
+            body.append(el)
+
+
+def fragment_cache_stats():
+    return _fragment_cache.stats()
 
+
+def build_packet_docx(packet, sections):
+    """
+    Build the in-memory Document for a packet without saving it anywhere.
+    Shared sections are copied in from the OXML fragment cache; only the
+    header and per-student sections are built fresh.
+    """
     doc = Document()
 
     # Header info
@@ -145,13 +259,29 @@ def render_packet_docx(packet, sections, export_dir="exports"):
     doc.add_paragraph("")
 
     for s in sections:
-        doc.add_heading(s.title, level=2)
-
-        if s.content_type in ("table", "audit_table"):
-            render_table(doc, s.content or "{}")
+        if s.section_type in PER_STUDENT_SECTION_TYPES:
+            render_section(doc, s)
         else:
-            # assume plain text / markdown-ish
-            doc.add_paragraph(s.content or "")
+            _append_fragments(doc, section_fragments(s))
+
+    return doc
+
+
+def render_packet_docx_bytes(packet, sections):
+    """
+    Render the packet into an in-memory buffer and return the .docx bytes.
+    With DETERMINISTIC_EXPORTS the core properties and zip entries carry a
+    pinned timestamp, so identical content gives identical bytes.
+    """
+    doc = build_packet_docx(packet, sections)
+    when = export_timestamp(packet)
+    if when is not None:
+        props = doc.core_properties
+        props.created = props.modified = when
+        props.revision = 1
 
-    doc.save(str(filename))
-    return str(filename)
+    buf = BytesIO()
+    doc.save(buf)
+    if when is None:
+        return buf.getvalue()
+    return normalize_zip(buf.getvalue(), when)
@@ -0,0 +1,210 @@
+"""
+Packet activity feed for the server-sent events endpoint.
+
+Routes call queue_event() next to their writes. Queued events are published
+only once the surrounding transaction commits (and dropped on rollback), so
+clients never hear about changes that did not happen.
+
+Two interchangeable broadcasters, chosen with EVENT_BROADCASTER:
+
+- memory (default): a bounded in-process ring buffer with a Condition;
+  subscribers wake immediately. Only sees events from its own process.
+- db: events are rows in packet_events and subscribers poll for new ids
+  every EVENT_POLL_INTERVAL seconds, so all worker processes sharing the
+  database see one stream. Rows older than EVENT_RETENTION_SECONDS are pruned.
+
+Either way a subscriber keeps just a cursor (last event id), so a client
+reconnecting with Last-Event-ID resumes where it left off as long as the
+event is still retained.
+"""
+from collections import deque
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import delete, event as sa_event, func, insert, select
+
+from database import db_session, engine
+from models import PacketEvent
+
+_events_table = PacketEvent.__table__
+
+
+def _matches(ev, advisor_id):
+    return advisor_id is None or ev.get("advisor_id") == advisor_id
+
+
+class MemoryBroadcaster:
+    def __init__(self, history=1000):
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=history)
+        self._last_id = 0
+
+    def publish(self, ev):
+        with self._cond:
+            self._last_id += 1
+            ev = dict(ev, id=self._last_id)
+            self._events.append(ev)
+            self._cond.notify_all()
+        return ev
+
+    def latest_id(self):
+        with self._cond:
+            return self._last_id
+
+    def next_events(self, after_id, advisor_id, timeout):
+        """
+        Events newer than after_id visible to advisor_id (None = all),
+        waiting up to `timeout` seconds for one to arrive.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if after_id > self._last_id:  # id from before a restart
+                after_id = self._last_id
+            while True:
+                found = [e for e in self._events if e["id"] > after_id and _matches(e, advisor_id)]
+                remaining = deadline - time.monotonic()
+                if found or remaining <= 0:
+                    return found
+                if self._events and self._events[-1]["id"] > after_id:
+                    after_id = self._events[-1]["id"]  # newer events, none for us
+                self._cond.wait(remaining)
+
+
+class DatabaseBroadcaster:
+    def __init__(self, poll_interval=1.0, retention_seconds=86400):
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._published = 0
+
+    def publish(self, ev):
+        payload = {k: v for k, v in ev.items() if k not in ("type", "packet_id", "request_id", "advisor_id")}
+        with engine.begin() as conn:
+            new_id = conn.execute(insert(_events_table).values(
+                type=ev["type"],
+                packet_id=ev.get("packet_id"),
+                request_id=ev.get("request_id"),
+                advisor_id=ev.get("advisor_id"),
+                data=json.dumps(payload),
+                created_at=datetime.utcnow(),
+            )).inserted_primary_key[0]
+            self._published += 1
+            if self._published % 100 == 0:
+                cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+                conn.execute(delete(_events_table).where(_events_table.c.created_at < cutoff))
+        return dict(ev, id=new_id)
+
+    def latest_id(self):
+        with engine.connect() as conn:
+            return conn.execute(select(func.coalesce(func.max(_events_table.c.id), 0))).scalar()
+
+    def _fetch(self, after_id, advisor_id):
+        t = _events_table
+        q = select(t).where(t.c.id > after_id).order_by(t.c.id).limit(100)
+        if advisor_id is not None:
+            q = q.where(t.c.advisor_id == advisor_id)
+        with engine.connect() as conn:
+            rows = conn.execute(q).mappings().all()
+        events = []
+        for row in rows:
+            ev = json.loads(row["data"] or "{}")
+            ev.update(id=row["id"], type=row["type"], packet_id=row["packet_id"],
+                      request_id=row["request_id"], advisor_id=row["advisor_id"])
+            events.append(ev)
+        return events
+
+    def next_events(self, after_id, advisor_id, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            found = self._fetch(after_id, advisor_id)
+            remaining = deadline - time.monotonic()
+            if found or remaining <= 0:
+                return found
+            time.sleep(min(self.poll_interval, remaining))
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            if os.getenv("EVENT_BROADCASTER", "memory").lower() == "db":
+                _broadcaster = DatabaseBroadcaster(
+                    poll_interval=float(os.getenv("EVENT_POLL_INTERVAL", "1")),
+                    retention_seconds=int(os.getenv("EVENT_RETENTION_SECONDS", "86400")),
+                )
+            else:
+                _broadcaster = MemoryBroadcaster()
+        return _broadcaster
+
+
+def set_broadcaster(broadcaster):
+    """Swap the process-wide broadcaster (tests)."""
+    global _broadcaster
+    with _broadcaster_lock:
+        _broadcaster = broadcaster
+
+
+def make_event(event_type, packet, **data):
+    req = packet.request
+    return {
+        "type": event_type,
+        "packet_id": packet.id,
+        "request_id": packet.request_id,
+        "advisor_id": req.advisor_id if req is not None else None,
+        "status": packet.status,
+        "at": datetime.utcnow().isoformat(),
+        **data,
+    }
+
+
+def queue_event(event_type, packet, **data):
+    """
+    Publish an event for `packet` when the current transaction commits.
+    Call after the packet has been flushed or has an id.
+    """
+    db_session.info.setdefault("pending_events", []).append(make_event(event_type, packet, **data))
+
+
+def publish_event(event_type, packet, **data):
+    """Publish right away (for work that does not commit anything)."""
+    return get_broadcaster().publish(make_event(event_type, packet, **data))
+
+
+@sa_event.listens_for(db_session, "after_commit")
+def _publish_committed(sess):
+    pending = sess.info.pop("pending_events", None)
+    for ev in pending or ():
+        get_broadcaster().publish(ev)
+
+
+@sa_event.listens_for(db_session, "after_rollback")
+def _drop_rolled_back(sess):
+    sess.info.pop("pending_events", None)
+
+
+def format_sse(ev):
+    return f"id: {ev['id']}\nevent: {ev['type']}\ndata: {json.dumps(ev, separators=(',', ':'))}\n\n"
+
+
+def iter_sse(advisor_id, last_event_id=None, heartbeat=15.0):
+    """
+    Endless text/event-stream body. Starts after last_event_id when given,
+    otherwise with events published from now on.
+    """
+    broadcaster = get_broadcaster()
+    cursor = last_event_id if last_event_id is not None else broadcaster.latest_id()
+    yield "retry: 3000\n: connected\n\n"
+    while True:
+        events = broadcaster.next_events(cursor, advisor_id, heartbeat)
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for ev in events:
+            cursor = ev["id"]
+            yield format_sse(ev)
@@ -0,0 +1,86 @@
+import os
+
+from services.export_store import record_artifact, touch
+from services.single_flight import SingleFlight, file_lock
+from services.storage import get_export_storage
+
+
+def packet_content_stamp(packet):
+    """
+    Latest modification time of a packet or any of its sections.
+    """
+    stamps = [packet.updated_at or packet.created_at]
+    stamps.extend(s.updated_at or s.created_at for s in packet.sections)
+    return max(t for t in stamps if t is not None)
+
+
+def export_filename(packet_id, fmt):
+    return f"packet_{packet_id}.{fmt}"
+
+
+def stored_export_name(packet, fmt, storage):
+    """
+    Name of a previously exported artifact for this packet, if it is still
+    newer than the packet content. Otherwise None.
+    """
+    name = export_filename(packet.id, fmt)
+    if not storage.exists(name):
+        return None
+    if storage.mtime(name) < packet_content_stamp(packet):
+        return None
+    return name
+
+
+export_flight = SingleFlight()
+
+
+def export_lock_path(name, export_dir=None):
+    export_dir = export_dir or os.getenv("EXPORT_DIR", "exports")
+    lock_dir = os.getenv("EXPORT_LOCK_DIR") or os.path.join(export_dir, ".locks")
+    return os.path.join(lock_dir, f"{name}.lock")
+
+
+def render_export_once(packet, fmt, render):
+    """
+    Render packet_{id}.{fmt} once for all threads in this process asking for
+    the same content version, without storing it (direct downloads).
+    Returns (name, bytes, err).
+    """
+    name = export_filename(packet.id, fmt)
+    version = packet_content_stamp(packet).isoformat()
+    (payload, err), _shared = export_flight.do(("direct", packet.id, fmt, version), render)
+    return name, payload, err
+
+
+def store_export_once(packet, fmt, render, storage=None):
+    """
+    Render and store packet_{id}.{fmt} once per content version, no matter how
+    many threads or worker processes ask at the same moment.
+
+    Threads in this process wait on the in-flight render; other processes
+    queue on an OS lock on the artifact's lock file and, once they get it,
+    pick up the artifact the previous holder just stored instead of
+    rendering again.
+    Returns (name, bytes, err).
+    """
+    storage = storage or get_export_storage()
+    name = export_filename(packet.id, fmt)
+    version = packet_content_stamp(packet).isoformat()
+
+    def produce():
+        timeout = float(os.getenv("EXPORT_LOCK_TIMEOUT", "120"))
+        with file_lock(export_lock_path(name), timeout=timeout) as waited:
+            if waited and stored_export_name(packet, fmt, storage):
+                with storage.open(name) as f:
+                    payload = f.read()
+                touch(name)
+                return payload, None
+            payload, err = render()
+            if err:
+                return None, err
+            storage.put(name, payload)
+            record_artifact(name, len(payload))
+            return payload, None
+
+    (payload, err), _shared = export_flight.do(("stored", packet.id, fmt, version), produce)
+    return name, payload, err
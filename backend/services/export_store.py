@@ -0,0 +1,212 @@
+"""
+Export artifact store: keeps export storage within a disk budget.
+
+Every export artifact (see services.storage) is recorded in export_artifacts with its size and last
+access time. A sweep -- scripts/sweep_exports.py from cron, or the opt-in
+background thread (EXPORT_SWEEP_INTERVAL) -- then:
+  1. adopts artifacts it does not know about yet (e.g. exports from before
+     tracking existed) and forgets rows whose artifact is gone,
+  2. deletes artifacts not accessed for EXPORT_TTL_SECONDS,
+  3. while the total is over EXPORT_MAX_BYTES, deletes the least recently
+     used artifacts -- draft packets' files first, finalized ones last.
+PDFs compile in a scratch directory; LaTeX intermediates (.aux/.log/.tex/.out)
+left in export storage by older versions are deleted on sweep.
+"""
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+
+from sqlalchemy import case, func
+
+from database import db_session
+from models import ExportArtifact, Packet
+from services.storage import get_export_storage
+
+LATEX_INTERMEDIATE_SUFFIXES = (".aux", ".log", ".tex", ".out")
+
+_last_sweep = {}
+_sweeper = None
+
+
+def max_bytes():
+    return int(os.getenv("EXPORT_MAX_BYTES", "0"))  # 0 = unlimited
+
+
+def ttl_seconds():
+    return int(os.getenv("EXPORT_TTL_SECONDS", "0"))  # 0 = keep forever
+
+
+def _parse_filename(filename):
+    """
+    "packet_12.docx" -> (12, "docx"); anything else -> (None, suffix or None).
+    """
+    stem, _, fmt = filename.rpartition(".")
+    if stem.startswith("packet_") and stem[len("packet_"):].isdigit():
+        return int(stem[len("packet_"):]), fmt
+    return None, fmt or None
+
+
+def record_artifact(filename, size_bytes, commit=True):
+    """
+    Register (or refresh) an artifact that was just written to export storage.
+    """
+    packet_id, fmt = _parse_filename(filename)
+    now = datetime.utcnow()
+
+    art = db_session.query(ExportArtifact).filter_by(filename=filename).first()
+    if art is None:
+        art = ExportArtifact(filename=filename, packet_id=packet_id, fmt=fmt, created_at=now)
+        db_session.add(art)
+    art.size_bytes = size_bytes
+    art.last_accessed_at = now
+    if commit:
+        db_session.commit()
+    return art
+
+
+def touch(*filenames, commit=True):
+    if not filenames:
+        return
+    db_session.query(ExportArtifact).filter(ExportArtifact.filename.in_(filenames)).update(
+        {ExportArtifact.last_accessed_at: datetime.utcnow()}, synchronize_session=False
+    )
+    if commit:
+        db_session.commit()
+
+
+def _delete(art, storage):
+    storage.delete(art.filename)
+    db_session.delete(art)
+
+
+def _sync_with_storage(storage):
+    """
+    Adopt untracked artifacts and drop rows whose artifact no longer exists.
+    """
+    stored = set(storage.iter_names())
+
+    tracked = {a.filename: a for a in db_session.query(ExportArtifact)}
+    for name, art in tracked.items():
+        if name not in stored:
+            db_session.delete(art)
+
+    adopted = 0
+    for name in stored:
+        if name in tracked:
+            continue
+        if name.endswith(LATEX_INTERMEDIATE_SUFFIXES):
+            storage.delete(name)
+            continue
+        packet_id, fmt = _parse_filename(name)
+        mtime = storage.mtime(name)
+        db_session.add(ExportArtifact(
+            filename=name,
+            packet_id=packet_id,
+            fmt=fmt,
+            size_bytes=storage.size(name),
+            created_at=mtime,
+            last_accessed_at=mtime,
+        ))
+        adopted += 1
+    db_session.flush()
+    return adopted
+
+
+def sweep(storage=None):
+    """
+    Enforce TTL and disk budget. Returns a summary dict.
+    """
+    storage = storage or get_export_storage()
+    started = time.monotonic()
+    adopted = _sync_with_storage(storage)
+
+    expired = 0
+    if ttl_seconds():
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds())
+        for art in db_session.query(ExportArtifact).filter(ExportArtifact.last_accessed_at < cutoff):
+            _delete(art, storage)
+            expired += 1
+        db_session.flush()
+
+    evicted = 0
+    budget = max_bytes()
+    if budget:
+        total = db_session.query(func.coalesce(func.sum(ExportArtifact.size_bytes), 0)).scalar()
+        if total > budget:
+            # drafts (and orphans) first, then finalized; oldest access first within each
+            finalized_last = case((Packet.status == "finalized", 1), else_=0)
+            victims = (
+                db_session.query(ExportArtifact)
+                .outerjoin(Packet, ExportArtifact.packet_id == Packet.id)
+                .order_by(finalized_last, ExportArtifact.last_accessed_at)
+                .yield_per(200)
+            )
+            doomed = []
+            for art in victims:
+                if total <= budget:
+                    break
+                total -= art.size_bytes
+                doomed.append(art)
+            for art in doomed:
+                _delete(art, storage)
+                evicted += 1
+
+    db_session.commit()
+    _last_sweep.update({
+        "at": datetime.utcnow().isoformat(),
+        "adopted": adopted,
+        "expired": expired,
+        "evicted": evicted,
+        "duration_ms": round((time.monotonic() - started) * 1000, 1),
+    })
+    return dict(_last_sweep)
+
+
+def stats():
+    rows = (
+        db_session.query(
+            case((Packet.status == "finalized", "finalized"), else_="draft").label("status"),
+            func.count(ExportArtifact.id),
+            func.coalesce(func.sum(ExportArtifact.size_bytes), 0),
+        )
+        .outerjoin(Packet, ExportArtifact.packet_id == Packet.id)
+        .group_by("status")
+        .all()
+    )
+    by_status = {status: {"count": count, "bytes": size} for status, count, size in rows}
+    return {
+        "storage": type(get_export_storage()).__name__,
+        "count": sum(v["count"] for v in by_status.values()),
+        "bytes": sum(v["bytes"] for v in by_status.values()),
+        "by_status": by_status,
+        "max_bytes": max_bytes(),
+        "ttl_seconds": ttl_seconds(),
+        "last_sweep": dict(_last_sweep) or None,
+    }
+
+
+def start_sweeper(app):
+    """
+    Run sweep() every EXPORT_SWEEP_INTERVAL seconds in a daemon thread.
+    Off by default: every process that builds the app would start one, so
+    enable it in a single process only, or run scripts/sweep_exports.py.
+    """
+    global _sweeper
+    interval = int(os.getenv("EXPORT_SWEEP_INTERVAL", "0"))
+    if interval <= 0 or _sweeper is not None:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                sweep()
+            except Exception:
+                app.logger.exception("Export sweep failed")
+                db_session.rollback()
+            finally:
+                db_session.remove()
+
+    _sweeper = threading.Thread(target=loop, name="export-sweeper", daemon=True)
+    _sweeper.start()
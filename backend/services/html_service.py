@@ -0,0 +1,149 @@
+from html import escape
+import json
+import os
+
+from services.cache import LRUCache, content_key
+from services.markdown import parse_markdown, safe_href
+from services.tables import group_term_rows
+
+# Bump when the HTML produced for a section changes.
+HTML_RENDERER_VERSION = "2"
+
+# section id -> (content fingerprint, html)
+_section_cache = LRUCache(maxsize=int(os.getenv("PREVIEW_CACHE_SIZE", "2048")))
+
+PREVIEW_CSS = """
+body { font-family: Arial, Helvetica, sans-serif; max-width: 50rem; margin: 2rem auto; }
+table { border-collapse: collapse; width: 100%; margin-bottom: .5rem; }
+th, td { border: 1px solid #999; padding: .25rem .5rem; text-align: left; }
+th { background: #C6EFCE; }
+td.credits, th.credits { text-align: center; }
+.term { font-weight: bold; margin: 1rem 0 .25rem; }
+"""
+
+
+def _render_table_html(table_json_str):
+    try:
+        data = json.loads(table_json_str)
+    except Exception:
+        return "<p>[Could not parse table]</p>"
+
+    columns = data.get("columns", [])
+    rows = data.get("rows", [])
+    if not columns or not rows:
+        return "<p>[No table data]</p>"
+
+    term_table = group_term_rows(columns, rows)
+    credits_idx = term_table.credits_idx
+
+    def cell(tag, value, j):
+        cls = ' class="credits"' if j == credits_idx else ""
+        return f"<{tag}{cls}>{escape(str(value))}</{tag}>"
+
+    header = "".join(cell("th", c, j) for j, c in enumerate(term_table.visible_cols))
+    out = []
+    for term, term_rows in term_table.grouped.items():
+        out.append(f'<p class="term">{escape(term)}</p>')
+        out.append(f"<table><thead><tr>{header}</tr></thead><tbody>")
+        for row_vals in term_rows:
+            out.append("<tr>" + "".join(cell("td", v, j) for j, v in enumerate(row_vals)) + "</tr>")
+        out.append("</tbody></table>")
+        for note in term_table.benchmarks.get(term, []):
+            out.append(f"<p><strong>Benchmarks: </strong>{escape(str(note))}</p>")
+    return "\n".join(out)
+
+
+def _inlines_html(inlines):
+    out = []
+    for node in inlines:
+        kind = node[0]
+        if kind == "text":
+            out.append(escape(node[1]))
+        elif kind == "code":
+            out.append(f"<code>{escape(node[1])}</code>")
+        elif kind == "br":
+            out.append("<br>")
+        elif kind == "strong":
+            out.append(f"<strong>{_inlines_html(node[1])}</strong>")
+        elif kind == "em":
+            out.append(f"<em>{_inlines_html(node[1])}</em>")
+        elif kind == "link":
+            href = safe_href(node[2])
+            label = _inlines_html(node[1])
+            out.append(f'<a href="{escape(href)}">{label}</a>' if href else label)
+    return "".join(out)
+
+
+def _render_markdown_html(text):
+    out = []
+    for block in parse_markdown(text):
+        kind = block[0]
+        if kind == "heading":
+            # h2 is the section title, so markdown headings start at h3
+            level = min(block[1] + 2, 6)
+            out.append(f"<h{level}>{_inlines_html(block[2])}</h{level}>")
+        elif kind == "paragraph":
+            out.append(f"<p>{_inlines_html(block[1])}</p>")
+        elif kind == "list":
+            ordered, start, items = block[1], block[2], block[3]
+            tag = "ol" if ordered else "ul"
+            attr = f' start="{start}"' if ordered and start != 1 else ""
+            out.append(f"<{tag}{attr}>" + "".join(f"<li>{_inlines_html(i)}</li>" for i in items) + f"</{tag}>")
+        elif kind == "table":
+            header = "".join(f"<th>{_inlines_html(c)}</th>" for c in block[1])
+            body = "".join(
+                "<tr>" + "".join(f"<td>{_inlines_html(c)}</td>" for c in row) + "</tr>"
+                for row in block[2]
+            )
+            out.append(f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>")
+    return "\n".join(out)
+
+
+def render_section_html(s):
+    parts = [f"<h2>{escape(s.title)}</h2>"]
+    if s.content_type in ("table", "audit_table"):
+        parts.append(_render_table_html(s.content or "{}"))
+    elif s.content_type == "markdown":
+        parts.append(_render_markdown_html(s.content))
+    else:
+        for para in (s.content or "").split("\n\n"):
+            parts.append("<p>" + escape(para).replace("\n", "<br>") + "</p>")
+    return f'<section data-section-id="{s.id}">' + "\n".join(parts) + "</section>"
+
+
+def section_html(s):
+    """
+    Cached HTML for one PacketSection. The entry is keyed by section id and
+    re-rendered whenever the section's content fingerprint changes.
+    """
+    fingerprint = content_key(HTML_RENDERER_VERSION, s.title, s.content_type, s.content)
+    cached = _section_cache.get(s.id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    html = render_section_html(s)
+    _section_cache.put(s.id, (fingerprint, html))
+    return html
+
+
+def invalidate_section(section_id):
+    _section_cache.pop(section_id)
+
+
+def preview_cache_stats():
+    return _section_cache.stats()
+
+
+def render_packet_html(packet, sections):
+    req = packet.request
+    header = (
+        "<h1>UMBC Advising Packet</h1>"
+        f"<p>Student: {escape(req.student_name or '')} &lt;{escape(req.student_email or '')}&gt;</p>"
+        f"<p>Source Institution: {escape(req.source_institution or '-')}</p>"
+        f"<p>Target Program: {escape(req.target_program or '-')}</p>"
+    )
+    body = "\n".join(section_html(s) for s in sections)
+    return (
+        "<!doctype html><html><head><meta charset=\"utf-8\">"
+        f"<title>Packet {packet.id} preview</title><style>{PREVIEW_CSS}</style></head>"
+        f"<body>{header}\n{body}</body></html>"
+    )
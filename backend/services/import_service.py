@@ -0,0 +1,175 @@
+"""
+Bulk import of student requests from CSV.
+
+The file is read as a stream and handled in batches of IMPORT_BATCH_SIZE
+rows: each batch is validated, checked against existing requests with one
+query, inserted with one bulk INSERT and committed, so memory stays flat no
+matter how long the file is and an interrupted import can simply be re-run.
+
+Columns (header names are case-insensitive):
+    student_name, student_email            required
+    source_institution, target_program     optional
+
+A row whose (email, target_program) already exists -- in the database or
+earlier in the same file -- is counted as a duplicate and skipped, which
+makes re-uploading the same spreadsheet a no-op.
+"""
+import csv
+import os
+
+from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import func, insert, text
+
+from database import db_session, schema_extension
+from models import StudentRequest
+from services.dashboard_stats import add_request, apply_deltas, new_deltas
+
+REQUIRED_COLUMNS = ("student_name", "student_email")
+OPTIONAL_COLUMNS = ("source_institution", "target_program")
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class ImportAborted(ImportFormatError):
+    """
+    The file stopped parsing somewhere after line `after_line`, the last row
+    read cleanly. Batches before it are already committed; `summary` says
+    what they contained.
+    """
+
+    def __init__(self, message, after_line):
+        super().__init__(message)
+        self.after_line = after_line
+        self.summary = None
+
+
+@schema_extension("1")
+def create_dedupe_index(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_student_requests_email_lower"
+        " ON student_requests (lower(student_email))"
+    ))
+
+
+def batch_size():
+    return int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+
+
+def _dedupe_key(email, target_program):
+    return email.lower(), (target_program or "")
+
+
+def _clean(value):
+    value = (value or "").strip()
+    return value or None
+
+
+def iter_batches(text_stream, size):
+    """
+    Yield lists of (line_number, row_dict) from a CSV text stream.
+    """
+    reader = csv.DictReader(text_stream)
+    last_line = 0
+    try:
+        if reader.fieldnames is None:
+            raise ImportFormatError("CSV file is empty")
+        last_line = reader.line_num
+        reader.fieldnames = [(f or "").strip().lower() for f in reader.fieldnames]
+        missing = [c for c in REQUIRED_COLUMNS if c not in reader.fieldnames]
+        if missing:
+            raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}")
+
+        batch = []
+        for row in reader:
+            last_line = reader.line_num
+            batch.append((last_line, row))
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    # reader.line_num is unreliable once parsing fails, and decoding runs
+    # ahead in chunks, so report the last line that was read cleanly
+    except csv.Error as e:
+        raise ImportAborted(f"Could not parse CSV after line {last_line}: {e}", last_line) from e
+    except UnicodeDecodeError as e:
+        raise ImportAborted(f"File is not valid UTF-8 after line {last_line}: {e}", last_line) from e
+    if batch:
+        yield batch
+
+
+def _existing_keys(emails):
+    rows = db_session.query(StudentRequest.student_email, StudentRequest.target_program).filter(
+        func.lower(StudentRequest.student_email).in_({e.lower() for e in emails})
+    )
+    return {_dedupe_key(email, program) for email, program in rows}
+
+
+def import_requests(text_stream, advisor_id, size=None):
+    """
+    Import every row of a CSV text stream for `advisor_id`.
+    Returns a summary with per-row errors (line numbers as in the file).
+    Raises ImportAborted, carrying the summary so far, if the file stops
+    parsing after some batches were committed.
+    """
+    summary = {"inserted": 0, "duplicates": 0, "invalid": 0, "errors": [], "errors_truncated": False}
+
+    def error(line, message):
+        summary["invalid"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"row": line, "error": message})
+        else:
+            summary["errors_truncated"] = True
+
+    try:
+        _import_batches(text_stream, advisor_id, size or batch_size(), summary, error)
+    except ImportAborted as e:
+        db_session.rollback()
+        e.summary = summary
+        raise
+    return summary
+
+
+def _import_batches(text_stream, advisor_id, size, summary, error):
+    for batch in iter_batches(text_stream, size):
+        valid = []
+        for line, row in batch:
+            name = _clean(row.get("student_name"))
+            email = _clean(row.get("student_email"))
+            if not name:
+                error(line, "Missing student_name")
+                continue
+            try:
+                validate_email(email or "", check_deliverability=False)
+            except EmailNotValidError as e:
+                error(line, f"Invalid student email: {e}")
+                continue
+            valid.append({
+                "student_name": name,
+                "student_email": email,
+                "source_institution": _clean(row.get("source_institution")),
+                "target_program": _clean(row.get("target_program")),
+                "advisor_id": advisor_id,
+            })
+
+        # earlier batches are already committed, so this also catches
+        # duplicates further up the same file
+        existing = _existing_keys(r["student_email"] for r in valid) if valid else set()
+        seen = set()
+        rows, deltas = [], new_deltas()
+        for r in valid:
+            key = _dedupe_key(r["student_email"], r["target_program"])
+            if key in existing or key in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(key)
+            rows.append(r)
+            add_request(deltas, advisor_id, r["target_program"])
+
+        if rows:
+            # bulk INSERT skips the flush hooks, so update the dashboard here
+            db_session.execute(insert(StudentRequest), rows)
+            apply_deltas(db_session, deltas)
+            db_session.commit()
+            summary["inserted"] += len(rows)
@@ -1,31 +1,42 @@
 from jinja2 import Template
 from pathlib import Path
-import subprocess, os, json
+import subprocess, os, json, tempfile
 
-TEX_TEMPLATE = r"""
+from models import PER_STUDENT_SECTION_TYPES
+from services.cache import LRUCache, content_key
+from services.markdown import parse_markdown, safe_href
+from services.reproducible import export_timestamp, source_date_epoch
+
+# Bump when the TeX produced for a section changes, so cached fragments are not reused.
+RENDERER_VERSION = "3"
+
+TEX_PREAMBLE = r"""
 \documentclass[11pt]{article}
 \usepackage[margin=1in]{geometry}
 \usepackage[T1]{fontenc}
 \usepackage{hyperref}
-<<<<<<< HEAD
 \usepackage{longtable}
 \usepackage{array}
-=======
->>>>>>> c6cb0c3f0f3138cb1f34bdefae62c2f75270e69d
 \usepackage{setspace}
 \setstretch{1.1}
 
 \title{UMBC Advising Packet}
 \begin{document}
 \maketitle
+"""
 
+TEX_END = r"""
+\end{document}
+"""
+
+HEADER_TEMPLATE = Template(r"""
 \section*{Student}
 {{ student_name }} (\texttt{ {{ student_email }} })\\
-<<<<<<< HEAD
 Transferring from: {{ source_institution }}\\
 Target Program: {{ target_program }}
+""")
 
-{% for sec in sections %}
+SECTION_TEMPLATE = Template(r"""
 \section*{ {{ sec.title }} }
 
 {% if sec.content_type in ["table", "audit_table"] %}
@@ -55,18 +66,92 @@ Target Program: {{ target_program }}
 {% else %}
 {{ sec.body_for_tex }}
 {% endif %}
+""")
 
-=======
-Program: {{ target_program | default("-", true) }}
+_TEX_SPECIALS = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
 
-{% for s in sections %}
-\section*{ {{ s.title }} }
-{{ s.content | replace("\n","\\\\") }}
->>>>>>> c6cb0c3f0f3138cb1f34bdefae62c2f75270e69d
-{% endfor %}
+_fragment_cache = LRUCache(maxsize=int(os.getenv("TEX_FRAGMENT_CACHE_SIZE", "512")))
 
-\end{document}
-"""
+
+def tex_escape(text) -> str:
+    return "".join(_TEX_SPECIALS.get(ch, ch) for ch in str(text))
+
+
+def _inlines_tex(inlines):
+    out = []
+    for node in inlines:
+        kind = node[0]
+        if kind == "text":
+            out.append(tex_escape(node[1]))
+        elif kind == "code":
+            out.append(r"\texttt{" + tex_escape(node[1]) + "}")
+        elif kind == "br":
+            out.append("\\\\\n")
+        elif kind == "strong":
+            out.append(r"\textbf{" + _inlines_tex(node[1]) + "}")
+        elif kind == "em":
+            out.append(r"\emph{" + _inlines_tex(node[1]) + "}")
+        elif kind == "link":
+            href = safe_href(node[2])
+            label = _inlines_tex(node[1])
+            if href is None:
+                out.append(label)
+            else:
+                url = "".join("\\" + ch if ch in "#%&{}" else ch for ch in href if ch != "\\")
+                out.append(r"\href{" + url + "}{" + label + "}")
+    return "".join(out)
+
+
+_TEX_HEADINGS = (r"\subsection*", r"\subsubsection*", r"\paragraph*", r"\subparagraph*")
+
+
+def markdown_to_tex(text) -> str:
+    """
+    Escaped TeX body for a markdown section. Markdown headings sit below the
+    section title, so "#" maps to \\subsection*.
+    """
+    out = []
+    for block in parse_markdown(text):
+        kind = block[0]
+        if kind == "heading":
+            cmd = _TEX_HEADINGS[min(block[1], len(_TEX_HEADINGS)) - 1]
+            out.append(cmd + "{" + _inlines_tex(block[2]) + "}")
+        elif kind == "paragraph":
+            out.append(_inlines_tex(block[1]))
+        elif kind == "list":
+            ordered, start, items = block[1], block[2], block[3]
+            env = "enumerate" if ordered else "itemize"
+            lines = [r"\begin{%s}" % env]
+            if ordered and start != 1:
+                lines.append(r"\setcounter{enumi}{%d}" % (start - 1))
+            lines.extend(r"\item " + _inlines_tex(item) for item in items)
+            lines.append(r"\end{%s}" % env)
+            out.append("\n".join(lines))
+        elif kind == "table":
+            header, rows = block[1], block[2]
+            width = 0.9 / max(len(header), 1)
+            spec = "|".join(r">{\raggedright\arraybackslash}p{%.3f\textwidth}" % width for _ in header)
+            lines = [r"\begin{longtable}{|%s|}" % spec, r"\hline"]
+            lines.append(" & ".join(r"\textbf{" + _inlines_tex(c) + "}" for c in header) + r" \\")
+            lines.append(r"\hline")
+            lines.append(r"\endhead")
+            for row in rows:
+                lines.append(" & ".join(_inlines_tex(c) for c in row) + r" \\")
+                lines.append(r"\hline")
+            lines.append(r"\end{longtable}")
+            out.append("\n".join(lines))
+    return "\n\n".join(out)
 
 
 def _parse_table_json(table_json_str):
@@ -83,46 +168,99 @@ def _parse_table_json(table_json_str):
         }
 
 
-def render_packet_pdf(packet, sections, export_dir="exports", latex_bin="pdflatex"):
-    export = Path(export_dir)
-    export.mkdir(parents=True, exist_ok=True)
-
-    # build data for template
-    rendered_sections = []
-    for s in sections:
-        if s.content_type in ("table", "audit_table"):
-            rendered_sections.append({
-                "title": s.title,
-                "content_type": s.content_type,
-                "table": _parse_table_json(s.content or "{}"),
-                "body_for_tex": "",
-            })
-        else:
-            rendered_sections.append({
-                "title": s.title,
-                "content_type": s.content_type,
-                "table": {"columns": [], "rows": []},
-                # escape backslashes/newlines for LaTeX
-                "body_for_tex": (s.content or "").replace("\\", "\\textbackslash{}"),
-            })
-
-    tpl = Template(TEX_TEMPLATE)
-    tex_str = tpl.render(
-        student_name=packet.request.student_name,
-        student_email=packet.request.student_email,
-        source_institution=packet.request.source_institution or "-",
-        target_program=packet.request.target_program or "-",
-        sections=rendered_sections,
-    )
-
-    tex_path = export / f"packet_{packet.id}.tex"
-    pdf_path = export / f"packet_{packet.id}.pdf"
+def render_section_tex(s) -> str:
+    """
+    Render one PacketSection to an escaped TeX fragment.
+    """
+    if s.content_type in ("table", "audit_table"):
+        table = _parse_table_json(s.content or "{}")
+        sec = {
+            "title": tex_escape(s.title),
+            "content_type": s.content_type,
+            "table": {
+                "columns": [tex_escape(c) for c in table["columns"]],
+                "rows": [[tex_escape(c) for c in row] for row in table["rows"]],
+            },
+            "body_for_tex": "",
+        }
+    elif s.content_type == "markdown":
+        sec = {
+            "title": tex_escape(s.title),
+            "content_type": s.content_type,
+            "table": {"columns": [], "rows": []},
+            "body_for_tex": markdown_to_tex(s.content),
+        }
+    else:
+        sec = {
+            "title": tex_escape(s.title),
+            "content_type": s.content_type,
+            "table": {"columns": [], "rows": []},
+            # blank lines stay paragraph breaks; single newlines become line breaks
+            "body_for_tex": "\n\n".join(
+                "\\\\\n".join(tex_escape(line) for line in para.split("\n") if line.strip())
+                for para in (s.content or "").split("\n\n")
+            ),
+        }
+    return SECTION_TEMPLATE.render(sec=sec)
+
+
+def section_fragment(s) -> str:
+    """
+    TeX for a section, served from the fragment cache for sections shared
+    across a program (plan table, info blocks, conclusion).
+    """
+    if s.section_type in PER_STUDENT_SECTION_TYPES:
+        return render_section_tex(s)
+
+    key = content_key(RENDERER_VERSION, s.title, s.content_type, s.content)
+    fragment = _fragment_cache.get(key)
+    if fragment is None:
+        fragment = _fragment_cache.put(key, render_section_tex(s))
+    return fragment
+
+
+def fragment_cache_stats():
+    return _fragment_cache.stats()
+
+
+def build_packet_tex(packet, sections):
+    """
+    Render the full .tex source for a packet (no compilation).
+    Only the header and per-student sections go through Jinja on every call.
+    """
+    parts = [
+        TEX_PREAMBLE,
+        HEADER_TEMPLATE.render(
+            student_name=tex_escape(packet.request.student_name),
+            student_email=tex_escape(packet.request.student_email),
+            source_institution=tex_escape(packet.request.source_institution or "-"),
+            target_program=tex_escape(packet.request.target_program or "-"),
+        ),
+    ]
+    parts.extend(section_fragment(s) for s in sections)
+    parts.append(TEX_END)
+    return "".join(parts)
+
+
+def _compile_tex(tex_str, workdir, stem, latex_bin, source_date=None):
+    """
+    Write <stem>.tex into workdir and run pdflatex on it.
+    source_date pins \\today, the PDF dates and the trailer ID.
+    Returns (pdf_path, error_message).
+    """
+    tex_path = workdir / f"{stem}.tex"
+    pdf_path = workdir / f"{stem}.pdf"
+    env = None
+    if source_date is not None:
+        tex_str = "\\pdftrailerid{%s}\n" % content_key(tex_str)[:32] + tex_str
+        env = dict(os.environ, SOURCE_DATE_EPOCH=source_date_epoch(source_date), FORCE_SOURCE_DATE="1")
     tex_path.write_text(tex_str, encoding="utf-8")
 
     try:
         subprocess.run(
             [latex_bin, "-interaction=nonstopmode", tex_path.name],
-            cwd=export,
+            cwd=workdir,
+            env=env,
             check=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -130,4 +268,35 @@ def render_packet_pdf(packet, sections, export_dir="exports", latex_bin="pdflate
     except Exception as e:
         return None, f"LaTeX compile failed: {e}"
 
-    return str(pdf_path), None
+    return pdf_path, None
+
+
+def pdf_engine():
+    """
+    "latex" (pdflatex subprocess, needs ENABLE_LATEX=true) or "native"
+    (in-process renderer from services.pdf_service).
+    """
+    return os.getenv("PDF_ENGINE", "latex").lower()
+
+
+def pdf_export_available():
+    return pdf_engine() == "native" or os.getenv("ENABLE_LATEX", "false").lower() == "true"
+
+
+def render_packet_pdf_bytes(packet, sections, latex_bin="pdflatex"):
+    """
+    Compile the packet in a scratch directory and return (pdf_bytes, error).
+    Nothing is left behind under EXPORT_DIR.
+    """
+    if pdf_engine() == "native":
+        from services.pdf_service import render_packet_pdf_native
+        return render_packet_pdf_native(packet, sections), None
+
+    tex_str = build_packet_tex(packet, sections)
+    with tempfile.TemporaryDirectory(prefix="packet_") as tmp:
+        pdf_path, err = _compile_tex(
+            tex_str, Path(tmp), f"packet_{packet.id}", latex_bin, export_timestamp(packet)
+        )
+        if err:
+            return None, err
+        return pdf_path.read_bytes(), None
@@ -0,0 +1,251 @@
+"""
+Markdown for content_type == "markdown" sections.
+
+Text is parsed once into a small immutable AST and cached by content hash,
+so the DOCX, TeX, native PDF and HTML renderers all walk the same tree and
+re-exporting a packet never re-parses an unchanged block. Saving a markdown
+SourceContent warms the cache; anything else is parsed on first render.
+
+Supported: ATX headings, paragraphs, bullet and numbered lists, pipe tables
+with a header separator row, **strong**, *emphasis*, `code` and
+[links](https://...). Nothing else is interpreted, so unusual syntax just
+shows up as text.
+
+Blocks:
+    ("heading", level, inlines)
+    ("paragraph", inlines)
+    ("list", ordered, start, items)     items: tuple of inlines
+    ("table", header, rows)             header: tuple of inlines per cell
+
+Inlines:
+    ("text", str)  ("code", str)  ("br",)
+    ("strong", inlines)  ("em", inlines)  ("link", inlines, href)
+"""
+import os
+import re
+
+from services.cache import LRUCache, content_key
+
+# Bump when the AST produced for the same text changes.
+MARKDOWN_PARSER_VERSION = "3"
+
+_ast_cache = LRUCache(maxsize=int(os.getenv("MARKDOWN_CACHE_SIZE", "1024")))
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+ORDERED_RE = re.compile(r"^\s*(\d{1,9})[.)]\s+(.*)$")
+TABLE_SEP_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+INLINE_RE = re.compile(
+    r"\\(?P<escaped>[\\`*_\[\]()#+\-.!|])"
+    r"|`(?P<code>[^`]+)`"
+    r"|\[(?P<label>[^\]]+)\]\(\s*(?P<href>[^)\s]+)\s*\)"
+    r"|\*\*\*(?P<strong_em>[^\s*](?:.*?[^\s\\])??)\*\*\*"
+    r"|(?<!\w)___(?P<strong_em_u>[^\s_](?:.*?[^\s\\])??)___(?!\w)"
+    r"|\*\*(?P<strong>[^\s*](?:.*?[^\s\\])??)\*\*"
+    r"|(?<!\w)__(?P<strong_u>[^\s_](?:.*?[^\s\\])??)__(?!\w)"
+    # single-delimiter emphasis never opens or closes on part of a double
+    # run, so "*a **b** c*" is emphasis around strong
+    r"|(?<!\*)\*(?P<em>[^\s*](?:.*?[^\s\\*])??)\*(?!\*)"
+    r"|(?<!\w)_(?P<em_u>[^\s_](?:.*?[^\s\\_])??)_(?!\w)"
+)
+
+SAFE_SCHEMES = ("http://", "https://", "mailto:")
+
+_INLINE_SPECIALS_RE = re.compile(r"([\\`*_\[\]|])")
+_BLOCK_START_RE = re.compile(r"^(\s*)(?:([#+\-])|(\d+)([.)]))", re.M)
+
+
+def escape_markdown(text):
+    """
+    Backslash-escape `text` so it reads as literal characters when placed
+    in a markdown body (e.g. a student name filled into an intro).
+    """
+    text = _INLINE_SPECIALS_RE.sub(r"\\\1", text)
+    return _BLOCK_START_RE.sub(
+        lambda m: f"{m.group(1)}\\{m.group(2)}" if m.group(2) else f"{m.group(1)}{m.group(3)}\\{m.group(4)}",
+        text,
+    )
+
+
+def parse_markdown(text):
+    """
+    AST for `text`, from the cache when this exact text was seen before.
+    """
+    key = content_key(MARKDOWN_PARSER_VERSION, text)
+    ast = _ast_cache.get(key)
+    if ast is None:
+        ast = _ast_cache.put(key, parse_blocks(text or ""))
+    return ast
+
+
+def markdown_cache_stats():
+    return _ast_cache.stats()
+
+
+def safe_href(href):
+    """The link target if it is safe to emit as a hyperlink, else None."""
+    return href if href.lower().startswith(SAFE_SCHEMES) else None
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    cells = re.split(r"(?<!\\)\|", line)
+    return tuple(parse_inlines(c.strip().replace("\\|", "|")) for c in cells)
+
+
+def _is_table_start(lines, i):
+    return (
+        "|" in lines[i]
+        and i + 1 < len(lines)
+        and "-" in lines[i + 1]
+        and TABLE_SEP_RE.match(lines[i + 1]) is not None
+    )
+
+
+def _list_item(line):
+    m = BULLET_RE.match(line)
+    if m:
+        return False, None, m.group(1)
+    m = ORDERED_RE.match(line)
+    if m:
+        return True, int(m.group(1)), m.group(2)
+    return None
+
+
+def _paragraph_inlines(lines):
+    # a line ending in two spaces or a backslash is a hard break,
+    # any other newline is just a space
+    parts = []
+    for n, line in enumerate(lines):
+        last = n == len(lines) - 1
+        hard = not last and (line.endswith("  ") or line.endswith("\\"))
+        stripped = line.strip().rstrip("\\").rstrip() if hard else line.strip()
+        parts.extend(parse_inlines(stripped))
+        if not last:
+            parts.append(("br",) if hard else ("text", " "))
+    return _merge_text(parts)
+
+
+def parse_blocks(text):
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    blocks = []
+    para = []
+
+    def end_paragraph():
+        if para:
+            blocks.append(("paragraph", _paragraph_inlines(para)))
+            para.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            end_paragraph()
+            i += 1
+            continue
+
+        m = HEADING_RE.match(line)
+        if m:
+            end_paragraph()
+            blocks.append(("heading", len(m.group(1)), parse_inlines(m.group(2))))
+            i += 1
+            continue
+
+        if _is_table_start(lines, i):
+            end_paragraph()
+            header = _split_row(line)
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip() and "|" in lines[i]:
+                cells = _split_row(lines[i])
+                # pad or trim so every row matches the header
+                cells = (cells + ((),) * len(header))[:len(header)]
+                rows.append(cells)
+                i += 1
+            blocks.append(("table", header, tuple(rows)))
+            continue
+
+        item = _list_item(line)
+        if item is not None:
+            end_paragraph()
+            ordered, start = item[0], item[1]
+            items = []
+            current = [item[2]]
+            i += 1
+            while i < len(lines) and lines[i].strip():
+                nxt = _list_item(lines[i])
+                if nxt is not None and nxt[0] == ordered:
+                    items.append(_paragraph_inlines(current))
+                    current = [nxt[2]]
+                elif nxt is not None or HEADING_RE.match(lines[i]):
+                    break
+                else:
+                    current.append(lines[i])  # continuation of the item
+                i += 1
+            items.append(_paragraph_inlines(current))
+            blocks.append(("list", ordered, start, tuple(items)))
+            continue
+
+        para.append(line)
+        i += 1
+
+    end_paragraph()
+    return tuple(blocks)
+
+
+def _merge_text(nodes):
+    out = []
+    for node in nodes:
+        if node[0] == "text" and out and out[-1][0] == "text":
+            out[-1] = ("text", out[-1][1] + node[1])
+        elif node[0] != "text" or node[1]:
+            out.append(node)
+    return tuple(out)
+
+
+def parse_inlines(text):
+    nodes = []
+    pos = 0
+    for m in INLINE_RE.finditer(text):
+        nodes.append(("text", text[pos:m.start()]))
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "escaped":
+            nodes.append(("text", m.group("escaped")))
+        elif kind == "code":
+            nodes.append(("code", m.group("code")))
+        elif kind == "href":
+            nodes.append(("link", parse_inlines(m.group("label")), m.group("href")))
+        elif kind in ("strong_em", "strong_em_u"):
+            nodes.append(("strong", (("em", parse_inlines(m.group(kind))),)))
+        elif kind in ("strong", "strong_u"):
+            nodes.append(("strong", parse_inlines(m.group(kind))))
+        else:
+            nodes.append(("em", parse_inlines(m.group(kind))))
+    nodes.append(("text", text[pos:]))
+    return _merge_text(nodes)
+
+
+def plain_text(inlines):
+    """
+    Inline nodes flattened to text, for outputs without rich text.
+    Links keep their target: "catalog (https://...)".
+    """
+    out = []
+    for node in inlines:
+        kind = node[0]
+        if kind in ("text", "code"):
+            out.append(node[1])
+        elif kind == "br":
+            out.append("\n")
+        elif kind == "link":
+            label = plain_text(node[1])
+            out.append(label if label == node[2] else f"{label} ({node[2]})")
+        else:
+            out.append(plain_text(node[1]))
+    return "".join(out)
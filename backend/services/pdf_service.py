@@ -0,0 +1,346 @@
+"""
+In-process PDF backend (PDF_ENGINE=native).
+
+Draws the same layout as the LaTeX template -- title, student block,
+section headings, paragraphs and longtable-style tables whose header row
+repeats on every page -- straight into PDF operators using the standard
+Helvetica fonts, so no TeX installation or subprocess is needed.
+"""
+from datetime import datetime
+import hashlib
+import json
+import zlib
+
+from services.markdown import parse_markdown, plain_text
+from services.reproducible import export_timestamp
+
+PAGE_WIDTH = 612   # US Letter, points
+PAGE_HEIGHT = 792
+MARGIN = 72        # 1in, same as the LaTeX geometry
+
+TITLE_SIZE = 18
+HEADING_SIZE = 13
+BODY_SIZE = 11
+TABLE_SIZE = 9
+LEADING = 1.35
+CELL_PAD = 4
+HEADER_FILL = (0.776, 0.937, 0.808)  # C6EFCE, as in the DOCX export
+
+# Advance widths (1/1000 em) for chars 32..126 of the standard fonts (AFM).
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+FONTS = {
+    "F1": ("Helvetica", _HELVETICA_WIDTHS),
+    "F2": ("Helvetica-Bold", _HELVETICA_BOLD_WIDTHS),
+}
+
+
+def text_width(text, font, size):
+    widths = FONTS[font][1]
+    total = 0
+    for ch in text:
+        code = ord(ch)
+        total += widths[code - 32] if 32 <= code <= 126 else 556
+    return total * size / 1000.0
+
+
+def wrap_text(text, font, size, max_width):
+    """
+    Greedy word wrap. Words longer than a line are split by character.
+    """
+    lines = []
+    for raw_line in str(text).split("\n"):
+        words = raw_line.split()
+        if not words:
+            lines.append("")
+            continue
+        line = ""
+        for word in words:
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, font, size) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            while text_width(word, font, size) > max_width and len(word) > 1:
+                cut = len(word)
+                while cut > 1 and text_width(word[:cut], font, size) > max_width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+def _pdf_string(text):
+    data = str(text).encode("cp1252", errors="replace")
+    data = data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"(" + data + b")"
+
+
+class PdfWriter:
+    """
+    Minimal PDF 1.4 writer: pages of content streams using the two
+    standard Helvetica fonts (WinAnsiEncoding), no embedded resources.
+    """
+
+    def __init__(self, title="", creation_date=None):
+        self.title = title
+        self.creation_date = creation_date or datetime.utcnow()
+        self.pages = []
+        self._ops = None
+
+    # ----- page / drawing primitives -----
+    def new_page(self):
+        self._ops = []
+        self.pages.append(self._ops)
+
+    def text(self, x, y, s, font="F1", size=BODY_SIZE):
+        self._ops.append(
+            b"BT /%s %.2f Tf %.2f %.2f Td %s Tj ET" % (font.encode(), size, x, y, _pdf_string(s))
+        )
+
+    def rect(self, x, y, w, h, fill=None):
+        if fill:
+            self._ops.append(b"%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f 0 g" % (*fill, x, y, w, h))
+        self._ops.append(b"0.5 w %.2f %.2f %.2f %.2f re S" % (x, y, w, h))
+
+    # ----- serialization -----
+    def _info_dict(self):
+        stamp = self.creation_date.strftime("D:%Y%m%d%H%M%SZ")
+        return b"<< /Title %s /Producer (PTAdvising native PDF) /CreationDate (%s) >>" % (
+            _pdf_string(self.title), stamp.encode()
+        )
+
+    def to_bytes(self):
+        objects = []   # index i -> object number i + 1
+
+        def add(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog = add(None)
+        pages = add(None)
+        font_refs = {
+            name: add(
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                % base.encode()
+            )
+            for name, (base, _) in FONTS.items()
+        }
+        fonts = b" ".join(b"/%s %d 0 R" % (n.encode(), ref) for n, ref in font_refs.items())
+
+        page_refs = []
+        for ops in self.pages:
+            stream = zlib.compress(b"\n".join(ops))
+            content = add(
+                b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+                + stream
+                + b"\nendstream"
+            )
+            page_refs.append(add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+                % (pages, PAGE_WIDTH, PAGE_HEIGHT, fonts, content)
+            ))
+
+        objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+        objects[pages - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % r for r in page_refs), len(page_refs)
+        )
+        info = add(self._info_dict())
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for num, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+
+        xref_at = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        for off in offsets:
+            out += b"%010d 00000 n \n" % off
+        # /ID derived from the document itself, so equal documents get equal IDs
+        doc_id = hashlib.md5(bytes(out)).hexdigest().encode()
+        out += (
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R /ID [<%s> <%s>] >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, catalog, info, doc_id, doc_id, xref_at)
+        )
+        return bytes(out)
+
+
+class PacketLayout:
+    """
+    Flows packet content top-to-bottom over as many pages as needed.
+    """
+
+    def __init__(self, writer):
+        self.w = writer
+        self.width = PAGE_WIDTH - 2 * MARGIN
+        self.y = None
+        self._new_page()
+
+    def _new_page(self):
+        self.w.new_page()
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def _ensure(self, height):
+        if self.y - height < MARGIN:
+            self._new_page()
+            return True
+        return False
+
+    def space(self, points):
+        self.y -= points
+
+    def paragraph(self, text, font="F1", size=BODY_SIZE, x_offset=0):
+        line_h = size * LEADING
+        for line in wrap_text(text, font, size, self.width - x_offset):
+            self._ensure(line_h)
+            self.y -= line_h
+            if line:
+                self.w.text(MARGIN + x_offset, self.y + size * 0.25, line, font, size)
+
+    def title(self, text):
+        line_h = TITLE_SIZE * LEADING
+        self._ensure(line_h)
+        self.y -= line_h
+        x = MARGIN + (self.width - text_width(text, "F2", TITLE_SIZE)) / 2
+        self.w.text(x, self.y, text, "F2", TITLE_SIZE)
+        self.space(TITLE_SIZE)
+
+    def heading(self, text):
+        # keep a heading together with at least a couple of body lines
+        self._ensure(HEADING_SIZE * LEADING + 3 * BODY_SIZE * LEADING)
+        self.space(HEADING_SIZE * 0.6)
+        self.paragraph(text, "F2", HEADING_SIZE)
+        self.space(HEADING_SIZE * 0.3)
+
+    def _column_widths(self, columns, rows):
+        natural = []
+        for j, col in enumerate(columns):
+            cells = [str(col)] + [str(r[j]) for r in rows if j < len(r)]
+            widest = max(text_width(c, "F1", TABLE_SIZE) for c in cells) + 2 * CELL_PAD
+            natural.append(min(max(widest, 40), self.width * 0.6))
+        scale = self.width / sum(natural)
+        return [w * scale for w in natural]
+
+    def _row(self, cells, widths, font, fill=None, repeat_header=None):
+        line_h = TABLE_SIZE * LEADING
+        wrapped = [
+            wrap_text(str(c), font, TABLE_SIZE, w - 2 * CELL_PAD) for c, w in zip(cells, widths)
+        ]
+        height = max(len(lines) for lines in wrapped) * line_h + 2 * CELL_PAD
+        if self._ensure(height) and repeat_header is not None:
+            repeat_header()
+        top = self.y
+        x = MARGIN
+        for lines, w in zip(wrapped, widths):
+            self.w.rect(x, top - height, w, height, fill=fill)
+            ty = top - CELL_PAD
+            for line in lines:
+                ty -= line_h
+                self.w.text(x + CELL_PAD, ty + TABLE_SIZE * 0.25, line, font, TABLE_SIZE)
+            x += w
+        self.y -= height
+
+    def table(self, columns, rows):
+        if not columns:
+            self.paragraph("[Could not parse table data]")
+            return
+        rows = [list(r) + [""] * (len(columns) - len(r)) for r in rows]
+        widths = self._column_widths(columns, rows)
+
+        def header():
+            self._row(columns, widths, "F2", fill=HEADER_FILL)
+
+        header()
+        for row in rows:
+            # longtable behaviour: a page break re-draws the header row first
+            self._row(row[:len(columns)], widths, "F1", repeat_header=header)
+        self.space(BODY_SIZE * 0.5)
+
+
+def _parse_table_json(table_json_str):
+    try:
+        d = json.loads(table_json_str)
+        return d.get("columns", []), d.get("rows", [])
+    except Exception:
+        return [], []
+
+
+def _layout_markdown(layout, text):
+    """
+    Markdown blocks with the fonts we have: headings in bold, inline
+    emphasis as plain text, links followed by their URL.
+    """
+    for block in parse_markdown(text):
+        kind = block[0]
+        if kind == "heading":
+            layout.space(BODY_SIZE * 0.3)
+            layout.paragraph(plain_text(block[2]), "F2")
+        elif kind == "paragraph":
+            layout.paragraph(plain_text(block[1]))
+        elif kind == "list":
+            ordered, start, items = block[1], block[2], block[3]
+            for n, item in enumerate(items):
+                marker = f"{start + n}." if ordered else "\u2022"
+                layout.paragraph(f"{marker} {plain_text(item)}", x_offset=BODY_SIZE)
+        elif kind == "table":
+            layout.table(
+                [plain_text(c) for c in block[1]],
+                [[plain_text(c) for c in row] for row in block[2]],
+            )
+        layout.space(BODY_SIZE * 0.4)
+
+
+def build_packet_pdf(packet, sections, creation_date=None):
+    """
+    Lay out the packet and return a PdfWriter ready to serialize.
+    """
+    req = packet.request
+    writer = PdfWriter(title="UMBC Advising Packet", creation_date=creation_date)
+    layout = PacketLayout(writer)
+
+    layout.title("UMBC Advising Packet")
+    layout.heading("Student")
+    layout.paragraph(f"{req.student_name} ({req.student_email})")
+    layout.paragraph(f"Transferring from: {req.source_institution or '-'}")
+    layout.paragraph(f"Target Program: {req.target_program or '-'}")
+
+    for s in sections:
+        layout.heading(s.title)
+        if s.content_type in ("table", "audit_table"):
+            columns, rows = _parse_table_json(s.content or "{}")
+            layout.table(columns, rows)
+        elif s.content_type == "markdown":
+            _layout_markdown(layout, s.content)
+        else:
+            for para in (s.content or "").split("\n\n"):
+                layout.paragraph(para)
+                layout.space(BODY_SIZE * 0.4)
+
+    return writer
+
+
+def render_packet_pdf_native(packet, sections):
+    """
+    Return the packet as PDF bytes, rendered entirely in-process.
+    """
+    return build_packet_pdf(packet, sections, creation_date=export_timestamp(packet)).to_bytes()
@@ -0,0 +1,157 @@
+"""
+Placeholder engine for intro scripts.
+
+An intro body like "Hi {{student_name}}, welcome to {{ target_program }}!"
+is compiled once into segments -- literal strings and placeholder names --
+and cached by (SourceContent id, updated_at), so editing the content
+naturally invalidates it. Filling is a single pass over the segments.
+
+Variables are looked up in VARIABLES; add new ones with @variable("name").
+Each receives a PlaceholderContext and is evaluated at most once per fill.
+Unknown placeholders are left as written so typos stay visible. Pass
+escape= to fill() when the body is markup (see fill_content).
+"""
+from datetime import date
+import re
+
+from services.cache import LRUCache, content_key
+from services.markdown import escape_markdown
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+VARIABLES = {}
+
+_compiled = LRUCache(maxsize=512)
+
+
+class Placeholder:
+    __slots__ = ("name", "raw")
+
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+
+    def __repr__(self):
+        return f"Placeholder({self.name!r})"
+
+
+class PlaceholderContext:
+    """
+    What variables can draw on: the student request, and optionally the
+    template the packet is generated from.
+    """
+
+    def __init__(self, student_request, template=None):
+        self.request = student_request
+        self.template = template
+        self._values = {}
+
+    def value(self, name):
+        if name not in self._values:
+            self._values[name] = VARIABLES[name](self)
+        return self._values[name]
+
+
+def variable(name):
+    def decorator(fn):
+        VARIABLES[name] = fn
+        return fn
+    return decorator
+
+
+@variable("student_name")
+def _student_name(ctx):
+    return ctx.request.student_name or ""
+
+
+@variable("student_first_name")
+def _student_first_name(ctx):
+    return (ctx.request.student_name or "").split(" ")[0]
+
+
+@variable("student_email")
+def _student_email(ctx):
+    return ctx.request.student_email or ""
+
+
+@variable("source_institution")
+def _source_institution(ctx):
+    return ctx.request.source_institution or ""
+
+
+@variable("target_program")
+def _target_program(ctx):
+    return ctx.request.target_program or ""
+
+
+@variable("program_name")
+def _program_name(ctx):
+    program = ctx.template.program if ctx.template is not None else None
+    return program.name if program is not None else _target_program(ctx)
+
+
+@variable("advisor_email")
+def _advisor_email(ctx):
+    advisor = ctx.request.advisor
+    return advisor.email if advisor is not None else ""
+
+
+@variable("today")
+def _today(ctx):
+    d = date.today()
+    return f"{d:%B} {d.day}, {d.year}"
+
+
+def compile_template(body):
+    """
+    "Hi {{student_name}}!" -> ("Hi ", Placeholder("student_name"), "!")
+    """
+    segments = []
+    pos = 0
+    for m in PLACEHOLDER_RE.finditer(body or ""):
+        if m.start() > pos:
+            segments.append(body[pos:m.start()])
+        segments.append(Placeholder(m.group(1), m.group(0)))
+        pos = m.end()
+    if pos < len(body or ""):
+        segments.append(body[pos:])
+    return tuple(segments)
+
+
+def compiled(body, cache_key=None):
+    key = cache_key or ("body", content_key(body))
+    segments = _compiled.get(key)
+    if segments is None:
+        segments = _compiled.put(key, compile_template(body))
+    return segments
+
+
+def compiled_content(sc):
+    """Segments for a SourceContent, cached until it is edited."""
+    return compiled(sc.body, ("content", sc.id, sc.updated_at))
+
+
+def fill(segments, ctx, escape=None):
+    out = []
+    for seg in segments:
+        if seg.__class__ is str:
+            out.append(seg)
+        elif seg.name in VARIABLES:
+            value = str(ctx.value(seg.name))
+            out.append(escape(value) if escape else value)
+        else:
+            out.append(seg.raw)
+    return "".join(out)
+
+
+def fill_content(sc, ctx):
+    """
+    A SourceContent body with its placeholders filled. Values going into a
+    markdown body are escaped, so a "*" or "_" in a name stays literal.
+    """
+    escape = escape_markdown if sc.content_type == "markdown" else None
+    return fill(compiled_content(sc), ctx, escape)
+
+
+def placeholder_cache_stats():
+    return _compiled.stats()
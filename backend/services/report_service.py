@@ -0,0 +1,102 @@
+"""
+Registrar report: student_requests left-joined to their packets, streamed
+as CSV or JSON Lines.
+
+Only the report columns are selected (no ORM objects), rows come off the
+cursor in yield_per batches, and output is flushed in chunks, so the header
+goes out immediately and memory stays bounded however many rows match.
+"""
+from io import StringIO
+import csv
+import json
+
+from database import db_session
+from models import Packet, StudentRequest, Template, User
+
+REPORT_COLUMNS = (
+    ("request_id", StudentRequest.id),
+    ("student_name", StudentRequest.student_name),
+    ("student_email", StudentRequest.student_email),
+    ("source_institution", StudentRequest.source_institution),
+    ("target_program", StudentRequest.target_program),
+    ("advisor_email", User.email),
+    ("request_created_at", StudentRequest.created_at),
+    ("packet_id", Packet.id),
+    ("template_name", Template.name),
+    ("packet_status", Packet.status),
+    ("packet_created_at", Packet.created_at),
+    ("packet_updated_at", Packet.updated_at),
+)
+FIELDNAMES = [name for name, _ in REPORT_COLUMNS]
+
+ROWS_PER_FETCH = 1000
+ROWS_PER_CHUNK = 500
+
+
+def report_query(advisor_id=None, target_program=None, program_id=None, status=None,
+                 date_from=None, date_to=None):
+    """
+    Rows for the report; request dates filter on [date_from, date_to).
+    """
+    q = (
+        db_session.query(*(col for _, col in REPORT_COLUMNS))
+        .join(User, StudentRequest.advisor_id == User.id)
+        .outerjoin(Packet, Packet.request_id == StudentRequest.id)
+        .outerjoin(Template, Packet.template_id == Template.id)
+    )
+    if advisor_id is not None:
+        q = q.filter(StudentRequest.advisor_id == advisor_id)
+    if target_program:
+        q = q.filter(StudentRequest.target_program == target_program)
+    if program_id:
+        q = q.filter(Template.program_id == program_id)
+    if status:
+        q = q.filter(Packet.status == status)
+    if date_from:
+        q = q.filter(StudentRequest.created_at >= date_from)
+    if date_to:
+        q = q.filter(StudentRequest.created_at < date_to)
+    return (
+        q.order_by(StudentRequest.id, Packet.id)
+        .execution_options(stream_results=True, yield_per=ROWS_PER_FETCH)
+    )
+
+
+def _value(v):
+    return v.isoformat() if hasattr(v, "isoformat") else v
+
+
+def _chunked(lines):
+    """
+    Join lines into ROWS_PER_CHUNK-sized strings for the response body. The
+    first line is sent on its own so the client sees data right away.
+    """
+    pending = []
+    for n, line in enumerate(lines):
+        pending.append(line)
+        if n == 0 or len(pending) >= ROWS_PER_CHUNK:
+            yield "".join(pending)
+            pending.clear()
+    if pending:
+        yield "".join(pending)
+
+
+def iter_csv(rows):
+    buf = StringIO()
+    writer = csv.writer(buf)
+
+    def line(values):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(values)
+        return buf.getvalue()
+
+    yield line(FIELDNAMES)  # first byte goes out before the query runs
+    yield from _chunked(line([_value(v) for v in row]) for row in rows)
+
+
+def iter_jsonl(rows):
+    yield from _chunked(
+        json.dumps(dict(zip(FIELDNAMES, (_value(v) for v in row))), separators=(",", ":")) + "\n"
+        for row in rows
+    )
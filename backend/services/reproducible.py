@@ -0,0 +1,63 @@
+"""
+Byte-reproducible exports.
+
+With DETERMINISTIC_EXPORTS=true everything time-dependent in an export is
+pinned to one timestamp, so the same packet content always yields the same
+bytes (useful for dedup, hash-based caches, ETags and backups):
+
+- SOURCE_DATE_EPOCH, if set (the reproducible-builds convention), wins;
+- otherwise the packet's last content change is used.
+
+DOCX zips are rewritten with that timestamp on every entry and a fixed entry
+order; pdflatex gets SOURCE_DATE_EPOCH/FORCE_SOURCE_DATE and a content-derived
+trailer ID; the native PDF engine gets the timestamp as its CreationDate.
+"""
+from datetime import datetime, timezone
+from io import BytesIO
+import os
+import zipfile
+
+ZIP_EPOCH = datetime(1980, 1, 1)  # earliest date a zip entry can carry
+
+
+def deterministic_exports():
+    return os.getenv("DETERMINISTIC_EXPORTS", "false").lower() == "true"
+
+
+def export_timestamp(packet):
+    """
+    Naive UTC datetime to stamp into the export, or None when exports are
+    not pinned.
+    """
+    if not deterministic_exports():
+        return None
+    epoch = os.getenv("SOURCE_DATE_EPOCH")
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), tz=timezone.utc).replace(tzinfo=None)
+
+    from services.export_service import packet_content_stamp
+    return packet_content_stamp(packet).replace(microsecond=0)
+
+
+def source_date_epoch(when):
+    return str(int(when.replace(tzinfo=timezone.utc).timestamp()))
+
+
+def normalize_zip(data: bytes, when) -> bytes:
+    """
+    Rewrite a zip with fixed entry dates/attributes. [Content_Types].xml stays
+    first (some OOXML readers expect it), the rest are sorted by name.
+    """
+    date_time = max(when, ZIP_EPOCH).timetuple()[:6]
+    src = zipfile.ZipFile(BytesIO(data))
+    names = sorted(src.namelist(), key=lambda n: (n != "[Content_Types].xml", n))
+
+    out = BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for name in names:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.create_system = 3
+            info.external_attr = 0o644 << 16
+            dst.writestr(info, src.read(name))
+    return out.getvalue()
@@ -0,0 +1,222 @@
+"""
+Student request search.
+
+On SQLite the four searchable columns are indexed in an FTS5 table with the
+trigram tokenizer (student_requests_fts, an external-content index over
+student_requests kept in sync by triggers, so ORM writes, bulk inserts and
+raw SQL are all covered). That gives two index-backed modes:
+
+- substring: every query term (3+ chars) must appear somewhere in the
+  row -- covers prefixes and partial names/emails. Newest first.
+- fuzzy: any trigram of the query may match, ranked by bm25, so a typo
+  ("jonh") still finds "john". Used when substring finds nothing, or
+  when asked for with fuzzy=true.
+
+Results are keyset-paginated with an opaque cursor. Databases without FTS5
+fall back to case-insensitive LIKE matching, which does scan.
+"""
+from functools import lru_cache
+import base64
+import json
+
+from sqlalchemy import or_, text
+from sqlalchemy.exc import OperationalError
+
+from database import db_session, engine, schema_extension
+from models import StudentRequest
+
+FTS_TABLE = "student_requests_fts"
+SEARCH_COLUMNS = ("student_name", "student_email", "source_institution", "target_program")
+MIN_TERM = 3  # trigram tokenizer cannot match anything shorter
+
+_cols = ", ".join(SEARCH_COLUMNS)
+_new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+_old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_cols}, content='student_requests', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON student_requests BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON student_requests BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.id, {_old});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_cols} ON student_requests BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.id, {_old});
+        INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new});
+    END""",
+]
+
+
+def _fts_exists(conn):
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first() is not None
+
+
+@schema_extension("1")
+def create_search_index(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    existed = _fts_exists(conn)
+    try:
+        with conn.begin_nested():
+            for ddl in FTS_DDL:
+                conn.execute(text(ddl))
+    except OperationalError:
+        return  # SQLite built without FTS5 / trigram: LIKE fallback
+    if not existed:
+        # index rows that were there before the search index
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    fts_available.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def fts_available():
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        return _fts_exists(conn)
+
+
+def encode_cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) and "id" in data else None
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def substring_query(q):
+    """
+    'jane mont' -> '"jane" "mont"' (all terms, as substrings). None if no
+    term is long enough for the trigram index.
+    """
+    terms = [t for t in q.lower().split() if len(t) >= MIN_TERM]
+    return " ".join(_quote(t) for t in terms) or None
+
+
+def fuzzy_query(q):
+    """
+    'jonh' -> '"jon" OR "onh"': any shared trigram is a candidate.
+    """
+    grams = []
+    for term in q.lower().split():
+        for i in range(len(term) - MIN_TERM + 1):
+            gram = term[i:i + MIN_TERM]
+            if gram not in grams:
+                grams.append(gram)
+    return " OR ".join(_quote(g) for g in grams) or None
+
+
+def _scope_sql(advisor_id, params):
+    if advisor_id is None:
+        return ""
+    params["advisor_id"] = advisor_id
+    return " AND r.advisor_id = :advisor_id"
+
+
+def _substring_page(match, advisor_id, limit, after_id):
+    params = {"match": match, "limit": limit + 1}
+    sql = (
+        f"SELECT f.rowid FROM {FTS_TABLE} f JOIN student_requests r ON r.id = f.rowid"
+        f" WHERE {FTS_TABLE} MATCH :match" + _scope_sql(advisor_id, params)
+    )
+    if after_id is not None:
+        sql += " AND f.rowid < :after_id"
+        params["after_id"] = after_id
+    sql += " ORDER BY f.rowid DESC LIMIT :limit"
+    ids = [row[0] for row in db_session.execute(text(sql), params)]
+
+    next_cursor = None
+    if len(ids) > limit:
+        ids = ids[:limit]
+        next_cursor = encode_cursor({"m": "substring", "id": ids[-1]})
+    return ids, next_cursor
+
+
+def _fuzzy_page(match, advisor_id, limit, after):
+    params = {"match": match, "limit": limit + 1}
+    inner = (
+        f"SELECT f.rowid AS id, bm25({FTS_TABLE}) AS score"
+        f" FROM {FTS_TABLE} f JOIN student_requests r ON r.id = f.rowid"
+        f" WHERE {FTS_TABLE} MATCH :match" + _scope_sql(advisor_id, params)
+    )
+    sql = f"SELECT id, score FROM ({inner})"
+    if after is not None:
+        sql += " WHERE (score, id) > (:after_score, :after_id)"
+        params["after_score"], params["after_id"] = after
+    sql += " ORDER BY score, id LIMIT :limit"
+    rows = db_session.execute(text(sql), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"m": "fuzzy", "id": rows[-1][0], "s": rows[-1][1]})
+    return [r[0] for r in rows], next_cursor
+
+
+def _like_page(q, advisor_id, limit, after_id, prefix_only):
+    query = db_session.query(StudentRequest.id)
+    for term in q.lower().split():
+        pattern = f"{term}%" if prefix_only else f"%{term}%"
+        query = query.filter(or_(*(
+            getattr(StudentRequest, c).ilike(pattern) for c in SEARCH_COLUMNS
+        )))
+    if advisor_id is not None:
+        query = query.filter(StudentRequest.advisor_id == advisor_id)
+    if after_id is not None:
+        query = query.filter(StudentRequest.id < after_id)
+    ids = [row[0] for row in query.order_by(StudentRequest.id.desc()).limit(limit + 1)]
+
+    next_cursor = None
+    if len(ids) > limit:
+        ids = ids[:limit]
+        next_cursor = encode_cursor({"m": "like", "id": ids[-1]})
+    return ids, next_cursor
+
+
+def search_request_ids(q, advisor_id=None, limit=20, cursor=None, fuzzy=False):
+    """
+    Returns (ids, next_cursor, mode) for one page of matches.
+    """
+    q = (q or "").strip()
+    if not q:
+        return [], None, "substring"
+    state = decode_cursor(cursor) if cursor else None
+
+    if not fts_available():
+        after = state["id"] if state else None
+        ids, nxt = _like_page(q, advisor_id, limit, after, prefix_only=False)
+        return ids, nxt, "like"
+
+    match = substring_query(q)
+    if match is None:
+        # only very short terms: prefix match on the plain columns
+        after = state["id"] if state else None
+        ids, nxt = _like_page(q, advisor_id, limit, after, prefix_only=True)
+        return ids, nxt, "prefix"
+
+    if state and state.get("m") not in ("substring", "fuzzy"):
+        state = None
+    mode = state["m"] if state else ("fuzzy" if fuzzy else "substring")
+    if mode == "substring":
+        ids, nxt = _substring_page(match, advisor_id, limit, state["id"] if state else None)
+        if ids or state:
+            return ids, nxt, "substring"
+        mode = "fuzzy"  # nothing contains the query: retry typo-tolerant
+
+    after = (state.get("s", 0.0), state["id"]) if state else None
+    ids, nxt = _fuzzy_page(fuzzy_query(q), advisor_id, limit, after)
+    return ids, nxt, "fuzzy"
@@ -0,0 +1,121 @@
+"""
+Coalesce concurrent identical work.
+
+SingleFlight dedupes within a process: the first caller for a key runs the
+function, everyone arriving while it runs waits and gets the same result
+(or the same exception). file_lock extends that across worker processes
+with an OS advisory lock (flock, or msvcrt.locking on Windows) on a lock
+file. The kernel drops the lock when its holder exits or crashes, so there
+is no staleness guesswork: a long render keeps its lock for as long as it
+runs, and a dead holder's lock is free right away. Lock files are left in
+place; removing them would let two processes lock different inodes.
+"""
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() once for all concurrent callers with the same key.
+        Returns (result, shared) where shared is True for callers that waited.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "shared": self.shared}
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path, timeout=120.0, poll=0.05):
+    """
+    Hold an exclusive lock on the file at `path`. Yields True if another
+    holder had to be waited for, False if the lock was free. Raises LockTimeout.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_CREAT | os.O_RDWR)
+    try:
+        deadline = time.monotonic() + timeout
+        waited = False
+        while not _try_lock(fd):
+            waited = True
+            if time.monotonic() >= deadline:
+                raise LockTimeout(path)
+            time.sleep(poll)
+        try:
+            yield waited
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
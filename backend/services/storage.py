@@ -0,0 +1,196 @@
+"""
+Storage backends for export artifacts.
+
+Exports are addressed by a flat logical name ("packet_12.docx"). How that
+name maps to bytes is up to the backend:
+
+- LocalFileStorage shards files into hashed subdirectories
+  (EXPORT_DIR/ab/cd/packet_12.docx) so no single directory grows huge, and
+  writes atomically (temp file in the same directory, then rename).
+  Files left in the old flat layout are moved into their shard on first use.
+- MemoryStorage keeps everything in a dict; used by tests and handy for
+  stateless single-process runs.
+
+Select with EXPORT_STORAGE=local|memory (default local).
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+import hashlib
+import os
+import threading
+
+
+class InvalidArtifactName(ValueError):
+    pass
+
+
+def check_name(name):
+    if not name or name.startswith(".") or "/" in name or "\\" in name or name != os.path.basename(name):
+        raise InvalidArtifactName(name)
+    return name
+
+
+class ExportStorage(ABC):
+    """
+    Interface shared by all backends. mtime values are naive UTC datetimes,
+    like the rest of the models.
+    """
+
+    @abstractmethod
+    def put(self, name, data: bytes):
+        ...
+
+    @abstractmethod
+    def open(self, name):
+        """Binary file object for reading; raises FileNotFoundError."""
+        ...
+
+    @abstractmethod
+    def exists(self, name) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, name) -> int:
+        ...
+
+    @abstractmethod
+    def mtime(self, name):
+        ...
+
+    @abstractmethod
+    def delete(self, name) -> bool:
+        ...
+
+    @abstractmethod
+    def iter_names(self):
+        ...
+
+    def local_path(self, name):
+        """Filesystem path if the backend has one (lets send_file stream it), else None."""
+        return None
+
+
+class LocalFileStorage(ExportStorage):
+    def __init__(self, root, depth=2):
+        self.root = Path(root).resolve()
+        self.depth = depth
+
+    def _shard_dir(self, name):
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return self.root.joinpath(*(digest[i * 2:i * 2 + 2] for i in range(self.depth)))
+
+    def _path(self, name):
+        check_name(name)
+        path = self._shard_dir(name) / name
+        if not path.exists():
+            legacy = self.root / name
+            if legacy.is_file():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(legacy, path)
+        return path
+
+    def put(self, name, data: bytes):
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.parent / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return str(path)
+
+    def open(self, name):
+        return open(self._path(name), "rb")
+
+    def exists(self, name):
+        return self._path(name).is_file()
+
+    def size(self, name):
+        return self._path(name).stat().st_size
+
+    def mtime(self, name):
+        return datetime.utcfromtimestamp(self._path(name).stat().st_mtime)
+
+    def delete(self, name):
+        try:
+            self._path(name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_names(self):
+        if not self.root.is_dir():
+            return
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]  # e.g. .locks
+            for fn in filenames:
+                if not fn.startswith("."):
+                    yield fn
+
+    def local_path(self, name):
+        path = self._path(name)
+        return str(path) if path.is_file() else None
+
+
+class MemoryStorage(ExportStorage):
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, data: bytes):
+        check_name(name)
+        with self._lock:
+            self._files[name] = (bytes(data), datetime.utcnow())
+        return name
+
+    def _get(self, name):
+        check_name(name)
+        try:
+            return self._files[name]
+        except KeyError:
+            raise FileNotFoundError(name) from None
+
+    def open(self, name):
+        return BytesIO(self._get(name)[0])
+
+    def exists(self, name):
+        return check_name(name) in self._files
+
+    def size(self, name):
+        return len(self._get(name)[0])
+
+    def mtime(self, name):
+        return self._get(name)[1]
+
+    def delete(self, name):
+        with self._lock:
+            return self._files.pop(check_name(name), None) is not None
+
+    def iter_names(self):
+        return iter(list(self._files))
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_export_storage():
+    """
+    Process-wide storage selected by EXPORT_STORAGE / EXPORT_DIR.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if os.getenv("EXPORT_STORAGE", "local").lower() == "memory":
+                _storage = MemoryStorage()
+            else:
+                _storage = LocalFileStorage(os.getenv("EXPORT_DIR", "exports"))
+        return _storage
+
+
+def set_export_storage(storage):
+    """Swap the process-wide backend (tests, scripts)."""
+    global _storage
+    with _storage_lock:
+        _storage = storage
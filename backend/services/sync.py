@@ -0,0 +1,237 @@
+"""
+Delta sync for request and packet listings.
+
+A sync cursor is an opaque token holding the (sync_seq, id) of the last row
+a client has seen, the last tombstone sync_seq and when it was issued. Rows
+come back in (sync_seq, id) order through an index, so "what changed since
+X" is one range scan, and deletes come from the tombstones table.
+
+sync_seq is handed out at commit, not at flush: writing a synced row clears
+its sync_seq, and just before the transaction commits it takes the next
+value from sync_counter (an UPDATE, so under the write lock) and stamps it
+on every row it left unstamped. Sequence order is therefore commit order,
+and a client that syncs between two commits can never skip the later one,
+which updated_at (set in Python before the lock is taken) could not promise.
+
+To make a change mean "anything the listing shows changed", flush hooks
+touch a Packet when one of its sections changes and its StudentRequest when
+the packet changes (the request listing shows the latest packet's status).
+Deleting a request or packet through the ORM writes a tombstone. Cursors
+older than SYNC_TOMBSTONE_DAYS are rejected, since tombstones that old are
+pruned.
+"""
+from datetime import datetime, timedelta
+import os
+
+from sqlalchemy import and_, event, func, insert, inspect, or_, select, text, update
+
+from database import db_session, schema_extension
+from models import Packet, PacketSection, StudentRequest, SyncCounter, Tombstone
+from services.search import decode_cursor, encode_cursor
+
+TRACKED = {StudentRequest: "student_requests", Packet: "packets"}
+
+_tombstones = Tombstone.__table__
+_counter = SyncCounter.__table__
+_SEQ_TABLES = {t.name: t for t in (StudentRequest.__table__, Packet.__table__, _tombstones)}
+_writes = {"tombstones": 0}
+
+
+class CursorExpired(Exception):
+    pass
+
+
+@schema_extension("1")
+def add_sync_seq(conn):
+    # sync_seq was added after these tables; rows from before it count as
+    # already seen by every cursor
+    for table in _SEQ_TABLES:
+        if "sync_seq" not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN sync_seq INTEGER"))
+            conn.execute(text(f"UPDATE {table} SET sync_seq = 0 WHERE sync_seq IS NULL"))
+    if conn.execute(select(_counter.c.id)).first() is None:
+        conn.execute(_counter.insert().values(id=1, value=0))
+
+
+@schema_extension("2")
+def create_sync_indexes(conn):
+    for table in TRACKED.values():
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_updated_at_id"))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_sync_seq_id ON {table} (sync_seq, id)"
+        ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_tombstones_table_id"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tombstones_table_seq ON tombstones (table_name, sync_seq)"
+    ))
+
+
+def tombstone_days():
+    return int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+
+@event.listens_for(db_session, "before_flush")
+def _propagate_updated_at(sess, flush_context, instances):
+    now = datetime.utcnow()
+    packet_ids = {
+        obj.packet_id for obj in list(sess.new) + list(sess.dirty) + list(sess.deleted)
+        if isinstance(obj, PacketSection) and obj.packet_id is not None
+    }
+    packets = [sess.get(Packet, pid) for pid in packet_ids]
+    for p in packets:
+        if p is not None and p not in sess.deleted:
+            p.updated_at = now
+
+    request_ids = {
+        obj.request_id for obj in list(sess.new) + list(sess.dirty) + list(sess.deleted)
+        if isinstance(obj, Packet) and obj.request_id is not None
+    }
+    for rid in request_ids:
+        req = sess.get(StudentRequest, rid)
+        if req is not None and req not in sess.deleted:
+            req.updated_at = now
+
+
+def _unstamped(sess):
+    return sess.info.setdefault("sync_unstamped", set())
+
+
+@event.listens_for(db_session, "before_flush")
+def _clear_sync_seq(sess, flush_context, instances):
+    # runs after _propagate_updated_at, so touched parents are included
+    for obj in list(sess.new) + list(sess.dirty):
+        if type(obj) in TRACKED and (obj in sess.new or sess.is_modified(obj)):
+            obj.sync_seq = None
+            _unstamped(sess).add(TRACKED[type(obj)])
+
+
+@event.listens_for(db_session, "do_orm_execute")
+def _record_bulk_insert(orm_execute_state):
+    # session.execute(insert(StudentRequest), rows) skips the flush; the
+    # new rows have no sync_seq yet
+    if orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name in _SEQ_TABLES:
+            _unstamped(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(db_session, "before_commit")
+def _stamp_sync_seq(sess):
+    sess.flush()
+    tables = sess.info.pop("sync_unstamped", None)
+    if not tables:
+        return
+    conn = sess.connection()
+    conn.execute(update(_counter).values(value=_counter.c.value + 1))
+    seq = conn.execute(select(_counter.c.value)).scalar_one()
+    # other transactions' unstamped rows are invisible (or, on SQLite,
+    # impossible) while we hold the write lock
+    for name in sorted(tables):
+        table = _SEQ_TABLES[name]
+        conn.execute(update(table).where(table.c.sync_seq.is_(None)).values(sync_seq=seq))
+
+
+@event.listens_for(db_session, "after_rollback")
+def _forget_unstamped(sess):
+    sess.info.pop("sync_unstamped", None)
+
+
+@event.listens_for(db_session, "after_flush")
+def _write_tombstones(sess, flush_context):
+    rows = [
+        {"table_name": TRACKED[type(obj)], "row_id": obj.id, "deleted_at": datetime.utcnow()}
+        for obj in sess.deleted if type(obj) in TRACKED
+    ]
+    if not rows:
+        return
+    conn = sess.connection()
+    conn.execute(insert(_tombstones), rows)
+    _unstamped(sess).add("tombstones")
+    _writes["tombstones"] += len(rows)
+    if _writes["tombstones"] >= 100:
+        _writes["tombstones"] = 0
+        cutoff = datetime.utcnow() - timedelta(days=tombstone_days())
+        conn.execute(_tombstones.delete().where(_tombstones.c.deleted_at < cutoff))
+
+
+def watermark(model):
+    """
+    Cursor for "everything up to now"; take it before reading a full listing.
+    """
+    last = (
+        db_session.query(model.sync_seq, model.id)
+        .filter(model.sync_seq.isnot(None))
+        .order_by(model.sync_seq.desc(), model.id.desc())
+        .first()
+    )
+    tomb = db_session.query(func.coalesce(func.max(Tombstone.sync_seq), 0)).filter(
+        Tombstone.table_name == TRACKED[model]
+    ).scalar()
+    return encode_cursor({
+        "at": datetime.utcnow().isoformat(),
+        "s": last[0] if last else 0,
+        "id": last[1] if last else 0,
+        "t": tomb,
+    })
+
+
+def changes_since(query, model, cursor, limit):
+    """
+    Rows of `query` changed after `cursor`, plus ids deleted since then.
+    Returns (rows, deleted_ids, next_cursor, has_more). Raises ValueError for
+    a malformed cursor and CursorExpired when tombstones may have been pruned
+    (or the cursor predates sync_seq).
+    """
+    state = decode_cursor(cursor)
+    if state is None:
+        raise ValueError("invalid cursor")
+    issued = datetime.fromisoformat(state["at"]) if state.get("at") else None
+    if issued is None or issued < datetime.utcnow() - timedelta(days=tombstone_days()):
+        raise CursorExpired()
+    if "s" not in state:
+        raise CursorExpired()
+    since = state["s"]
+
+    query = query.add_columns(model.sync_seq).filter(or_(
+        model.sync_seq > since,
+        and_(model.sync_seq == since, model.id > state["id"]),
+    ))
+    rows = query.order_by(model.sync_seq, model.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    tombs = (
+        db_session.query(Tombstone.sync_seq, Tombstone.row_id)
+        .filter(Tombstone.table_name == TRACKED[model], Tombstone.sync_seq > state.get("t", 0))
+        .order_by(Tombstone.sync_seq, Tombstone.id)
+        .all()
+    )
+
+    next_state = dict(state, at=datetime.utcnow().isoformat())
+    if rows:
+        next_state["s"] = rows[-1].sync_seq
+        next_state["id"] = rows[-1].id
+    if tombs:
+        next_state["t"] = tombs[-1][0]
+    return rows, [row_id for _, row_id in tombs], encode_cursor(next_state), has_more
+
+
+def sync_response(query, model, since, serializer, limit=500):
+    """
+    Delta-sync body for ?since=<cursor>: changed rows oldest first, ids
+    deleted since the cursor, and the cursor to send next time. When
+    has_more is true the client should call again right away.
+    """
+    limit = max(1, min(limit, 1000))
+    try:
+        rows, deleted, cursor, has_more = changes_since(query, model, since, limit)
+    except CursorExpired:
+        return {"error": "Cursor expired, reload the full list"}, 410
+    except (ValueError, KeyError, TypeError):
+        return {"error": "Invalid since cursor"}, 400
+    return {
+        "items": serializer.many(rows),
+        "deleted": deleted,
+        "cursor": cursor,
+        "has_more": has_more,
+    }
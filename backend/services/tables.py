@@ -0,0 +1,50 @@
+from collections import OrderedDict, defaultdict
+
+
+class TermTable:
+    """
+    A plan/audit table grouped the way the exports show it: one sub-table
+    per term, with benchmark rows pulled out as notes under their term.
+    """
+
+    def __init__(self, visible_cols, grouped, benchmarks, credits_idx):
+        self.visible_cols = visible_cols
+        self.grouped = grouped          # term -> list of row_values (without term)
+        self.benchmarks = benchmarks    # term -> list of benchmark strings
+        self.credits_idx = credits_idx
+
+
+def group_term_rows(columns, rows):
+    # We will use all columns *except* the first ("Term") as table columns
+    # and show the term as a heading above each table.
+    visible_cols = columns[1:] if len(columns) > 1 else columns
+
+    # Group rows by term, and track benchmark rows to show as notes
+    grouped = OrderedDict()
+    benchmarks = defaultdict(list)
+    last_term = None
+
+    for row in rows:
+        if not row:
+            continue
+        term = str(row[0])
+
+        # Detect benchmark rows by name
+        if "benchmark" in term.lower():
+            # Attach this benchmark text to the last non-benchmark term we saw
+            note = row[3] if len(row) > 3 else ""
+            if last_term is not None and note:
+                benchmarks[last_term].append(note)
+            continue
+
+        # Normal term row: store without the term column
+        last_term = term
+        grouped.setdefault(term, []).append(row[1:])
+
+    # Figure out which index is "Credits" so we can center it
+    try:
+        credits_idx = visible_cols.index("Credits")
+    except ValueError:
+        credits_idx = None
+
+    return TermTable(visible_cols, grouped, benchmarks, credits_idx)
@@ -0,0 +1,74 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+# Point the app at a throwaway database/export dir before anything imports it.
+_TMP = tempfile.mkdtemp(prefix="ptadvising_tests_")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(_TMP, "test.db"))
+os.environ.setdefault("EXPORT_DIR", os.path.join(_TMP, "exports"))
+os.environ.setdefault("EXPORT_STORAGE", "memory")
+# No DNS lookups from the test suite.
+os.environ.setdefault("EMAIL_CHECK_DELIVERABILITY", "false")
+
+
+@pytest.fixture
+def client():
+    from app import app
+    from database import db_session
+    from models import User
+    from utils import hash_password
+
+    user = db_session.query(User).filter_by(email="advisor@test.edu").first()
+    if not user:
+        user = User(email="advisor@test.edu", password_hash=hash_password("pw"), role="advisor")
+        db_session.add(user)
+        db_session.commit()
+    uid, role = user.id, user.role
+
+    c = app.test_client()
+    with c.session_transaction() as sess:
+        sess["uid"] = uid
+        sess["role"] = role
+    yield c
+    db_session.remove()
+
+
+@pytest.fixture
+def packet(client):
+    from database import db_session
+    from models import User, SourceProgram, Template, StudentRequest, Packet, PacketSection
+
+    advisor = db_session.query(User).filter_by(email="advisor@test.edu").first()
+    program = db_session.query(SourceProgram).filter_by(name="Test Program").first()
+    if not program:
+        program = SourceProgram(name="Test Program")
+        db_session.add(program)
+        db_session.flush()
+    tmpl = Template(name="Test Template", program_id=program.id)
+    sr = StudentRequest(
+        student_name="Jane Doe",
+        student_email="jane@example.com",
+        source_institution="Montgomery College",
+        target_program="Test Program",
+        advisor_id=advisor.id,
+    )
+    db_session.add_all([tmpl, sr])
+    db_session.flush()
+
+    p = Packet(request_id=sr.id, template_id=tmpl.id, status="draft")
+    p.sections = [
+        PacketSection(title="Intro", display_order=1, section_type="intro",
+                      content_type="text", content="Welcome Jane."),
+        PacketSection(title="Plan", display_order=2, section_type="plan_table",
+                      content_type="table",
+                      content='{"columns": ["Term", "Course", "Credits", "Notes"],'
+                              ' "rows": [["Year 1 - Fall", "CMSC 201", "4", ""]]}'),
+    ]
+    db_session.add(p)
+    db_session.commit()
+    # plain ids: ORM instances would expire on the next commit inside a request
+    ids = SimpleNamespace(id=p.id, request_id=p.request_id)
+    db_session.remove()
+    return ids
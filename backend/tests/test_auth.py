@@ -0,0 +1,29 @@
+from utils import hash_password, needs_rehash, verify_password
+
+
+def test_needs_rehash_tracks_configured_method(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    hashed = hash_password("pw")
+    assert verify_password("pw", hashed)
+    assert not needs_rehash(hashed)
+
+    monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:2000")
+    assert needs_rehash(hashed)
+
+
+def test_login_upgrades_outdated_hash(client, monkeypatch):
+    from database import db_session
+    from models import User
+
+    monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    user = User(email="rehash@test.edu", password_hash=hash_password("pw"), role="advisor")
+    db_session.add(user)
+    db_session.commit()
+
+    monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:2000")
+    r = client.post("/api/auth/login", json={"email": "rehash@test.edu", "password": "pw"})
+    assert r.status_code == 200
+
+    stored = db_session.query(User).filter_by(email="rehash@test.edu").one().password_hash
+    assert stored.startswith("pbkdf2:sha256:2000$")
+    assert verify_password("pw", stored)
@@ -0,0 +1,63 @@
+import gzip
+import io
+
+from flask import Flask, send_file
+
+from compression import init_compression
+
+
+def make_app():
+    app = Flask(__name__)
+    init_compression(app)
+
+    @app.get("/big")
+    def big():
+        return {"items": ["x" * 50] * 100}
+
+    @app.get("/tagged")
+    def tagged():
+        r = app.make_response({"items": ["y" * 50] * 100})
+        r.set_etag("v1")
+        return r
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/file")
+    def file():
+        return send_file(io.BytesIO(b"PK" + b"z" * 5000), mimetype="application/zip")
+
+    return app
+
+
+def test_large_json_is_gzipped():
+    c = make_app().test_client()
+    r = c.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert gzip.decompress(r.data).startswith(b'{"items"')
+
+
+def test_small_or_unrequested_bodies_pass_through():
+    c = make_app().test_client()
+    assert "Content-Encoding" not in c.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in c.get("/big").headers
+
+
+def test_downloads_are_not_recompressed():
+    c = make_app().test_client()
+    r = c.get("/file", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in r.headers
+    assert r.data.startswith(b"PK")
+
+
+def test_etag_bodies_are_compressed_once():
+    from compression import compression_stats
+
+    c = make_app().test_client()
+    c.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    hits = compression_stats()["hits"]
+    r = c.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    assert compression_stats()["hits"] == hits + 1
+    assert r.headers["ETag"] == 'W/"v1"'
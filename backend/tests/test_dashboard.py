@@ -0,0 +1,45 @@
+def test_dashboard_counts_follow_request_and_packet_changes(client, packet):
+    before = client.get("/api/dashboard").get_json()
+
+    r = client.post("/api/requests", json={
+        "student_name": "Sam Lee",
+        "student_email": "sam@example.com",
+        "target_program": "Test Program",
+    })
+    assert r.status_code == 201
+    client.post("/api/packets/finalize", json={"packet_id": packet.id})
+
+    after = client.get("/api/dashboard").get_json()
+    assert after["requests_by_program"]["Test Program"] == before["requests_by_program"]["Test Program"] + 1
+    assert after["packets_by_status"]["finalized"] == before["packets_by_status"]["finalized"] + 1
+    assert after["packets_by_status"]["draft"] == before["packets_by_status"]["draft"] - 1
+    assert after["turnaround"]["finalized"] == before["turnaround"]["finalized"] + 1
+
+
+def test_reconcile_finds_no_drift_in_incremental_counts(client, packet):
+    from database import db_session
+    from services.dashboard_stats import reconcile, summary
+
+    client.post("/api/packets/finalize", json={"packet_id": packet.id})
+    incremental = summary()
+    assert reconcile()["drifted"] == 0
+    assert summary() == incremental
+    db_session.remove()
+
+
+def test_turnaround_cancels_when_a_packet_is_unfinalized(client, packet):
+    from database import db_session
+    from models import Packet
+    from services.dashboard_stats import reconcile, summary
+
+    before = summary()["turnaround"]
+    client.post("/api/packets/finalize", json={"packet_id": packet.id})
+    p = db_session.get(Packet, packet.id)
+    assert p.finalized_at is not None
+
+    p.status = "draft"
+    db_session.commit()
+    assert p.finalized_at is None
+    assert summary()["turnaround"] == before
+    assert reconcile()["drifted"] == 0
+    db_session.remove()
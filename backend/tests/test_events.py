@@ -0,0 +1,42 @@
+def test_finalize_publishes_event_after_commit(client, packet):
+    from services.events import get_broadcaster
+
+    broadcaster = get_broadcaster()
+    start = broadcaster.latest_id()
+    client.post("/api/packets/finalize", json={"packet_id": packet.id})
+
+    events = broadcaster.next_events(start, advisor_id=None, timeout=1)
+    assert [e["type"] for e in events] == ["packet.finalized"]
+    assert events[0]["packet_id"] == packet.id
+    assert events[0]["status"] == "finalized"
+
+
+def test_rolled_back_changes_publish_nothing(client, packet):
+    from database import db_session
+    from models import Packet
+    from services.events import get_broadcaster, queue_event
+
+    start = get_broadcaster().latest_id()
+    p = db_session.get(Packet, packet.id)
+    queue_event("packet.finalized", p)
+    db_session.rollback()
+    db_session.commit()
+    assert get_broadcaster().next_events(start, None, timeout=0) == []
+    db_session.remove()
+
+
+def test_event_stream_resumes_from_last_event_id(client, packet):
+    from services.events import get_broadcaster
+
+    start = get_broadcaster().latest_id()
+    client.patch(f"/api/packets/{packet.id}/sections/999999", json={"content": "x"})  # 404, no event
+    client.post("/api/packets/export", json={"packet_id": packet.id, "download": True})
+
+    r = client.get("/api/packets/events", headers={"Last-Event-ID": str(start)}, buffered=False)
+    assert r.mimetype == "text/event-stream"
+    chunks = iter(r.response)
+    body = ""
+    while "event: packet.exported" not in body:
+        body += next(chunks).decode()
+    r.close()
+    assert f'"packet_id":{packet.id}' in body
@@ -0,0 +1,136 @@
+import pytest
+
+from services.storage import get_export_storage
+
+
+def test_export_direct_download_streams_docx(client, packet):
+    r = client.post("/api/packets/export", json={"packet_id": packet.id, "download": True})
+    assert r.status_code == 200
+    assert r.headers["Content-Disposition"].startswith("attachment")
+    assert f"packet_{packet.id}.docx" in r.headers["Content-Disposition"]
+    assert int(r.headers["Content-Length"]) == len(r.data)
+    assert r.data[:2] == b"PK"
+    # streamed only: nothing lands in export storage
+    assert not get_export_storage().exists(f"packet_{packet.id}.docx")
+
+
+def test_export_path_mode_stores_file_for_download(client, packet):
+    r = client.post("/api/packets/export", json={"packet_id": packet.id})
+    assert r.status_code == 200
+    path = r.get_json()["path"]
+    assert path == f"exports/packet_{packet.id}.docx"
+
+    download = client.get(f"/api/packets/{path}")
+    assert download.status_code == 200
+    assert download.data[:2] == b"PK"
+
+
+def test_archive_streams_zip_of_matching_packets(client, packet):
+    import io
+    import zipfile
+
+    r = client.get("/api/packets/archive?status=draft&target_program=Test%20Program")
+    assert r.status_code == 200
+    assert r.is_streamed
+    zf = zipfile.ZipFile(io.BytesIO(r.data))
+    assert f"packet_{packet.id}.docx" in zf.namelist()
+    assert zf.read(f"packet_{packet.id}.docx")[:2] == b"PK"
+
+
+def test_preview_serves_unchanged_sections_from_cache(client, packet):
+    from services.html_service import preview_cache_stats
+
+    r = client.get(f"/api/packets/{packet.id}/preview")
+    assert r.status_code == 200
+    assert r.mimetype == "text/html"
+    assert "Year 1 - Fall" in r.get_data(as_text=True)
+
+    hits = preview_cache_stats()["hits"]
+    client.get(f"/api/packets/{packet.id}/preview")
+    assert preview_cache_stats()["hits"] == hits + 2
+
+
+def test_export_store_evicts_drafts_over_budget(client, packet, monkeypatch):
+    from services import export_store
+
+    r = client.post("/api/packets/export", json={"packet_id": packet.id})
+    assert r.status_code == 200
+    name = f"packet_{packet.id}.docx"
+    assert get_export_storage().exists(name)
+
+    monkeypatch.setenv("EXPORT_MAX_BYTES", "1")
+    result = export_store.sweep()
+    assert result["evicted"] >= 1
+    assert not get_export_storage().exists(name)
+
+
+@pytest.mark.parametrize("once", ["store_export_once", "render_export_once"])
+def test_concurrent_identical_exports_render_once(packet, once):
+    import threading
+    import time
+    from types import SimpleNamespace
+    from datetime import datetime
+
+    from database import db_session
+    from services import export_service
+
+    calls = []
+
+    def render():
+        calls.append(1)
+        time.sleep(0.2)
+        return b"PK-rendered", None
+
+    fake = SimpleNamespace(id=packet.id, updated_at=datetime(2026, 1, 1), created_at=None, sections=[])
+    results = []
+
+    def worker():
+        try:
+            results.append(getattr(export_service, once)(fake, "docx", render))
+        finally:
+            db_session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [(f"packet_{packet.id}.docx", b"PK-rendered", None)] * 5
+
+
+def test_export_lock_is_held_across_processes(tmp_path):
+    import subprocess
+    import sys
+
+    from services.single_flight import LockTimeout, file_lock
+
+    path = str(tmp_path / "packet_1.docx.lock")
+    with file_lock(path) as waited:
+        assert waited is False
+        with pytest.raises(LockTimeout):
+            with file_lock(path, timeout=0.1):
+                pass
+
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time\n"
+         "from services.single_flight import file_lock\n"
+         f"with file_lock({path!r}):\n"
+         "    print('locked', flush=True)\n"
+         "    time.sleep(60)\n"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        with pytest.raises(LockTimeout):
+            with file_lock(path, timeout=0.2):
+                pass
+    finally:
+        holder.kill()
+        holder.wait()
+
+    # a holder that died releases the lock, however recently it took it
+    with file_lock(path, timeout=1) as waited:
+        assert waited is False
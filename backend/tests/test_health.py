@@ -5,3 +5,9 @@ def test_health():
     r = client.get("/api/health")
     assert r.status_code == 200
     assert r.get_json().get("ok") is True
+
+def test_init_db_fast_start_skips_when_schema_matches():
+    from database import init_db, stored_schema_version, schema_fingerprint
+    init_db()
+    assert stored_schema_version() == schema_fingerprint()
+    assert init_db(fast=True) is False
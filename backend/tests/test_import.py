@@ -0,0 +1,67 @@
+import io
+
+CSV = (
+    "Student_Name,Student_Email,Source_Institution,Target_Program\n"
+    "Ada Importer,ada.import@example.com,Howard CC,Import Program\n"
+    "Bad Email,not-an-email,,Import Program\n"
+    ",noname@example.com,,Import Program\n"
+    "Ada Importer,ADA.IMPORT@example.com,Howard CC,Import Program\n"
+    "Bo Importer,bo.import@example.com,,Import Program\n"
+)
+
+
+def test_csv_import_reports_row_errors_and_is_idempotent(client):
+    r = client.post("/api/requests/import", data=CSV, content_type="text/csv")
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["inserted"] == 2
+    assert body["duplicates"] == 1
+    assert [e["row"] for e in body["errors"]] == [3, 4]
+
+    again = client.post(
+        "/api/requests/import",
+        data={"file": (io.BytesIO(CSV.encode()), "students.csv")},
+        content_type="multipart/form-data",
+    ).get_json()
+    assert again["inserted"] == 0
+    assert again["duplicates"] == 3
+
+    stats = client.get("/api/dashboard").get_json()
+    assert stats["requests_by_program"]["Import Program"] == 2
+
+
+def test_csv_import_small_batches_dedupe_across_batches(client):
+    from services.import_service import import_requests
+    from database import db_session
+    from models import User
+
+    advisor = db_session.query(User).filter_by(email="advisor@test.edu").first()
+    csv_text = "student_name,student_email\n" + "".join(
+        f"Batch {i % 3},batch{i % 3}@example.com\n" for i in range(7)
+    )
+    summary = import_requests(io.StringIO(csv_text), advisor_id=advisor.id, size=2)
+    assert summary["inserted"] == 3
+    assert summary["duplicates"] == 4
+    db_session.remove()
+
+
+def test_csv_import_rejects_missing_columns(client):
+    r = client.post("/api/requests/import", data="name,email\nx,y\n", content_type="text/csv")
+    assert r.status_code == 400
+    assert "student_name" in r.get_json()["error"]
+
+
+def test_csv_import_parse_error_reports_committed_batches(client, monkeypatch):
+    monkeypatch.setenv("IMPORT_BATCH_SIZE", "2")
+    csv_text = (
+        "student_name,student_email,target_program\n"
+        "Partial One,partial1@example.com,Partial Program\n"
+        "Partial Two,partial2@example.com,Partial Program\n"
+        "Huge," + "x" * 200_000 + "@example.com,Partial Program\n"  # over csv.field_size_limit
+    )
+    r = client.post("/api/requests/import", data=csv_text, content_type="text/csv")
+    assert r.status_code == 400
+    body = r.get_json()
+    assert body["inserted"] == 2
+    assert body["error_after_line"] == 3
+    assert "after line 3" in body["error"]
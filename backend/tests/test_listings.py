@@ -0,0 +1,82 @@
+def test_list_requests_reports_latest_packet_status(client, packet):
+    r = client.get("/api/requests")
+    assert r.status_code == 200
+    item = next(i for i in r.get_json()["items"] if i["id"] == packet.request_id)
+    assert item["latest_packet_status"] == "draft"
+    assert item["latest_packet_updated_at"] is not None
+
+
+def test_list_templates_includes_ordered_sections(client):
+    from database import db_session
+    from models import SourceProgram, Template, TemplateSection
+
+    program = SourceProgram(name="Listing Program")
+    db_session.add(program)
+    db_session.flush()
+    t = Template(name="Listing Template", program_id=program.id)
+    t.sections = [
+        TemplateSection(title="Second", section_type="conclusion", display_order=2),
+        TemplateSection(title="First", section_type="intro", display_order=1),
+    ]
+    db_session.add(t)
+    db_session.commit()
+    tid = t.id
+
+    items = client.get("/api/templates").get_json()["items"]
+    item = next(i for i in items if i["id"] == tid)
+    assert item["program_name"] == "Listing Program"
+    assert [s["title"] for s in item["sections"]] == ["First", "Second"]
+
+
+def test_cached_listing_is_invalidated_by_commit(client):
+    from database import db_session
+    from models import SourceProgram
+
+    first = client.get("/api/templates/programs")
+    etag = first.headers["ETag"]
+    assert client.get("/api/templates/programs", headers={"If-None-Match": etag}).status_code == 304
+
+    db_session.add(SourceProgram(name="Cache Bust Program"))
+    db_session.commit()
+
+    r = client.get("/api/templates/programs", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert "Cache Bust Program" in r.get_data(as_text=True)
+
+
+def test_requests_report_streams_csv_and_jsonl(client, packet):
+    import csv
+    import io
+    import json
+
+    r = client.get("/api/requests/report?target_program=Test%20Program")
+    assert r.status_code == 200
+    assert r.is_streamed
+    rows = list(csv.DictReader(io.StringIO(r.get_data(as_text=True))))
+    row = next(x for x in rows if x["packet_id"] == str(packet.id))
+    assert row["request_id"] == str(packet.request_id)
+    assert row["packet_status"] == "draft"
+    assert row["template_name"] == "Test Template"
+
+    r = client.get("/api/requests/report?format=jsonl&status=draft")
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert any(x["packet_id"] == packet.id for x in lines)
+    assert all(x["packet_status"] == "draft" for x in lines)
+
+    assert client.get("/api/requests/report?from=yesterday").status_code == 400
+
+
+def test_cached_listing_sees_commits_from_other_processes(client):
+    from sqlalchemy import text
+    from database import engine
+
+    etag = client.get("/api/templates/programs").headers["ETag"]
+
+    # another worker's write: raw SQL on its own connection, no session hooks here
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO source_programs (name) VALUES ('Other Worker Program')"))
+        conn.execute(text("UPDATE table_versions SET version = version + 1 WHERE name = 'source_programs'"))
+
+    r = client.get("/api/templates/programs", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert "Other Worker Program" in r.get_data(as_text=True)
@@ -0,0 +1,61 @@
+def test_compile_and_fill_leaves_unknown_placeholders():
+    from types import SimpleNamespace
+    from services.placeholders import PlaceholderContext, compile_template, fill
+
+    req = SimpleNamespace(student_name="Jane Doe", student_email="jane@example.com",
+                          source_institution=None, target_program="CS", advisor=None)
+    segments = compile_template("Hi {{ student_first_name }} ({{student_email}}), {{nope}} {{target_program}}")
+    assert fill(segments, PlaceholderContext(req)) == "Hi Jane (jane@example.com), {{nope}} CS"
+
+
+def test_generate_fills_intro_and_reuses_compiled_body(client):
+    from database import db_session
+    from models import SourceContent, SourceProgram, StudentRequest, Template, TemplateSection, User
+    from services.placeholders import placeholder_cache_stats
+
+    advisor = db_session.query(User).filter_by(email="advisor@test.edu").first()
+    program = SourceProgram(name="Placeholder Program")
+    intro = SourceContent(title="Intro", body="Welcome {{student_name}} to {{program_name}}!")
+    db_session.add_all([program, intro])
+    db_session.flush()
+    tmpl = Template(name="Intro Template", program_id=program.id)
+    tmpl.sections = [TemplateSection(title="Intro", section_type="intro", display_order=1,
+                                     source_content_id=intro.id)]
+    reqs = [
+        StudentRequest(student_name=name, student_email="x@example.com", advisor_id=advisor.id)
+        for name in ("Ann Lee", "Bo Kim")
+    ]
+    db_session.add_all([tmpl, *reqs])
+    db_session.commit()
+    tid, rids = tmpl.id, [r.id for r in reqs]
+    db_session.remove()
+
+    hits = placeholder_cache_stats()["hits"]
+    intros = []
+    for rid in rids:
+        r = client.post("/api/packets/generate", json={"request_id": rid, "template_id": tid})
+        assert r.status_code == 201
+        pid = r.get_json()["id"]
+        preview = client.get(f"/api/packets/{pid}/preview").get_data(as_text=True)
+        intros.append(preview)
+
+    assert "Welcome Ann Lee to Placeholder Program!" in intros[0]
+    assert "Welcome Bo Kim to Placeholder Program!" in intros[1]
+    assert placeholder_cache_stats()["hits"] == hits + 1
+
+
+def test_values_are_escaped_in_markdown_bodies():
+    from types import SimpleNamespace
+    from services.markdown import parse_markdown, plain_text
+    from services.placeholders import PlaceholderContext, fill_content
+
+    req = SimpleNamespace(student_name="*Star* O_Neil_", student_email="", source_institution=None,
+                          target_program="", advisor=None)
+    ctx = PlaceholderContext(req)
+    md = SimpleNamespace(id=-1, updated_at=None, content_type="markdown", body="Hi **{{student_name}}**")
+    text = SimpleNamespace(id=-2, updated_at=None, content_type="text", body="Hi {{student_name}}")
+
+    (block,) = parse_markdown(fill_content(md, ctx))
+    assert block == ("paragraph", (("text", "Hi "), ("strong", (("text", "*Star* O_Neil_"),))))
+    assert fill_content(text, ctx) == "Hi *Star* O_Neil_"
+    assert plain_text(block[1]) == "Hi *Star* O_Neil_"
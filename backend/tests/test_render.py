@@ -0,0 +1,182 @@
+from types import SimpleNamespace
+
+
+def make_packet(name="Jane Doe"):
+    req = SimpleNamespace(
+        student_name=name,
+        student_email="jane@example.com",
+        source_institution="Montgomery College",
+        target_program="Computer Science BS",
+    )
+    return SimpleNamespace(id=1, request=req)
+
+
+def make_section(section_type, content, content_type="text", title="Section"):
+    return SimpleNamespace(
+        title=title, section_type=section_type, content_type=content_type, content=content
+    )
+
+
+PLAN = (
+    '{"columns": ["Term", "Course", "Credits", "Notes"],'
+    ' "rows": [["Year 1 - Fall", "CMSC 201", "4", ""],'
+    ' ["Year 1 - Benchmarks", "", "", "Grade of B & up"]]}'
+)
+
+
+def test_tex_shared_sections_come_from_fragment_cache():
+    from services.latex_service import build_packet_tex, fragment_cache_stats
+
+    sections = [
+        make_section("intro", "Welcome, A."),
+        make_section("plan_table", PLAN, content_type="table", title="Plan"),
+        make_section("advisor_notes", "50% done"),
+    ]
+    build_packet_tex(make_packet("A"), sections)
+    before = fragment_cache_stats()
+    tex = build_packet_tex(make_packet("B"), sections)
+
+    # only the plan table is shared; the filled intro never enters the cache
+    after = fragment_cache_stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert r"Grade of B \& up" in tex
+    assert r"50\% done" in tex
+
+
+def test_docx_shared_sections_match_fresh_render():
+    from docx import Document
+    from lxml import etree
+    from services.docx_service import build_packet_docx, fragment_cache_stats, render_section
+
+    plan = make_section("plan_table", PLAN, content_type="table", title="Plan")
+    build_packet_docx(make_packet("A"), [plan])
+    before = fragment_cache_stats()["hits"]
+    cached = build_packet_docx(make_packet("A"), [plan])
+    assert fragment_cache_stats()["hits"] == before + 1
+
+    fresh = Document()
+    fresh.add_heading("UMBC Advising Packet", level=1)
+    for text in ("Student: A <jane@example.com>", "Source Institution: Montgomery College",
+                 "Target Program: Computer Science BS", ""):
+        fresh.add_paragraph(text)
+    render_section(fresh, plan)
+    assert etree.tostring(cached.element.body) == etree.tostring(fresh.element.body)
+
+
+def test_native_pdf_repeats_table_header_on_each_page():
+    import json
+    from services.pdf_service import build_packet_pdf
+
+    rows = [["Year 1 - Fall", f"Course {i}", "3", ""] for i in range(150)]
+    plan = json.dumps({"columns": ["Term", "Course", "Credits", "Notes"], "rows": rows})
+    writer = build_packet_pdf(make_packet(), [make_section("plan_table", plan, "table", "Plan")])
+
+    assert len(writer.pages) > 2
+    for ops in writer.pages[1:]:
+        assert b"(Credits) Tj" in b"\n".join(ops)
+    pdf = writer.to_bytes()
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+
+
+def test_deterministic_exports_are_byte_identical(monkeypatch):
+    import io
+    import zipfile
+    from services.docx_service import render_packet_docx_bytes
+    from services.pdf_service import render_packet_pdf_native
+
+    monkeypatch.setenv("DETERMINISTIC_EXPORTS", "true")
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1767225600")  # 2026-01-01T00:00:00Z
+    sections = [
+        make_section("plan_table", PLAN, content_type="table", title="Plan"),
+        make_section("advisor_notes", "Notes"),
+    ]
+
+    docx = render_packet_docx_bytes(make_packet(), sections)
+    assert docx == render_packet_docx_bytes(make_packet(), sections)
+    zf = zipfile.ZipFile(io.BytesIO(docx))
+    assert zf.namelist()[0] == "[Content_Types].xml"
+    assert {i.date_time for i in zf.infolist()} == {(2026, 1, 1, 0, 0, 0)}
+    assert b"2026-01-01T00:00:00Z" in zf.read("docProps/core.xml")
+
+    pdf = render_packet_pdf_native(make_packet(), sections)
+    assert pdf == render_packet_pdf_native(make_packet(), sections)
+    assert b"/CreationDate (D:20260101000000Z)" in pdf
+    assert b"/ID [<" in pdf
+
+
+MARKDOWN = """# Getting *started*
+Read the **catalog** at [UMBC](https://catalog.umbc.edu).
+
+- Meet your advisor
+- Register for `CMSC 201`
+
+| Course | Credits |
+|---|---|
+| CMSC 202 | 4 |
+"""
+
+
+def test_markdown_sections_render_from_one_cached_parse():
+    from docx import Document
+    from io import BytesIO
+    from services.docx_service import render_packet_docx_bytes
+    from services.html_service import render_section_html
+    from services.latex_service import render_section_tex
+    from services.markdown import markdown_cache_stats, parse_markdown
+    from services.pdf_service import render_packet_pdf_native
+
+    parse_markdown(MARKDOWN)
+    misses = markdown_cache_stats()["misses"]
+    s = make_section("info", MARKDOWN, content_type="markdown", title="Welcome")
+    s.id = 1
+
+    html = render_section_html(s)
+    assert "<h3>Getting <em>started</em></h3>" in html
+    assert '<a href="https://catalog.umbc.edu">UMBC</a>' in html
+    assert "<li>Register for <code>CMSC 201</code></li>" in html
+    assert "<th>Course</th>" in html and "<td>CMSC 202</td>" in html
+
+    tex = render_section_tex(s)
+    assert r"\subsection*{Getting \emph{started}}" in tex
+    assert r"\textbf{catalog}" in tex
+    assert r"\href{https://catalog.umbc.edu}{UMBC}" in tex
+    assert r"\item Register for \texttt{CMSC 201}" in tex
+
+    doc = Document(BytesIO(render_packet_docx_bytes(make_packet(), [s])))
+    styles = [p.style.name for p in doc.paragraphs]
+    assert "Heading 3" in styles and styles.count("List Bullet") == 2
+    assert doc.tables[0].cell(1, 0).text == "CMSC 202"
+    assert any(r.bold for p in doc.paragraphs for r in p.runs if r.text == "catalog")
+
+    assert render_packet_pdf_native(make_packet(), [s]).startswith(b"%PDF")
+    assert markdown_cache_stats()["misses"] == misses
+
+
+def test_markdown_links_only_allow_web_and_mail_schemes():
+    from services.html_service import render_section_html
+
+    s = make_section("info", "[click](javascript:alert(1))", content_type="markdown")
+    s.id = 2
+    html = render_section_html(s)
+    assert "<a " not in html and "click" in html
+
+
+def test_markdown_combined_strong_emphasis():
+    from services.markdown import parse_blocks
+
+    strong_em = ("strong", (("em", (("text", "bold em"),)),))
+    assert parse_blocks("***bold em*** and ___bold em___") == (
+        ("paragraph", (strong_em, ("text", " and "), strong_em)),
+    )
+    assert parse_blocks("*a* ***b*** **c**") == (
+        ("paragraph", (
+            ("em", (("text", "a"),)), ("text", " "),
+            ("strong", (("em", (("text", "b"),)),)), ("text", " "),
+            ("strong", (("text", "c"),)),
+        )),
+    )
+    assert parse_blocks("a *** b ***") == (("paragraph", (("text", "a *** b ***"),)),)
+    em_around_strong = ("em", (("text", "Note: "), ("strong", (("text", "deadline"),)), ("text", " is Friday")))
+    assert parse_blocks("*Note: **deadline** is Friday*") == (("paragraph", (em_around_strong,)),)
+    assert parse_blocks("_Note: __deadline__ is Friday_") == (("paragraph", (em_around_strong,)),)
@@ -0,0 +1,54 @@
+def _add_requests(client, names):
+    ids = []
+    for name in names:
+        r = client.post("/api/requests", json={
+            "student_name": name,
+            "student_email": name.split()[0].lower() + "@example.com",
+            "source_institution": "Howard Community College",
+            "target_program": "Search Program",
+        })
+        ids.append(r.get_json()["id"])
+    return ids
+
+
+def test_search_matches_partial_name_newest_first(client):
+    ids = _add_requests(client, ["Quentin Zebulon", "Quincy Zebulonis"])
+
+    r = client.get("/api/requests/search?q=zebul")
+    body = r.get_json()
+    assert r.status_code == 200
+    assert body["mode"] == "substring"
+    assert [i["id"] for i in body["items"]][:2] == ids[::-1]
+
+
+def test_search_falls_back_to_fuzzy_on_typo(client):
+    (rid,) = _add_requests(client, ["Xavierine Okonkwo"])
+
+    body = client.get("/api/requests/search?q=okonkow").get_json()
+    assert body["mode"] == "fuzzy"
+    assert rid in [i["id"] for i in body["items"]]
+
+
+def test_search_keyset_pagination_and_index_follows_updates(client):
+    from database import db_session
+    from models import StudentRequest
+
+    ids = _add_requests(client, [f"Pagetest Student{i}" for i in range(5)])
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/requests/search?q=pagetest&limit=2" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url).get_json()
+        seen.extend(i["id"] for i in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ids[::-1]
+
+    db_session.get(StudentRequest, ids[0]).student_name = "Renamed Person"
+    db_session.commit()
+    assert client.get("/api/requests/search?q=renamed").get_json()["items"][0]["id"] == ids[0]
+    # the old name no longer contains "student0", so substring finds nothing
+    body = client.get("/api/requests/search?q=pagetest%20student0").get_json()
+    assert body["mode"] == "fuzzy"
+    db_session.remove()
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from services.storage import ExportStorage, InvalidArtifactName, LocalFileStorage, MemoryStorage
+
+
+@pytest.fixture(params=["local", "memory"])
+def storage(request, tmp_path):
+    if request.param == "local":
+        return LocalFileStorage(tmp_path)
+    return MemoryStorage()
+
+
+def test_roundtrip(storage):
+    storage.put("packet_1.docx", b"abc")
+    assert storage.exists("packet_1.docx")
+    assert storage.size("packet_1.docx") == 3
+    with storage.open("packet_1.docx") as f:
+        assert f.read() == b"abc"
+    assert list(storage.iter_names()) == ["packet_1.docx"]
+    assert storage.delete("packet_1.docx")
+    assert not storage.exists("packet_1.docx")
+
+
+def test_rejects_path_names(storage):
+    with pytest.raises(InvalidArtifactName):
+        storage.put("../packet_1.docx", b"x")
+
+
+def test_local_shards_and_adopts_flat_files(tmp_path):
+    (tmp_path / "packet_7.pdf").write_bytes(b"legacy")
+    storage = LocalFileStorage(tmp_path)
+
+    path = storage.local_path("packet_7.pdf")
+    assert path is not None
+    assert os.path.dirname(path) != str(tmp_path)
+    assert not (tmp_path / "packet_7.pdf").exists()
+
+    storage.put("packet_8.pdf", b"new")
+    leftovers = [n for _, _, files in os.walk(tmp_path) for n in files if n.endswith(".tmp")]
+    assert leftovers == []
+
+
+def test_incomplete_backend_fails_at_creation():
+    class PutOnly(ExportStorage):
+        def put(self, name, data):
+            pass
+
+    with pytest.raises(TypeError):
+        PutOnly()
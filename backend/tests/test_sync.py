@@ -0,0 +1,86 @@
+def test_request_delta_sync_returns_changes_and_deletes(client, packet):
+    from database import db_session
+    from models import StudentRequest
+
+    cursor = client.get("/api/requests").get_json()["cursor"]
+    assert client.get(f"/api/requests?since={cursor}").get_json()["items"] == []
+
+    rid = client.post("/api/requests", json={
+        "student_name": "Delta Sync", "student_email": "delta@example.com",
+    }).get_json()["id"]
+    body = client.get(f"/api/requests?since={cursor}").get_json()
+    assert [i["id"] for i in body["items"]] == [rid]
+    assert body["deleted"] == []
+    cursor = body["cursor"]
+
+    db_session.delete(db_session.get(StudentRequest, rid))
+    db_session.commit()
+    body = client.get(f"/api/requests?since={cursor}").get_json()
+    assert body["items"] == []
+    assert body["deleted"] == [rid]
+    db_session.remove()
+
+
+def test_section_edit_marks_packet_and_request_changed(client, packet):
+    from database import db_session
+    from models import PacketSection
+
+    packets_cursor = client.get("/api/packets").get_json()["cursor"]
+    requests_cursor = client.get("/api/requests").get_json()["cursor"]
+
+    section = PacketSection(packet_id=packet.id, title="Notes", display_order=9,
+                            section_type="advisor_notes", content="")
+    db_session.add(section)
+    db_session.commit()
+    sid = section.id
+    db_session.remove()
+    client.patch(f"/api/packets/{packet.id}/sections/{sid}", json={"content": "Take CMSC 202"})
+
+    changed = client.get(f"/api/packets?since={packets_cursor}").get_json()["items"]
+    assert [p["id"] for p in changed] == [packet.id]
+    changed = client.get(f"/api/requests?since={requests_cursor}").get_json()["items"]
+    assert [r["id"] for r in changed] == [packet.request_id]
+
+
+def test_delta_sync_pages_and_rejects_bad_cursors(client):
+    cursor = client.get("/api/requests").get_json()["cursor"]
+    ids = [
+        client.post("/api/requests", json={
+            "student_name": f"Page {i}", "student_email": f"page{i}@example.com",
+        }).get_json()["id"]
+        for i in range(3)
+    ]
+    seen = []
+    while True:
+        body = client.get(f"/api/requests?since={cursor}&limit=2").get_json()
+        seen.extend(i["id"] for i in body["items"])
+        cursor = body["cursor"]
+        if not body["has_more"]:
+            break
+    assert seen == ids
+    assert client.get("/api/requests?since=garbage").status_code == 400
+
+
+def test_delta_sync_follows_commit_order_not_updated_at(client):
+    from datetime import datetime, timedelta
+    from database import db_session
+    from models import StudentRequest, User
+
+    advisor = db_session.query(User).filter_by(email="advisor@test.edu").first()
+    cursor = client.get("/api/requests").get_json()["cursor"]
+
+    client.post("/api/requests", json={
+        "student_name": "Commits First", "student_email": "first@example.com",
+    })
+    cursor = client.get(f"/api/requests?since={cursor}").get_json()["cursor"]
+
+    # a writer that stamped updated_at before the one above but committed after it
+    late = StudentRequest(student_name="Commits Late", student_email="late@example.com",
+                          advisor_id=advisor.id, updated_at=datetime.utcnow() - timedelta(minutes=5))
+    db_session.add(late)
+    db_session.commit()
+    late_id = late.id
+    db_session.remove()
+
+    body = client.get(f"/api/requests?since={cursor}").get_json()
+    assert [i["id"] for i in body["items"]] == [late_id]
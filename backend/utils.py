@@ -1,7 +1,97 @@
 from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+import os
+import threading
+
+# werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+DEFAULT_PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+
+
+class PasswordVerifyBusy(Exception):
+    """Raised when the bounded verification pool has no free slot in time."""
+
+
+def check_email_deliverability() -> bool:
+    """
+    Whether validate_email should look up the domain's DNS records. Turn off
+    (EMAIL_CHECK_DELIVERABILITY=false) offline and for load tests, where the
+    lookup dominates request latency.
+    """
+    return os.getenv("EMAIL_CHECK_DELIVERABILITY", "true").lower() == "true"
+
+
+def password_hash_method() -> str:
+    return os.getenv("PASSWORD_HASH_METHOD", DEFAULT_PASSWORD_HASH_METHOD)
+
+
+@lru_cache(maxsize=8)
+def _canonical_method(method: str) -> str:
+    # werkzeug expands defaults into the stored prefix ("pbkdf2" -> "pbkdf2:sha256:600000"),
+    # so hash once to learn what prefix the configured method produces.
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
 
 def hash_password(pw: str) -> str:
-    return generate_password_hash(pw)
+    return generate_password_hash(pw, method=password_hash_method())
+
 
 def verify_password(pw: str, hashed: str) -> bool:
     return check_password_hash(hashed, pw)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """
+    True if the stored hash was made with a different algorithm/cost than
+    the one currently configured.
+    """
+    return hashed.split("$", 1)[0] != _canonical_method(password_hash_method())
+
+
+_verify_pool = None
+_verify_slots = None
+_verify_lock = threading.Lock()
+
+
+def _get_verify_pool():
+    global _verify_pool, _verify_slots
+    with _verify_lock:
+        if _verify_pool is None:
+            workers = int(os.getenv("PASSWORD_VERIFY_WORKERS", "0"))
+            if workers <= 0:
+                return None, None
+            _verify_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwverify")
+            # running + waiting in the pool's queue
+            _verify_slots = threading.BoundedSemaphore(workers * 2)
+        return _verify_pool, _verify_slots
+
+
+def verify_password_limited(pw: str, hashed: str) -> bool:
+    """
+    Like verify_password, but when PASSWORD_VERIFY_WORKERS > 0 the work runs
+    in a bounded thread pool (hashlib releases the GIL while hashing). If no
+    slot frees up within PASSWORD_VERIFY_TIMEOUT seconds, PasswordVerifyBusy
+    is raised instead of piling more hashing onto the workers.
+    """
+    pool, slots = _get_verify_pool()
+    if pool is None:
+        return verify_password(pw, hashed)
+
+    timeout = float(os.getenv("PASSWORD_VERIFY_TIMEOUT", "2"))
+    if not slots.acquire(timeout=timeout):
+        raise PasswordVerifyBusy()
+    try:
+        return pool.submit(verify_password, pw, hashed).result()
+    finally:
+        slots.release()
+
+
+def parse_iso_date(value):
+    """datetime from an ISO date/datetime query parameter, or None if missing or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None